@@ -0,0 +1,8 @@
+"""
+Benchmarks - End-to-end throughput of every processing mode
+Synthetic inputs are generated locally (no downloads), each case is rendered
+through the headless CLI and frames/sec, wall time per output, peak RSS and
+CPU utilisation are appended to a JSON history with regression checks:
+
+    python -m benchmarks.run --quick
+"""
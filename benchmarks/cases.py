@@ -0,0 +1,185 @@
+"""
+Benchmark Cases - Settings for every processing mode on synthetic media
+Media is generated once per spec into the work folder (reused while the spec
+is unchanged). Each case renders into its own output folder with the render
+manifest skip disabled, so every run renders every output, and lists what
+its outputs must look like (count, type, audio, durations).
+"""
+
+import os
+import json
+
+from utils.job_settings import get_default_settings, merge_settings, apply_audio_mode, apply_dual_audio_source
+from benchmarks import synthetic_media as media
+
+MEDIA_VERSION = 2
+
+# Source clips per resolution: (width, height, fps)
+SOURCES = {
+    '360p30': (640, 360, 30),
+    '720p25': (1280, 720, 25),
+    '1080p60': (1920, 1080, 60)
+}
+
+# Length of the synthetic GIF inputs (24 frames of 60 ms) and of videos made from still images
+GIF_SECONDS = 1.44
+IMAGE_SECONDS = 5
+
+def get_media_spec(quick):
+    """Sizes of the generated media (quick: short clips, fewer files)."""
+    return {
+        'version': MEDIA_VERSION,
+        'seconds': 2 if quick else 6,
+        'clips': 2 if quick else 3,
+        'sources': ['360p30', '720p25'] if quick else list(SOURCES)
+    }
+
+def generate_media(media_folder, quick=False):
+    """Generate benchmark inputs into media_folder unless they exist for the same spec."""
+    spec = get_media_spec(quick)
+    spec_path = os.path.join(media_folder, "spec.json")
+    try:
+        with open(spec_path, 'r', encoding='utf-8') as f:
+            if json.load(f) == spec:
+                return spec
+    except (OSError, ValueError):
+        pass
+    
+    print(f"🧪 Generating synthetic media in {media_folder}...")
+    media.reset_folder(media_folder)
+    seconds = spec['seconds']
+    
+    def folder(*names):
+        path = os.path.join(media_folder, *names)
+        os.makedirs(path, exist_ok=True)
+        return path
+    
+    for source in spec['sources']:
+        width, height, fps = SOURCES[source]
+        for index in range(spec['clips']):
+            media.write_video(os.path.join(folder("videos", source), media.caption_name(index, ".mp4")),
+                              width, height, fps, seconds)
+    
+    # Dual mode: two folders of 360p clips with different lengths
+    for index in range(spec['clips']):
+        media.write_video(os.path.join(folder("dual", "top"), media.caption_name(index, ".mp4")),
+                          640, 360, 30, seconds)
+        media.write_video(os.path.join(folder("dual", "bottom"), f"bottom {index}.mp4"),
+                          480, 480, 25, seconds * 0.75)
+    
+    # Narasi: two stories of two parts each, matched to the WAV tracks by name
+    for story in ("story_a", "story_b"):
+        for part in range(2):
+            media.write_video(os.path.join(folder("narasi", "videos"), f"{story} part{part} \U0001F525.mp4"),
+                              640, 360, 30, seconds / 2, audio=True)
+        media.write_wav(os.path.join(folder("narasi", "audio"), f"{story}.wav"), seconds * 1.5)
+    
+    for index in range(spec['clips']):
+        media.write_gif(os.path.join(folder("gifs"), media.caption_name(index, ".gif")), 320, 240)
+        media.write_image(os.path.join(folder("images"), media.caption_name(index, ".png")), 800, 600)
+    
+    for index in range(2):
+        media.write_wav(os.path.join(folder("music"), f"track{index}.wav"), seconds * 2, 330 + index * 110)
+    
+    media.write_template(os.path.join(folder("templates"), "single.png"), 1080, 1920, media.SINGLE_SLOT)
+    media.write_template(os.path.join(folder("templates"), "dual.png"), 1080, 1920, media.DUAL_SLOTS)
+    media.write_template(os.path.join(folder("templates"), "dual_legacy.png"), 1080, 1920, media.LEGACY_DUAL_SLOTS)
+    media.write_gif_template(os.path.join(folder("templates"), "animated.gif"), 540, 960)
+    media.write_emoji_folder(folder("emoji"))
+    
+    with open(spec_path, 'w', encoding='utf-8') as f:
+        json.dump(spec, f)
+    return spec
+
+def _settings(mode, output_folder, overrides):
+    """Default settings of mode with benchmark output settings and overrides."""
+    settings = get_default_settings(mode)
+    merge_settings(settings, {
+        'text_settings': {'enabled': True, 'size': 48, 'color': "#FFFFFF"},
+        'output_settings': {'custom_enabled': True, 'custom_folder': output_folder, 'skip_unchanged': False}
+    })
+    merge_settings(settings, overrides)
+    if 'audio_settings' in settings:
+        if mode == "dual_greenscreen":
+            apply_dual_audio_source(settings['audio_settings'])
+        apply_audio_mode(settings['audio_settings'])
+    return settings
+
+def _expect(outputs, durations, extension=".mp4", audio=None):
+    """
+    Expected outputs of a case: count, extension, audio stream (True: required,
+    False: none, None: not checked) and the durations an output may have.
+    """
+    return {'outputs': outputs, 'extension': extension, 'audio': audio, 'durations': durations}
+
+def build_cases(media_folder, output_root, quick=False):
+    """Benchmark cases: list of {'name', 'settings', 'expect'} (media must be generated)."""
+    spec = get_media_spec(quick)
+    seconds = spec['seconds']
+    clips = spec['clips']
+    
+    def path(*names):
+        return os.path.join(media_folder, *names)
+    
+    single_template = {'path': path("templates", "single.png")}
+    background_music = {'mode': "background_only", 'folder_path': path("music")}
+    cases = []
+    
+    def add(name, mode, overrides, expect):
+        cases.append({
+            'name': name,
+            'settings': _settings(mode, os.path.join(output_root, name), overrides),
+            'expect': expect
+        })
+    
+    canvas_presets = {'360p30': 'draft_360', '720p25': '720p', '1080p60': 'full'}
+    for source in spec['sources']:
+        add(f"greenscreen_{source}", "greenscreen", {
+            'folder_path': path("videos", source),
+            'template_info': single_template,
+            'audio_settings': background_music,
+            'canvas_settings': {'preset': canvas_presets[source]}
+        }, _expect(clips, [seconds], audio=True))
+    
+    add("blur_720p25", "blur", {
+        'folder_path': path("videos", "720p25"),
+        'blur_settings': {'crop_top': 5, 'crop_bottom': 5},
+        'canvas_settings': {'preset': 'draft_540'}
+    }, _expect(clips, [seconds]))
+    add("narasi", "narasi", {
+        'folder_path': path("narasi", "videos"),
+        'template_info': single_template,
+        'narasi_settings': {'audio_folder_path': path("narasi", "audio"), 'audio_mode': "mixed_audio"},
+        'canvas_settings': {'preset': 'draft_360'}
+    }, _expect(2, [seconds * 1.5], audio=True))
+    add("narasi_gif_template", "narasi", {
+        'folder_path': path("narasi", "videos"),
+        'template_info': {'path': path("templates", "animated.gif"), 'is_gif': True},
+        'narasi_settings': {'audio_folder_path': path("narasi", "audio")},
+        'canvas_settings': {'preset': 'draft_360'}
+    }, _expect(2, [seconds * 1.5], audio=True))
+    dual_folders = {'folder1': path("dual", "top"), 'folder2': path("dual", "bottom")}
+    add("dual_auto", "dual_greenscreen", {
+        'folder_paths': dual_folders,
+        'template_info': {'path': path("templates", "dual.png")},
+        'audio_settings': {'enabled': False, 'dual_audio_enabled': False},
+        'canvas_settings': {'preset': 'draft_360'}
+    }, _expect(clips, [seconds]))
+    add("dual_legacy", "dual_greenscreen", {
+        'folder_paths': dual_folders,
+        'template_info': {'path': path("templates", "dual_legacy.png")},
+        'audio_settings': {'enabled': False, 'dual_audio_enabled': False},
+        'canvas_settings': {'preset': 'draft_360'}
+    }, _expect(clips * 2, [seconds, seconds * 0.75]))
+    add("gif_input", "greenscreen", {
+        'folder_path': path("gifs"),
+        'template_info': single_template,
+        'canvas_settings': {'preset': 'draft_360'}
+    }, _expect(clips, [GIF_SECONDS], extension=".gif", audio=False))
+    add("image_input", "greenscreen", {
+        'folder_path': path("images"),
+        'template_info': single_template,
+        'audio_settings': background_music,
+        'canvas_settings': {'preset': 'draft_360', 'fps': 24}
+    }, _expect(clips, [IMAGE_SECONDS], audio=True))
+    return cases
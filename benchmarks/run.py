@@ -0,0 +1,352 @@
+"""
+Benchmark Runner - Render every case and track results over time
+Each case runs in its own process through the headless CLI, so peak RSS and
+CPU time (including ffmpeg children) can be read from wait4(). Results are
+appended to a JSON history; a case regresses when its frames/sec drops, or
+its wall time or peak RSS grows, beyond the threshold compared to the median
+of recent runs on the same machine. A case fails when the CLI exits with an
+error or an output is wrong: missing, wrong length, without the audio the
+case configures, or left with temp files next to it (see check_outputs):
+
+    python -m benchmarks.run                     (all cases)
+    python -m benchmarks.run --quick --cases greenscreen_360p30 narasi
+
+Exit code 1 when a case fails or regresses.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import statistics
+import subprocess
+import tempfile
+
+from benchmarks.cases import generate_media, build_cases
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_HISTORY = os.path.join(REPO_ROOT, "benchmarks", "history.json")
+HISTORY_VERSION = 1
+
+# Number of earlier runs whose median is the baseline
+BASELINE_RUNS = 5
+
+# Allowed difference between output and expected duration (seconds, about a frame at 24fps plus muxing)
+DURATION_TOLERANCE = 0.1
+
+def get_machine_key():
+    """Results are only compared between runs on the same kind of machine."""
+    return f"{platform.node()}/{platform.system()}-{platform.machine()}/{os.cpu_count()}cpu"
+
+def get_commit():
+    """Short commit hash of the repository, None outside git."""
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                                capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+def _run_measured(command, cwd, env, log_path):
+    """
+    Run command, return (exit code, wall seconds, peak RSS MB, CPU percent).
+    RSS and CPU are None where wait4 is not available (Windows).
+    """
+    with open(log_path, 'w', encoding='utf-8') as log:
+        start_time = time.perf_counter()
+        process = subprocess.Popen(command, cwd=cwd, env=env, stdout=log, stderr=subprocess.STDOUT)
+        if not hasattr(os, 'wait4'):
+            exit_code = process.wait()
+            return exit_code, time.perf_counter() - start_time, None, None
+        
+        _, status, usage = os.wait4(process.pid, 0)
+        wall_seconds = time.perf_counter() - start_time
+        # Reaped here, tell Popen so it does not wait again
+        process.returncode = os.waitstatus_to_exitcode(status)
+    
+    # ru_maxrss is kilobytes on Linux, bytes on macOS
+    rss_bytes = usage.ru_maxrss if sys.platform == 'darwin' else usage.ru_maxrss * 1024
+    cpu_seconds = usage.ru_utime + usage.ru_stime
+    cpu_percent = cpu_seconds / wall_seconds * 100 if wall_seconds > 0 else None
+    return process.returncode, wall_seconds, rss_bytes / (1024 * 1024), cpu_percent
+
+def _read_events(path):
+    """Progress events of a run (JSON lines)."""
+    events = []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    pass
+    except OSError:
+        pass
+    return events
+
+def probe_media(path):
+    """(duration seconds or None, video codec or None, has audio) of a media file from ffmpeg -i."""
+    from utils.file_operations import get_ffmpeg_binary
+    
+    result = subprocess.run([get_ffmpeg_binary(), '-hide_banner', '-i', path],
+                            capture_output=True, text=True, errors='replace', timeout=60)
+    duration = None
+    match = re.search(r'Duration: (\d+):(\d+):([0-9.]+)', result.stderr)
+    if match:
+        duration = int(match.group(1)) * 3600 + int(match.group(2)) * 60 + float(match.group(3))
+    match = re.search(r'Stream #.*?: Video: (\w+)', result.stderr)
+    video_codec = match.group(1) if match else None
+    return duration, video_codec, re.search(r'Stream #.*?: Audio:', result.stderr) is not None
+
+def check_outputs(expect, output_folder):
+    """
+    Problems of the outputs of a case (empty list if they are as expected):
+    output count, file type, H.264 video, audio present (or absent), duration
+    (one of the expected durations) and no temp files left in the output folder.
+    """
+    problems = []
+    outputs = []
+    for folder, _, file_names in os.walk(output_folder):
+        for file_name in sorted(file_names):
+            base_name, extension = os.path.splitext(file_name)
+            if base_name.endswith("_temp") or extension == ".tmp":
+                problems.append(f"temp file left: {file_name}")
+            elif extension in (".mp4", ".gif"):
+                outputs.append(os.path.join(folder, file_name))
+    
+    if len(outputs) != expect['outputs']:
+        problems.append(f"{len(outputs)} outputs, expected {expect['outputs']}")
+    
+    for path in outputs:
+        name = os.path.basename(path)
+        if not name.endswith(expect['extension']):
+            problems.append(f"{name}: expected a {expect['extension']} file")
+            continue
+        
+        duration, video_codec, has_audio = probe_media(path)
+        if expect['extension'] == ".mp4" and video_codec != "h264":
+            problems.append(f"{name}: video codec {video_codec}, expected h264")
+        if expect['audio'] is not None and has_audio != expect['audio']:
+            problems.append(f"{name}: {'no audio stream' if expect['audio'] else 'unexpected audio stream'}")
+        if duration is None or not any(abs(duration - seconds) <= DURATION_TOLERANCE
+                                       for seconds in expect['durations']):
+            expected = " or ".join(f"{seconds:g}s" for seconds in expect['durations'])
+            problems.append(f"{name}: duration {duration}s, expected {expected}")
+    return problems
+
+def run_case(case, workdir):
+    """Render one case, return its metrics."""
+    name = case['name']
+    case_folder = os.path.join(workdir, "runs", name)
+    shutil.rmtree(case_folder, ignore_errors=True)
+    os.makedirs(case_folder)
+    shutil.rmtree(case['settings']['output_settings']['custom_folder'], ignore_errors=True)
+    
+    settings_path = os.path.join(case_folder, "settings.json")
+    with open(settings_path, 'w', encoding='utf-8') as f:
+        json.dump(case['settings'], f, indent=2)
+    
+    event_log = os.path.join(case_folder, "events.jsonl")
+    timing_report = os.path.join(case_folder, "timing.json")
+    command = [sys.executable, '-m', 'utils.cli', 'render', '--settings', settings_path,
+               '--progress', 'none', '--event-log', event_log, '--timing-report', timing_report]
+    
+    env = dict(os.environ)
+    env['PYTHONPATH'] = REPO_ROOT + os.pathsep + env.get('PYTHONPATH', "")
+    env['PYTHONIOENCODING'] = "utf-8"
+    
+    # Run in the media folder: captions load emoji/<hex>.png relative to the working directory
+    exit_code, wall_seconds, peak_rss_mb, cpu_percent = _run_measured(
+        command, os.path.join(workdir, "media"), env, os.path.join(case_folder, "output.log")
+    )
+    
+    frames = {}
+    outputs = {}
+    for event in _read_events(event_log):
+        if event['event'] == 'frames':
+            frames[event['key']] = max(frames.get(event['key'], 0), event['frames'] or 0)
+        elif event['event'] == 'file_end' and event['success']:
+            outputs[event['key']] = event['seconds']
+    
+    stages = {}
+    try:
+        with open(timing_report, 'r', encoding='utf-8') as f:
+            stages = {stage: values['p50_ms'] for stage, values in json.load(f)['stages'].items()}
+    except (OSError, ValueError, KeyError):
+        pass
+    
+    output_problems = check_outputs(case['expect'], case['settings']['output_settings']['custom_folder'])
+    
+    total_frames = sum(frames.values())
+    output_seconds = [seconds for seconds in outputs.values() if seconds is not None]
+    return {
+        'exit_code': exit_code,
+        'output_problems': output_problems,
+        'outputs': len(outputs),
+        'frames': total_frames,
+        # Image inputs publish no frame counts
+        'fps': round(total_frames / wall_seconds, 2) if total_frames and wall_seconds > 0 else None,
+        'wall_seconds': round(wall_seconds, 3),
+        'seconds_per_output': round(statistics.mean(output_seconds), 3) if output_seconds else None,
+        'peak_rss_mb': round(peak_rss_mb, 1) if peak_rss_mb is not None else None,
+        'cpu_percent': round(cpu_percent, 1) if cpu_percent is not None else None,
+        'stage_p50_ms': stages
+    }
+
+def load_history(path):
+    """Benchmark history (empty if missing)."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            history = json.load(f)
+        if history.get('version') == HISTORY_VERSION:
+            return history
+        print(f"⚠️ Ignoring benchmark history with unknown version: {path}")
+    except (OSError, ValueError):
+        pass
+    return {'version': HISTORY_VERSION, 'runs': []}
+
+def save_history(path, history):
+    """Write history atomically."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(history, f, indent=1)
+    os.replace(temp_path, path)
+
+def get_baseline(history, machine_key, quick, case_name, metric):
+    """Median of metric over the last BASELINE_RUNS comparable runs, None without history."""
+    values = []
+    for run in reversed(history['runs']):
+        if run['machine'] != machine_key or run['quick'] != quick:
+            continue
+        result = run['results'].get(case_name)
+        if (result and result['exit_code'] == 0 and not result.get('output_problems')
+                and result.get(metric) is not None):
+            values.append(result[metric])
+            if len(values) == BASELINE_RUNS:
+                break
+    return statistics.median(values) if values else None
+
+def find_regressions(history, run, thresholds):
+    """Regression messages of run compared to the earlier runs in history."""
+    # (metric, threshold, True if higher is better)
+    checks = (
+        ('fps', thresholds['fps'], True),
+        ('wall_seconds', thresholds['wall'], False),
+        ('peak_rss_mb', thresholds['rss'], False)
+    )
+    regressions = []
+    for case_name, result in run['results'].items():
+        if result['exit_code'] != 0:
+            regressions.append(f"{case_name}: failed with exit code {result['exit_code']}")
+            continue
+        if result['output_problems']:
+            regressions.extend(f"{case_name}: {problem}" for problem in result['output_problems'])
+            continue
+        
+        for metric, threshold, higher_is_better in checks:
+            value = result.get(metric)
+            baseline = get_baseline(history, run['machine'], run['quick'], case_name, metric)
+            if value is None or not baseline:
+                continue
+            change = (value - baseline) / baseline
+            if (-change if higher_is_better else change) > threshold:
+                regressions.append(f"{case_name}: {metric} {value} vs baseline {baseline:g} ({change:+.1%})")
+    return regressions
+
+def print_results(results):
+    """Results as a table."""
+    print(f"\n{'case':<24}{'outputs':>8}{'frames':>8}{'fps':>9}{'wall s':>9}{'s/output':>10}{'rss MB':>9}{'cpu %':>8}")
+    for name, result in results.items():
+        def cell(key):
+            value = result.get(key)
+            return "-" if value is None else f"{value:g}"
+        if result['exit_code'] != 0:
+            status = f"  ❌ exit {result['exit_code']}"
+        elif result['output_problems']:
+            status = f"  ❌ {len(result['output_problems'])} output problems"
+        else:
+            status = ""
+        print(f"{name:<24}{result['outputs']:>8}{result['frames']:>8}{cell('fps'):>9}{cell('wall_seconds'):>9}"
+              f"{cell('seconds_per_output'):>10}{cell('peak_rss_mb'):>9}{cell('cpu_percent'):>8}{status}")
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description="End-to-end rendering benchmarks")
+    parser.add_argument('--quick', action='store_true', help="Short clips, fewer files and resolutions")
+    parser.add_argument('--cases', nargs='+', help="Only run these cases (default: all)")
+    parser.add_argument('--list', action='store_true', help="List case names and exit")
+    parser.add_argument('--workdir', default=os.path.join(tempfile.gettempdir(), "yt_short_benchmarks"),
+                        help="Folder for generated media and outputs")
+    parser.add_argument('--history', default=DEFAULT_HISTORY, help="JSON history file (default: benchmarks/history.json)")
+    parser.add_argument('--no-save', action='store_true', help="Compare against the history without appending this run")
+    parser.add_argument('--max-fps-drop', type=float, default=0.10,
+                        help="Allowed frames/sec drop vs baseline (default: 0.10 = 10%%)")
+    parser.add_argument('--max-wall-growth', type=float, default=0.15,
+                        help="Allowed wall time growth vs baseline (default: 0.15)")
+    parser.add_argument('--max-rss-growth', type=float, default=0.20,
+                        help="Allowed peak RSS growth vs baseline (default: 0.20)")
+    return parser
+
+def main(argv=None):
+    """Benchmark entry point. Returns exit code."""
+    args = build_parser().parse_args(argv)
+    workdir = os.path.abspath(args.workdir)
+    media_folder = os.path.join(workdir, "media")
+    
+    cases = build_cases(media_folder, os.path.join(workdir, "outputs"), args.quick)
+    if args.list:
+        for case in cases:
+            print(f"{case['name']:<24}{case['settings']['mode']}")
+        return 0
+    
+    if args.cases:
+        unknown = set(args.cases) - {case['name'] for case in cases}
+        if unknown:
+            print(f"❌ Unknown cases: {', '.join(sorted(unknown))}")
+            return 2
+        cases = [case for case in cases if case['name'] in args.cases]
+    
+    generate_media(media_folder, args.quick)
+    
+    results = {}
+    for case in cases:
+        print(f"⏱️ {case['name']} ({case['settings']['mode']})...")
+        results[case['name']] = run_case(case, workdir)
+    print_results(results)
+    
+    run = {
+        'time': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'commit': get_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'machine': get_machine_key(),
+        'quick': args.quick,
+        'results': results
+    }
+    
+    history = load_history(args.history)
+    regressions = find_regressions(history, run, {
+        'fps': args.max_fps_drop, 'wall': args.max_wall_growth, 'rss': args.max_rss_growth
+    })
+    
+    if not args.no_save:
+        history['runs'].append(run)
+        save_history(args.history, history)
+        print(f"\n💾 Results appended to {args.history}")
+    
+    if regressions:
+        print("\n❌ Regressions:")
+        for regression in regressions:
+            print(f"   {regression}")
+        return 1
+    
+    print("✅ No regressions")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
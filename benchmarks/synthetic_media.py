@@ -0,0 +1,148 @@
+"""
+Synthetic Media - Deterministic benchmark inputs generated locally
+Videos (moving gradient and shapes, optional sine audio track), green screen
+templates with one or two slots, animated GIF templates, GIF/image inputs,
+WAV tracks and emoji PNGs for captions. Everything is made with OpenCV,
+Pillow and the ffmpeg binary MoviePy uses, so no download is needed.
+"""
+
+import os
+import wave
+import math
+import shutil
+import subprocess
+
+import cv2
+import numpy as np
+from PIL import Image
+
+# Green used for template slots (inside the HSV range of create_green_screen_mask)
+SLOT_COLOR_BGR = (0, 255, 0)
+
+# Emoji used in caption file names (rendered from emoji/<hex>.png)
+CAPTION_EMOJI = ("\U0001F525", "\U0001F680")
+
+def _frame(width, height, index, fps):
+    """One frame: horizontal gradient scrolling with time and a moving circle."""
+    t = index / fps
+    x = np.arange(width, dtype=np.float32)
+    row = ((x / width + t * 0.25) % 1.0) * 255
+    frame = np.empty((height, width, 3), np.uint8)
+    frame[:, :, 0] = row.astype(np.uint8)
+    frame[:, :, 1] = np.linspace(40, 200, height, dtype=np.float32).astype(np.uint8)[:, None]
+    frame[:, :, 2] = 255 - frame[:, :, 0]
+    
+    center = (int(width / 2 + math.cos(t * 2) * width / 3), int(height / 2 + math.sin(t * 3) * height / 3))
+    cv2.circle(frame, center, max(4, min(width, height) // 8), (255, 255, 255), -1)
+    cv2.putText(frame, str(index), (8, max(20, height // 10)), cv2.FONT_HERSHEY_SIMPLEX,
+                max(0.5, height / 480), (0, 0, 0), 2)
+    return frame
+
+def write_wav(path, seconds, frequency=440.0, sample_rate=44100):
+    """Stereo 16-bit sine tone."""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    tone = (np.sin(2 * math.pi * frequency * t) * 0.3 * 32767).astype(np.int16)
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(2)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(np.repeat(tone, 2).tobytes())
+    return path
+
+def write_video(path, width, height, fps, seconds, audio=True):
+    """MP4 clip; with audio a sine track is muxed in (AAC)."""
+    from utils.file_operations import get_ffmpeg_binary
+    
+    frame_count = max(1, int(round(fps * seconds)))
+    video_path = path + ".video.mp4" if audio else path
+    writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    if not writer.isOpened():
+        raise RuntimeError(f"Could not open video writer for {path}")
+    try:
+        for index in range(frame_count):
+            writer.write(_frame(width, height, index, fps))
+    finally:
+        writer.release()
+    
+    if not audio:
+        return path
+    
+    wav_path = write_wav(path + ".wav", seconds, frequency=220 + (width % 7) * 40)
+    try:
+        subprocess.run([
+            get_ffmpeg_binary(), '-y', '-loglevel', 'error',
+            '-i', video_path, '-i', wav_path,
+            '-c:v', 'copy', '-c:a', 'aac', '-shortest', path
+        ], check=True)
+    finally:
+        os.remove(video_path)
+        os.remove(wav_path)
+    return path
+
+def write_template(path, width, height, slots):
+    """
+    PNG template: dark frame with a green rectangle per slot.
+    slots are (x, y, w, h) fractions of the template size.
+    """
+    template = np.full((height, width, 3), (60, 30, 90), np.uint8)
+    cv2.rectangle(template, (0, 0), (width - 1, height - 1), (200, 200, 200), max(2, width // 60))
+    for x, y, w, h in slots:
+        top_left = (int(x * width), int(y * height))
+        bottom_right = (int((x + w) * width), int((y + h) * height))
+        cv2.rectangle(template, top_left, bottom_right, SLOT_COLOR_BGR, -1)
+    cv2.imwrite(path, template)
+    return path
+
+# Slot layouts (fractions of the template)
+SINGLE_SLOT = ((0.08, 0.2, 0.84, 0.45),)
+DUAL_SLOTS = ((0.08, 0.08, 0.84, 0.38), (0.08, 0.54, 0.84, 0.38))
+
+# Two slots a few pixels apart: validated as dual at full size, but the gap
+# closes when the template is scaled to a draft canvas (dual legacy path)
+LEGACY_DUAL_SLOTS = ((0.08, 0.08, 0.84, 0.42), (0.08, 0.505, 0.84, 0.415))
+
+def write_gif_template(path, width, height, frame_count=12, duration_ms=80):
+    """Animated GIF template: single green slot with a pulsing border."""
+    frames = []
+    for index in range(frame_count):
+        template = np.full((height, width, 3), (60, 30, 90), np.uint8)
+        border = max(2, int(width / 40 * (1 + math.sin(index / frame_count * 2 * math.pi))))
+        cv2.rectangle(template, (0, 0), (width - 1, height - 1), (40, 200, 240), border)
+        x, y, w, h = SINGLE_SLOT[0]
+        cv2.rectangle(template, (int(x * width), int(y * height)),
+                      (int((x + w) * width), int((y + h) * height)), SLOT_COLOR_BGR, -1)
+        frames.append(Image.fromarray(cv2.cvtColor(template, cv2.COLOR_BGR2RGB)))
+    frames[0].save(path, save_all=True, append_images=frames[1:], duration=duration_ms, loop=0)
+    return path
+
+def write_gif(path, width, height, frame_count=24, duration_ms=60):
+    """Animated GIF input."""
+    frames = [Image.fromarray(cv2.cvtColor(_frame(width, height, index, 1000 / duration_ms), cv2.COLOR_BGR2RGB))
+              for index in range(frame_count)]
+    frames[0].save(path, save_all=True, append_images=frames[1:], duration=duration_ms, loop=0)
+    return path
+
+def write_image(path, width, height):
+    """Still image input."""
+    cv2.imwrite(path, _frame(width, height, 0, 30))
+    return path
+
+def write_emoji_folder(folder):
+    """Emoji PNGs for CAPTION_EMOJI in the layout text_rendering loads (emoji/<HEX>.png)."""
+    os.makedirs(folder, exist_ok=True)
+    colors = ((255, 120, 0, 255), (80, 160, 255, 255))
+    for char, color in zip(CAPTION_EMOJI, colors):
+        image = np.zeros((72, 72, 4), np.uint8)
+        cv2.circle(image, (36, 36), 32, color, -1)
+        Image.fromarray(image, 'RGBA').save(os.path.join(folder, f"{ord(char):04X}.png"))
+    return folder
+
+def caption_name(index, extension):
+    """Input file name with words and emoji (file names are the captions)."""
+    return f"clip {index} {CAPTION_EMOJI[index % len(CAPTION_EMOJI)]} benchmark{extension}"
+
+def reset_folder(folder):
+    """Empty folder (created if missing)."""
+    shutil.rmtree(folder, ignore_errors=True)
+    os.makedirs(folder)
+    return folder
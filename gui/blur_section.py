@@ -4,12 +4,14 @@ import os
 import cv2
 import numpy as np
 from PIL import Image, ImageTk, ImageDraw, ImageFont
+from utils.canvas import DEFAULT_CANVAS
 
 class BlurSection:
     """Blur mode section of the GUI."""
     
-    def __init__(self, parent_frame):
+    def __init__(self, parent_frame, get_canvas=None):
         self.parent_frame = parent_frame
+        self.get_canvas = get_canvas  # Returns the selected output CanvasSpec
         self.create_blur_section()
     
     def create_blur_section(self):
@@ -251,14 +253,15 @@ class BlurSection:
             # Process frame with current blur settings
             from utils.blur_processing import process_blur_frame
             
+            canvas = self.get_canvas() if self.get_canvas else DEFAULT_CANVAS
             processed_frame = process_blur_frame(
                 frame,
                 self.crop_top.get(),
                 self.crop_bottom.get(),
                 self.video_x_position.get(),
                 self.video_y_position.get(),
-                1080,  # target_width
-                1920   # target_height
+                canvas.width,
+                canvas.height
             )
             
             # Resize for preview
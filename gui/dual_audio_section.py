@@ -2,6 +2,7 @@ import tkinter as tk
 from tkinter import filedialog
 import os
 from utils.file_operations import get_audio_files
+from gui.music_selection import MusicSelectionControls
 
 class DualAudioSection:
     """Enhanced audio section for dual green screen mode."""
@@ -275,6 +276,9 @@ class DualAudioSection:
             bg="#f0f0f0"
         )
         background_percent_label.pack(side=tk.LEFT)
+        
+        # Background music selection policy
+        self.music_selection = MusicSelectionControls(volume_frame)
     
     def select_audio_folder1(self):
         """Select audio folder 1."""
@@ -364,7 +368,7 @@ class DualAudioSection:
         else:
             folder_path = self.audio_folder2_path
         
-        return {
+        settings = {
             'enabled': self.audio_enabled.get(),
             'dual_audio_enabled': self.dual_audio_enabled.get(),
             'folder_path': folder_path,
@@ -374,6 +378,8 @@ class DualAudioSection:
             'original_volume': self.original_volume.get(),
             'background_volume': self.background_volume.get()
         }
+        settings.update(self.music_selection.get_music_settings())
+        return settings
     
     def pack_forget(self):
         """Hide dual audio section."""
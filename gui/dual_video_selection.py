@@ -1,7 +1,7 @@
 import tkinter as tk
 from tkinter import filedialog
 import os
-from utils.file_operations import get_all_media_files
+from utils.file_operations import get_all_media_files, get_dual_files_to_process
 
 class DualVideoSelection:
     """Dual video selection section for dual green screen mode."""
@@ -230,27 +230,7 @@ class DualVideoSelection:
     
     def get_files_to_process(self):
         """Get all media files from both folders for processing."""
-        files_to_process = []
-        
-        # Add files from folder 1
-        if self.folder1_path:
-            try:
-                media_files = get_all_media_files(self.folder1_path)
-                for file_name in media_files:
-                    files_to_process.append((self.folder1_path, file_name, "folder1"))
-            except Exception as e:
-                print(f"Error getting files from folder 1: {e}")
-        
-        # Add files from folder 2
-        if self.folder2_path:
-            try:
-                media_files = get_all_media_files(self.folder2_path)
-                for file_name in media_files:
-                    files_to_process.append((self.folder2_path, file_name, "folder2"))
-            except Exception as e:
-                print(f"Error getting files from folder 2: {e}")
-        
-        return files_to_process
+        return get_dual_files_to_process(self.folder1_path, self.folder2_path)
     
     def pack_forget(self):
         """Hide dual video selection section."""
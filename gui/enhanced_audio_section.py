@@ -2,6 +2,7 @@ import tkinter as tk
 from tkinter import filedialog
 import os
 from utils.file_operations import get_audio_files
+from gui.music_selection import MusicSelectionControls
 
 class EnhancedAudioSection:
     """Enhanced audio section for green screen and blur modes with multiple audio options."""
@@ -211,6 +212,9 @@ class EnhancedAudioSection:
             bg="#f0f0f0"
         )
         background_percent_label.pack(side=tk.LEFT)
+        
+        # Background music selection policy
+        self.music_selection = MusicSelectionControls(self.volume_controls_frame)
     
     def select_audio_folder(self):
         """Select audio folder for background music."""
@@ -263,6 +267,7 @@ class EnhancedAudioSection:
             'original_volume': self.original_volume.get(),
             'background_volume': self.background_volume.get()
         }
+        settings.update(self.music_selection.get_music_settings())
         
         # Convert to format compatible with existing audio processing
         if audio_mode == "original_only":
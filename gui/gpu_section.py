@@ -1,3 +1,4 @@
+import os
 import tkinter as tk
 from tkinter import ttk
 from utils.gpu_config import gpu_config
@@ -5,11 +6,16 @@ from utils.gpu_config import gpu_config
 class GPUSection:
     """GPU settings section of the GUI."""
     
-    def __init__(self, parent_frame, gpu_enabled, selected_encoder, selected_decoder):
+    def __init__(self, parent_frame, gpu_enabled, selected_encoder, selected_decoder, segment_workers=None,
+                 stage_workers=None):
         self.parent_frame = parent_frame
         self.gpu_enabled = gpu_enabled
         self.selected_encoder = selected_encoder
         self.selected_decoder = selected_decoder
+        self.segment_workers = segment_workers if segment_workers is not None else tk.IntVar(value=1)
+        self.stage_workers = stage_workers if stage_workers is not None else {
+            stage: tk.IntVar(value=1) for stage in ("render", "encode", "mux")
+        }
         self.create_gpu_settings()
     
     def create_gpu_settings(self):
@@ -34,6 +40,10 @@ class GPUSection:
         # Encoder/Decoder Selection
         self.create_codec_selection()
         
+        # Parallel segment rendering
+        self.create_segment_controls()
+        self.create_stage_controls()
+        
         # Performance Info
         self.create_performance_info()
         
@@ -115,6 +125,59 @@ class GPUSection:
         self.decoder_combobox.pack(side=tk.LEFT, padx=(10, 0))
         self.decoder_combobox.bind("<<ComboboxSelected>>", self.on_decoder_change)
     
+    def create_segment_controls(self):
+        """Create parallel segment rendering controls."""
+        segment_frame = tk.Frame(self.gpu_frame, bg="#f0f0f0")
+        segment_frame.pack(pady=5, fill=tk.X)
+        
+        tk.Label(segment_frame, text="⚡ Parallel Segments:", font=("Arial", 10), bg="#f0f0f0").pack(side=tk.LEFT)
+        
+        segment_spinbox = tk.Spinbox(
+            segment_frame, 
+            from_=1, 
+            to=os.cpu_count() or 1, 
+            textvariable=self.segment_workers, 
+            width=5, 
+            font=("Arial", 10)
+        )
+        segment_spinbox.pack(side=tk.LEFT, padx=(10, 0))
+        
+        tk.Label(
+            segment_frame, 
+            text="(1 = off; splits long videos across CPU cores)", 
+            font=("Arial", 9), 
+            fg="#7f8c8d", 
+            bg="#f0f0f0"
+        ).pack(side=tk.LEFT, padx=(10, 0))
+    
+    def create_stage_controls(self):
+        """Create batch pipeline worker controls (render / encode / mux)."""
+        stage_frame = tk.Frame(self.gpu_frame, bg="#f0f0f0")
+        stage_frame.pack(pady=5, fill=tk.X)
+        
+        tk.Label(stage_frame, text="🏭 Pipeline Workers:", font=("Arial", 10), bg="#f0f0f0").pack(side=tk.LEFT)
+        
+        for stage, variable in self.stage_workers.items():
+            tk.Label(stage_frame, text=f"{stage.title()}:", font=("Arial", 10), bg="#f0f0f0").pack(side=tk.LEFT, padx=(10, 0))
+            
+            stage_spinbox = tk.Spinbox(
+                stage_frame, 
+                from_=1, 
+                to=os.cpu_count() or 1, 
+                textvariable=variable, 
+                width=3, 
+                font=("Arial", 10)
+            )
+            stage_spinbox.pack(side=tk.LEFT, padx=(5, 0))
+        
+        tk.Label(
+            stage_frame, 
+            text="(files processed concurrently per stage)", 
+            font=("Arial", 9), 
+            fg="#7f8c8d", 
+            bg="#f0f0f0"
+        ).pack(side=tk.LEFT, padx=(10, 0))
+    
     def create_performance_info(self):
         """Create performance information display."""
         perf_info_frame = tk.Frame(self.gpu_frame, bg="#f0f0f0")
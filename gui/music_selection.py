@@ -0,0 +1,56 @@
+import tkinter as tk
+from tkinter import ttk
+from utils.music_planner import MUSIC_POLICIES
+
+class MusicSelectionControls:
+    """Background music selection policy controls (shared by audio sections)."""
+    
+    def __init__(self, parent_frame):
+        self.parent_frame = parent_frame
+        self.music_policy = tk.StringVar(value=MUSIC_POLICIES['random'])
+        self.music_seed = tk.StringVar(value="")
+        self.create_controls()
+    
+    def create_controls(self):
+        """Create policy combobox and seed entry."""
+        self.music_frame = tk.Frame(self.parent_frame, bg="#f0f0f0")
+        self.music_frame.pack(pady=5, fill=tk.X)
+        
+        tk.Label(self.music_frame, text="🎲 Music Selection:", font=("Arial", 10), bg="#f0f0f0").pack(side=tk.LEFT)
+        
+        policy_combobox = ttk.Combobox(
+            self.music_frame, 
+            textvariable=self.music_policy, 
+            values=list(MUSIC_POLICIES.values()), 
+            state="readonly", 
+            width=20
+        )
+        policy_combobox.pack(side=tk.LEFT, padx=(10, 0))
+        
+        tk.Label(self.music_frame, text="Seed:", font=("Arial", 10), bg="#f0f0f0").pack(side=tk.LEFT, padx=(10, 0))
+        
+        seed_entry = tk.Entry(self.music_frame, textvariable=self.music_seed, width=8, font=("Arial", 10))
+        seed_entry.pack(side=tk.LEFT, padx=(5, 0))
+        
+        tk.Label(
+            self.music_frame, 
+            text="(same seed = same music per video)", 
+            font=("Arial", 9), 
+            bg="#f0f0f0", 
+            fg="#7f8c8d"
+        ).pack(side=tk.LEFT, padx=(10, 0))
+    
+    def get_music_settings(self):
+        """Get music selection settings."""
+        label = self.music_policy.get()
+        policy = next((p for p, l in MUSIC_POLICIES.items() if l == label), 'random')
+        
+        try:
+            seed = int(self.music_seed.get().strip())
+        except ValueError:
+            seed = None
+        
+        return {
+            'music_policy': policy,
+            'music_seed': seed
+        }
@@ -1,7 +1,10 @@
 import tkinter as tk
 from tkinter import filedialog
 import os
-from utils.file_operations import get_audio_files, get_all_media_files
+import queue
+import threading
+from utils.file_operations import get_audio_files
+from utils.narasi_matching import get_narasi_folder_matches, match_narasi_files
 
 class NarasiSection:
     """Narasi mode section of the GUI with bulk processing support."""
@@ -9,6 +12,9 @@ class NarasiSection:
     def __init__(self, parent_frame):
         self.parent_frame = parent_frame
         self.narasi_audio_folder_path = ""
+        self.matching_results = queue.Queue()
+        self.matching_request = 0
+        self.matching_poll_id = None  # pending after() of the poll loop (one loop at a time)
         self.create_narasi_section()
     
     def create_narasi_section(self):
@@ -265,6 +271,18 @@ class NarasiSection:
         )
         self.audio_mode_description.pack(pady=(5, 0))
         
+        # Segment cache (clips shared by several audios are decoded once)
+        self.segment_cache_var = tk.BooleanVar(value=False)
+        segment_cache_check = tk.Checkbutton(
+            audio_mode_section, 
+            text="💾 Cache normalised clips (faster when audios share videos, uses disk space)", 
+            variable=self.segment_cache_var,
+            font=("Arial", 9), 
+            bg="#f0f0f0",
+            activebackground="#f0f0f0"
+        )
+        segment_cache_check.pack(anchor=tk.W, padx=10, pady=(8, 0))
+        
         # Initially update audio mode state
         self.on_audio_mode_change()
     
@@ -309,19 +327,13 @@ class NarasiSection:
             except Exception as e:
                 self.audio_info_label.config(text=f"Error scanning audio folder: {str(e)}")
     
-    def update_matching_preview(self):
-        """Update the file matching preview."""
-        # This will be called from the main GUI when video folder changes
-        # or when audio folder is selected
-        pass
-    
     def set_video_folder_path(self, video_folder_path):
         """Set video folder path and update matching preview."""
         self.video_folder_path = video_folder_path
         self.update_matching_preview()
     
     def update_matching_preview(self):
-        """Update matching preview between video and audio files."""
+        """Update matching preview between video and audio files (matched in a background thread)."""
         if not hasattr(self, 'video_folder_path') or not self.video_folder_path:
             self.matching_info_label.config(text="Select video folder to see matching preview")
             return
@@ -330,71 +342,62 @@ class NarasiSection:
             self.matching_info_label.config(text="Select audio folder to see matching preview")
             return
         
+        # Large folders take a while: list and match off the Tk thread, only the latest request is shown
+        self.matching_request += 1
+        self.matching_info_label.config(text="🔍 Matching video and audio files...")
+        threading.Thread(
+            target=self._match_in_background,
+            args=(self.matching_request, self.video_folder_path, self.narasi_audio_folder_path),
+            daemon=True
+        ).start()
+        if self.matching_poll_id is None:
+            self.matching_poll_id = self.matching_info_label.after(100, self._poll_matching_results)
+    
+    def _match_in_background(self, request, video_folder_path, audio_folder_path):
+        """Background thread: compute the preview text and queue it for the Tk thread."""
         try:
-            # Get video and audio files
-            video_files = get_all_media_files(self.video_folder_path)
-            audio_files = get_audio_files(self.narasi_audio_folder_path)
-            
-            if not video_files:
-                self.matching_info_label.config(text="No video files found in video folder")
-                return
-            
-            if not audio_files:
-                self.matching_info_label.config(text="No audio files found in audio folder")
-                return
-            
-            # Create matching pairs
-            matches = self.create_file_matches(video_files, audio_files)
-            
-            # Display matching info
-            if matches:
-                match_text = f"✅ Found {len(matches)} matching pairs:\n"
-                for i, (audio_name, matched_videos) in enumerate(matches.items()):
-                    if i < 5:  # Show first 5 matches
-                        match_text += f"• {audio_name} ↔ {len(matched_videos)} videos\n"
-                    elif i == 5:
-                        match_text += f"... and {len(matches) - 5} more pairs"
-                        break
-                
-                self.matching_info_label.config(text=match_text)
-            else:
-                self.matching_info_label.config(
-                    text="❌ No matching files found. Ensure video and audio files have similar names."
-                )
-        
+            video_files, audio_files, matches, _ = get_narasi_folder_matches(video_folder_path, audio_folder_path)
+            text = self.get_matching_text(video_files, audio_files, matches)
         except Exception as e:
-            self.matching_info_label.config(text=f"Error creating matching preview: {str(e)}")
+            text = f"Error creating matching preview: {str(e)}"
+        self.matching_results.put((request, text))
+    
+    def _poll_matching_results(self):
+        """Tk thread: show the result of the latest request when it is ready."""
+        self.matching_poll_id = None
+        while True:
+            try:
+                request, text = self.matching_results.get_nowait()
+            except queue.Empty:
+                break
+            if request == self.matching_request:
+                self.matching_info_label.config(text=text)
+                return
+        self.matching_poll_id = self.matching_info_label.after(100, self._poll_matching_results)
+    
+    def get_matching_text(self, video_files, audio_files, matches):
+        """Preview text for matched files."""
+        if not video_files:
+            return "No video files found in video folder"
+        
+        if not audio_files:
+            return "No audio files found in audio folder"
+        
+        if not matches:
+            return "❌ No matching files found. Ensure video and audio files have similar names."
+        
+        match_text = f"✅ Found {len(matches)} matching pairs:\n"
+        for i, (audio_name, matched_videos) in enumerate(matches.items()):
+            if i < 5:  # Show first 5 matches
+                match_text += f"• {audio_name} ↔ {len(matched_videos)} videos\n"
+            elif i == 5:
+                match_text += f"... and {len(matches) - 5} more pairs"
+                break
+        return match_text
     
     def create_file_matches(self, video_files, audio_files):
         """Create matches between video and audio files based on filename."""
-        matches = {}
-        
-        # Get base names (without extensions) for audio files
-        audio_base_names = {}
-        for audio_file in audio_files:
-            base_name = os.path.splitext(audio_file)[0].lower()
-            audio_base_names[base_name] = audio_file
-        
-        # For each audio file, find matching videos
-        for base_name, audio_file in audio_base_names.items():
-            matched_videos = []
-            
-            # Find videos that match this audio file name
-            for video_file in video_files:
-                video_base_name = os.path.splitext(video_file)[0].lower()
-                
-                # Exact match or partial match
-                if (base_name == video_base_name or 
-                    base_name in video_base_name or 
-                    video_base_name in base_name):
-                    matched_videos.append(video_file)
-            
-            # If no exact matches found, use all videos (fallback)
-            if not matched_videos:
-                matched_videos = video_files.copy()
-            
-            matches[audio_file] = matched_videos
-        
+        matches, _ = match_narasi_files(video_files, audio_files)
         return matches
     
     def get_narasi_settings(self):
@@ -404,7 +407,8 @@ class NarasiSection:
             'has_audio_folder': bool(self.narasi_audio_folder_path),
             'audio_mode': self.audio_mode_var.get(),
             'narasi_volume': self.narasi_volume.get(),
-            'original_volume': self.original_volume.get()
+            'original_volume': self.original_volume.get(),
+            'segment_cache': self.segment_cache_var.get()
         }
     
     def get_narasi_audio_folder_path(self):
@@ -1,6 +1,22 @@
 import tkinter as tk
-from tkinter import filedialog
+from tkinter import filedialog, ttk
 import os
+from utils.canvas import CANVAS_PRESETS, CANVAS_PRESET_LABELS
+
+# Output FPS options (label -> fps, None = keep source fps)
+FPS_OPTIONS = {
+    "Source": None,
+    "24": 24,
+    "25": 25,
+    "30": 30,
+    "60": 60
+}
+
+# GIF output encoders (label -> encoder of utils.gif_processing.GIF_ENCODERS)
+GIF_ENCODER_OPTIONS = {
+    "Fast (shared palette)": "palette",
+    "ffmpeg (dithered, slower)": "ffmpeg"
+}
 
 class OutputSection:
     """Output settings section of the GUI."""
@@ -8,6 +24,9 @@ class OutputSection:
     def __init__(self, parent_frame):
         self.parent_frame = parent_frame
         self.output_folder_path = ""
+        self.canvas_preset = tk.StringVar(value=CANVAS_PRESET_LABELS['full'])
+        self.canvas_fps = tk.StringVar(value="Source")
+        self.gif_encoder = tk.StringVar(value="Fast (shared palette)")
         self.create_output_section()
     
     def create_output_section(self):
@@ -73,6 +92,71 @@ class OutputSection:
         
         # Initially disable custom output
         self.update_custom_output_state()
+        
+        # Resume: skip outputs already rendered from unchanged inputs/settings
+        self.skip_unchanged = tk.BooleanVar(value=True)
+        skip_checkbox = tk.Checkbutton(
+            self.output_frame, 
+            text="⏭️ Skip outputs already rendered (unchanged inputs and settings)", 
+            variable=self.skip_unchanged, 
+            font=("Arial", 10), 
+            bg="#f0f0f0"
+        )
+        skip_checkbox.pack(pady=3)
+        
+        self.create_canvas_controls()
+    
+    def create_canvas_controls(self):
+        """Create output resolution and fps selection."""
+        resolution_frame = tk.Frame(self.output_frame, bg="#f0f0f0")
+        resolution_frame.pack(pady=5, fill=tk.X)
+        
+        tk.Label(resolution_frame, text="📐 Output Resolution:", font=("Arial", 10), bg="#f0f0f0").pack(side=tk.LEFT)
+        
+        resolution_combobox = ttk.Combobox(
+            resolution_frame, 
+            textvariable=self.canvas_preset, 
+            values=[CANVAS_PRESET_LABELS[preset] for preset in CANVAS_PRESETS], 
+            state="readonly", 
+            width=20
+        )
+        resolution_combobox.pack(side=tk.LEFT, padx=(10, 0))
+        
+        fps_frame = tk.Frame(self.output_frame, bg="#f0f0f0")
+        fps_frame.pack(pady=5, fill=tk.X)
+        
+        tk.Label(fps_frame, text="🎞️ Output FPS:", font=("Arial", 10), bg="#f0f0f0").pack(side=tk.LEFT)
+        
+        fps_combobox = ttk.Combobox(
+            fps_frame, 
+            textvariable=self.canvas_fps, 
+            values=list(FPS_OPTIONS), 
+            state="readonly", 
+            width=8
+        )
+        fps_combobox.pack(side=tk.LEFT, padx=(10, 0))
+        
+        tk.Label(
+            fps_frame, 
+            text="(Draft resolutions render much faster for previews)", 
+            font=("Arial", 9), 
+            bg="#f0f0f0", 
+            fg="#7f8c8d"
+        ).pack(side=tk.LEFT, padx=(10, 0))
+        
+        gif_frame = tk.Frame(self.output_frame, bg="#f0f0f0")
+        gif_frame.pack(pady=5, fill=tk.X)
+        
+        tk.Label(gif_frame, text="🎞️ GIF Encoder:", font=("Arial", 10), bg="#f0f0f0").pack(side=tk.LEFT)
+        
+        gif_combobox = ttk.Combobox(
+            gif_frame, 
+            textvariable=self.gif_encoder, 
+            values=list(GIF_ENCODER_OPTIONS), 
+            state="readonly", 
+            width=24
+        )
+        gif_combobox.pack(side=tk.LEFT, padx=(10, 0))
     
     def select_output_folder(self):
         """Select custom output folder."""
@@ -108,7 +192,22 @@ class OutputSection:
         """Get output settings."""
         return {
             'custom_enabled': self.custom_output_enabled.get(),
-            'custom_folder': self.output_folder_path if self.custom_output_enabled.get() else ""
+            'custom_folder': self.output_folder_path if self.custom_output_enabled.get() else "",
+            'skip_unchanged': self.skip_unchanged.get(),
+            'gif_encoder': GIF_ENCODER_OPTIONS.get(self.gif_encoder.get(), "palette")
+        }
+    
+    def get_canvas_settings(self):
+        """Get output canvas settings (resolution preset and fps)."""
+        label = self.canvas_preset.get()
+        preset = next((p for p, l in CANVAS_PRESET_LABELS.items() if l == label), 'full')
+        width, height = CANVAS_PRESETS[preset]
+        
+        return {
+            'preset': preset,
+            'width': width,
+            'height': height,
+            'fps': FPS_OPTIONS.get(self.canvas_fps.get())
         }
     
     def pack_forget(self):
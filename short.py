@@ -1,3 +1,4 @@
+import multiprocessing
 import tkinter as tk
 from utils.gui_components import VideoEditorGUI
 from utils.video_processor import VideoProcessor
@@ -22,4 +23,6 @@ def main():
     root.mainloop()
 
 if __name__ == "__main__":
+    # Required for worker processes in the frozen (PyInstaller) build
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -0,0 +1,66 @@
+"""
+Audio Cache - Decoded PCM cache for background music libraries
+Decoded tracks are stored as raw float32 files in a shared cache folder and
+opened with np.memmap, so every process (and every output in a batch) reuses
+the same decode. Entries are keyed by path, size and mtime and evicted
+least-recently-used first when the cache exceeds its byte budget
+(utils.file_cache).
+"""
+
+import os
+import tempfile
+
+import numpy as np
+
+from utils.file_cache import FileCache
+
+CACHE_FOLDER = os.path.join(tempfile.gettempdir(), "yts_pcm_cache")
+
+# Maximum size of all cached PCM files (2 GB, about 3 hours of 44.1 kHz stereo)
+CACHE_BUDGET_BYTES = 2 * 1024 ** 3
+
+CACHE_EXTENSION = ".f32"
+
+def get_pcm_cache(budget_bytes=CACHE_BUDGET_BYTES):
+    return FileCache(CACHE_FOLDER, CACHE_EXTENSION, budget_bytes)
+
+def get_cache_key(audio_path, sample_rate, channels):
+    """Cache key from path, size and mtime (changes when the file changes)."""
+    return get_pcm_cache().get_key(audio_path, f"{sample_rate}|{channels}")
+
+def load_cached_pcm(audio_path, sample_rate, channels, budget_bytes=CACHE_BUDGET_BYTES):
+    """
+    Get decoded PCM for audio_path as a read-only memmap of shape (samples, channels).
+    Decodes and stores the track on a cache miss. Returns None if there is no audio.
+    """
+    from utils.audio_engine import decode_audio
+    
+    cache = get_pcm_cache(budget_bytes)
+    key = get_cache_key(audio_path, sample_rate, channels)
+    cache_path = cache.lookup(key)
+    
+    if cache_path is None:
+        samples = decode_audio(audio_path, sample_rate=sample_rate, channels=channels)
+        if samples is None:
+            return None
+        
+        file, temp_path = cache.create_temp()
+        with file:
+            file.write(samples.tobytes())
+        cache_path = cache.publish(temp_path, key)
+        
+        print(f"💾 Cached decoded audio: {os.path.basename(audio_path)} "
+              f"({os.path.getsize(cache_path) / 1024 ** 2:.1f} MB)")
+    
+    if os.path.getsize(cache_path) == 0:
+        return None
+    
+    return np.memmap(cache_path, dtype=np.float32, mode='r').reshape(-1, channels)
+
+def evict_cache(budget_bytes=CACHE_BUDGET_BYTES, keep=None):
+    """Delete least recently used entries until the cache fits in budget_bytes."""
+    get_pcm_cache(budget_bytes).evict(keep=keep)
+
+def clear_cache():
+    """Remove all cached PCM files."""
+    get_pcm_cache().clear()
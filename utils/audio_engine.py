@@ -0,0 +1,341 @@
+"""
+Audio Engine - Vectorized audio mixing
+Every audio source is decoded by ffmpeg to float32 PCM and processed in
+fixed-size blocks: gain, loop/trim and mixing are NumPy operations and each
+mixed block is streamed straight into the ffmpeg encoder that writes the
+final video. Memory stays at a few blocks per track, whatever the length.
+"""
+
+import os
+import subprocess
+import tempfile
+
+import cv2
+import numpy as np
+
+from utils.file_operations import get_ffmpeg_binary
+from utils.audio_cache import load_cached_pcm
+from utils.cancellation import get_cancel_token, run_subprocess
+
+SAMPLE_RATE = 44100
+CHANNELS = 2
+
+# Samples written to the encoder per block (about 1 second)
+STREAM_BLOCK_SAMPLES = SAMPLE_RATE
+
+def get_video_duration(video_path):
+    """Get video duration in seconds (frame count / fps)."""
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+    cap.release()
+    
+    if fps <= 0 or frame_count <= 0:
+        return 0
+    return frame_count / fps
+
+def decode_audio(audio_path, max_duration=None, sample_rate=SAMPLE_RATE, channels=CHANNELS):
+    """
+    Decode audio (or the audio stream of a video) to float32 PCM.
+    Returns array of shape (samples, channels), or None if there is no audio.
+    ffmpeg resamples and up/down-mixes to the engine format while decoding.
+    """
+    cmd = [get_ffmpeg_binary(), '-hide_banner', '-loglevel', 'error', '-i', audio_path]
+    if max_duration:
+        cmd += ['-t', f"{max_duration:.6f}"]
+    cmd += ['-vn', '-f', 'f32le', '-acodec', 'pcm_f32le',
+            '-ar', str(sample_rate), '-ac', str(channels), '-']
+    
+    result = run_subprocess(cmd, capture_output=True)
+    
+    if result.returncode != 0 or not result.stdout:
+        print(f"⚠️ No audio decoded from {os.path.basename(audio_path)}")
+        return None
+    
+    samples = np.frombuffer(result.stdout, dtype=np.float32)
+    return samples[:len(samples) - len(samples) % channels].reshape(-1, channels)
+
+class AudioTrackReader:
+    """
+    Reads one track as fixed-size PCM blocks with gain, loop and trim applied.
+    Uncached tracks are streamed from an ffmpeg decoder, so memory per track
+    stays at one block regardless of the track length.
+    """
+    
+    def __init__(self, track, duration, sample_rate=SAMPLE_RATE, channels=CHANNELS):
+        self.path = track.get('path')
+        self.loop = track.get('loop', False)
+        self.gain = np.float32(track.get('volume', 100) / 100.0)
+        self.duration = duration
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.samples = track.get('samples')
+        self.position = 0
+        self.process = None
+        self.exhausted = False
+        
+        if self.samples is None and track.get('cached'):
+            # Library tracks (background music) are decoded once and shared
+            self.samples = load_cached_pcm(self.path, sample_rate, channels)
+            if self.samples is None:
+                self.exhausted = True
+        
+        self.pending = self._read_source(STREAM_BLOCK_SAMPLES) if not self.exhausted else None
+        self.has_audio = self.pending is not None and len(self.pending) > 0
+        
+        if not self.has_audio:
+            if self.samples is None:
+                print(f"⚠️ No audio decoded from {os.path.basename(self.path)}")
+            self.close()
+    
+    def _start_decoder(self):
+        """Start ffmpeg decoding the track to float32 PCM on stdout."""
+        cmd = [get_ffmpeg_binary(), '-hide_banner', '-loglevel', 'error', '-i', self.path]
+        if not self.loop:
+            # Only the part that ends up in the output is decoded
+            cmd += ['-t', f"{self.duration:.6f}"]
+        cmd += ['-vn', '-f', 'f32le', '-acodec', 'pcm_f32le',
+                '-ar', str(self.sample_rate), '-ac', str(self.channels), '-']
+        self.process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        get_cancel_token().register_process(self.process)
+    
+    def _read_source(self, frames):
+        """Read up to frames from the source (empty array at the end of the track)."""
+        if self.samples is not None:
+            chunk = self.samples[self.position:self.position + frames]
+            self.position += len(chunk)
+            return chunk
+        
+        if self.process is None:
+            self._start_decoder()
+        
+        frame_bytes = 4 * self.channels
+        data = self.process.stdout.read(frames * frame_bytes)
+        data = data[:len(data) - len(data) % frame_bytes]
+        return np.frombuffer(data, dtype=np.float32).reshape(-1, self.channels)
+    
+    def _rewind(self):
+        """Restart the track from the beginning (loop)."""
+        if self.samples is not None:
+            self.position = 0
+        else:
+            self.close()
+    
+    def read(self, frames):
+        """Read exactly frames frames (zero-padded after the end of a non-looping track)."""
+        block = np.zeros((frames, self.channels), dtype=np.float32)
+        filled = 0
+        
+        while filled < frames and not self.exhausted:
+            if len(self.pending) == 0:
+                self.pending = self._read_source(frames - filled)
+                
+                if len(self.pending) == 0:
+                    if not self.loop:
+                        self.exhausted = True
+                        break
+                    self._rewind()
+                    self.pending = self._read_source(frames - filled)
+                    if len(self.pending) == 0:
+                        self.exhausted = True
+                        break
+            
+            take = min(len(self.pending), frames - filled)
+            block[filled:filled + take] = self.pending[:take]
+            self.pending = self.pending[take:]
+            filled += take
+        
+        if self.gain != 1.0:
+            block *= self.gain
+        return block
+    
+    def close(self):
+        """Stop the decoder process if running."""
+        if self.process is not None:
+            self.process.stdout.close()
+            self.process.kill()
+            self.process.wait()
+            get_cancel_token().unregister_process(self.process)
+            self.process = None
+
+class ClipSequenceReader:
+    """
+    Reads the audio of clips played one after another (a concatenated video
+    timeline) as fixed-size blocks. Every clip is streamed by its own
+    AudioTrackReader decoder limited to the clip's duration on the timeline;
+    clips without audio are silence. Only one clip decoder runs at a time.
+    """
+    
+    def __init__(self, track, duration, sample_rate=SAMPLE_RATE, channels=CHANNELS):
+        self.clips = track['clips']  # [(path, duration on the timeline in seconds), ...]
+        self.loop = track.get('loop', False)
+        self.gain = np.float32(track.get('volume', 100) / 100.0)
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.clip_index = 0
+        self.reader = None
+        self.clip_remaining = 0
+        self.probed = {}  # clip index -> reader opened while looking for audio
+        
+        # Open clips until one has audio (silent clips are never decoded again)
+        self.silent = set()
+        self.has_audio = False
+        for index in range(len(self.clips)):
+            reader = self._open_reader(index)
+            if reader.has_audio:
+                self.probed[index] = reader
+                self.has_audio = True
+                break
+            self.silent.add(index)
+    
+    def _open_reader(self, index):
+        path, clip_duration = self.clips[index]
+        return AudioTrackReader({'path': path, 'loop': False}, clip_duration,
+                                self.sample_rate, self.channels)
+    
+    def _start_clip(self):
+        index = self.clip_index
+        self.clip_remaining = int(round(self.clips[index][1] * self.sample_rate))
+        if index in self.silent:
+            self.reader = None
+        elif index in self.probed:
+            self.reader = self.probed.pop(index)
+        else:
+            self.reader = self._open_reader(index)
+            if not self.reader.has_audio:
+                self.silent.add(index)
+                self.reader = None
+    
+    def read(self, frames):
+        """Read exactly frames frames (zero-padded after the last clip of a non-looping sequence)."""
+        block = np.zeros((frames, self.channels), dtype=np.float32)
+        filled = 0
+        
+        while filled < frames:
+            if self.clip_remaining == 0:
+                self._close_clip()
+                if self.clip_index >= len(self.clips):
+                    if not self.loop or not self.has_audio:
+                        break
+                    self.clip_index = 0
+                self._start_clip()
+                self.clip_index += 1
+                if self.clip_remaining == 0:
+                    continue
+            
+            take = min(frames - filled, self.clip_remaining)
+            if self.reader is not None:
+                # Zero-padded if the clip's audio is shorter than the clip
+                block[filled:filled + take] = self.reader.read(take)
+            filled += take
+            self.clip_remaining -= take
+        
+        if self.gain != 1.0:
+            block *= self.gain
+        return block
+    
+    def _close_clip(self):
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+    
+    def close(self):
+        """Stop the running clip decoders."""
+        self._close_clip()
+        for reader in self.probed.values():
+            reader.close()
+        self.probed = {}
+
+def open_track_reader(track, duration, sample_rate=SAMPLE_RATE, channels=CHANNELS):
+    """Block reader for a track dict (see mix_audio_to_video)."""
+    if 'clips' in track:
+        return ClipSequenceReader(track, duration, sample_rate, channels)
+    return AudioTrackReader(track, duration, sample_rate, channels)
+
+def mix_blocks(readers, num_samples, block_samples=STREAM_BLOCK_SAMPLES):
+    """Yield mixed float32 PCM blocks until num_samples frames are produced."""
+    for start in range(0, num_samples, block_samples):
+        frames = min(block_samples, num_samples - start)
+        mixed = readers[0].read(frames)
+        for reader in readers[1:]:
+            mixed += reader.read(frames)
+        np.clip(mixed, -1.0, 1.0, out=mixed)
+        yield mixed
+
+def encode_video_with_audio(video_path, output_path, audio_blocks=None,
+                            sample_rate=SAMPLE_RATE, channels=CHANNELS, video_codec="libx264"):
+    """
+    Encode video (libx264) and mux PCM blocks streamed through stdin (aac).
+    Without audio blocks the output has no audio track.
+    video_codec="copy" keeps an already encoded video stream.
+    """
+    cmd = [get_ffmpeg_binary(), '-y', '-hide_banner', '-loglevel', 'error', '-i', video_path]
+    
+    if audio_blocks is not None:
+        cmd += ['-f', 'f32le', '-ar', str(sample_rate), '-ac', str(channels), '-i', 'pipe:0',
+                '-map', '0:v:0', '-map', '1:a:0', '-c:a', 'aac']
+    else:
+        cmd += ['-map', '0:v:0', '-an']
+    
+    if video_codec == "copy":
+        cmd += ['-c:v', 'copy', output_path]
+    else:
+        cmd += ['-c:v', video_codec, '-preset', 'medium', '-pix_fmt', 'yuv420p', output_path]
+    
+    cancel_token = get_cancel_token()
+    cancel_token.check()
+    
+    with tempfile.TemporaryFile() as error_log, cancel_token.partial_output(output_path):
+        process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                                   stderr=error_log)
+        cancel_token.register_process(process)
+        try:
+            if audio_blocks is not None:
+                for block in audio_blocks:
+                    cancel_token.check()
+                    process.stdin.write(block.tobytes())
+        except BrokenPipeError:
+            pass  # Encoder exited early, reported below
+        finally:
+            try:
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+            process.wait()
+            cancel_token.unregister_process(process)
+        
+        # A cancelled encoder is killed, that is not an encode error
+        cancel_token.check()
+        
+        if process.returncode != 0:
+            error_log.seek(0)
+            message = error_log.read().decode('utf-8', errors='replace').strip()
+            raise RuntimeError(f"ffmpeg encode failed: {message}")
+    
+    return True
+
+def encode_video(video_path, output_path):
+    """Encode video only (libx264, no audio)."""
+    return encode_video_with_audio(video_path, output_path)
+
+def mix_audio_to_video(video_path, output_path, tracks, duration=None, video_codec="libx264"):
+    """
+    Mix tracks block by block and write the final video in one encoder pass.
+    tracks: list of dicts {'path', 'volume' (0-100), 'loop', 'cached'}, {'samples', ...}
+    or {'clips': [(path, seconds), ...], ...} (clip audio one after another).
+    duration defaults to the video duration. Memory use does not grow with track length.
+    """
+    if duration is None:
+        duration = get_video_duration(video_path)
+    
+    num_samples = int(round(duration * SAMPLE_RATE))
+    readers = [open_track_reader(track, duration) for track in tracks] if num_samples > 0 else []
+    
+    try:
+        active_readers = [reader for reader in readers if reader.has_audio]
+        audio_blocks = mix_blocks(active_readers, num_samples) if active_readers else None
+        return encode_video_with_audio(video_path, output_path, audio_blocks, video_codec=video_codec)
+    
+    finally:
+        for reader in readers:
+            reader.close()
@@ -1,5 +1,7 @@
 import cv2
 import numpy as np
+from .canvas import DEFAULT_CANVAS
+from .timing import span
 
 def create_blurred_background(frame, blur_strength=51):
     """Membuat background blur dari frame video."""
@@ -59,7 +61,7 @@ def fit_video_to_9_16(cropped_frame, target_width, target_height):
 
 def process_blur_frame(original_frame, crop_top_percent, crop_bottom_percent, 
                       video_x_percent=50, video_y_percent=50,
-                      target_width=1080, target_height=1920, blur_strength=51, text_overlay_frame=None):
+                      target_width=DEFAULT_CANVAS.width, target_height=DEFAULT_CANVAS.height, blur_strength=51, text_overlay_frame=None):
     """
     Memproses frame dengan blur background mode dengan posisi video yang dapat diatur.
     PENTING: Text overlay harus ditambahkan SETELAH fungsi ini dipanggil
@@ -67,16 +69,25 @@ def process_blur_frame(original_frame, crop_top_percent, crop_bottom_percent,
     """
     
     # 1. Buat background blur
-    blurred_bg = create_blurred_background(original_frame, blur_strength)
-    blurred_bg = cv2.resize(blurred_bg, (target_width, target_height))
+    source_height = original_frame.shape[0]
+    with span("blur"):
+        if target_height < source_height:
+            # Canvas lebih kecil (draft/720p): resize dulu, lalu blur dengan kernel yang diskalakan
+            scaled_strength = max(3, int(blur_strength * target_height / source_height))
+            blurred_bg = cv2.resize(original_frame, (target_width, target_height))
+            blurred_bg = create_blurred_background(blurred_bg, scaled_strength)
+        else:
+            blurred_bg = create_blurred_background(original_frame, blur_strength)
+            blurred_bg = cv2.resize(blurred_bg, (target_width, target_height))
     
     # 2. Crop video asli
     cropped_video = crop_video_frame(original_frame, crop_top_percent, crop_bottom_percent)
     
     # 3. Fit video ke aspect ratio 9:16
-    fitted_video, video_width, video_height = fit_video_to_9_16(
-        cropped_video, target_width, target_height
-    )
+    with span("fit"):
+        fitted_video, video_width, video_height = fit_video_to_9_16(
+            cropped_video, target_width, target_height
+        )
     
     # 4. Hitung posisi video berdasarkan persentase X dan Y
     max_x = target_width - video_width
@@ -102,21 +113,22 @@ def process_blur_frame(original_frame, crop_top_percent, crop_bottom_percent,
     y_offset = max(0, min(y_offset, max_y))
     
     # 5. Overlay video pada background blur
-    result = blurred_bg.copy()
-    
-    # Pastikan dimensi video sesuai dengan area yang akan di-overlay
-    end_y = min(y_offset + video_height, target_height)
-    end_x = min(x_offset + video_width, target_width)
-    
-    actual_height = end_y - y_offset
-    actual_width = end_x - x_offset
-    
-    if actual_height > 0 and actual_width > 0:
-        # Resize fitted_video jika perlu untuk menyesuaikan area yang tersedia
-        if actual_height != video_height or actual_width != video_width:
-            fitted_video = cv2.resize(fitted_video, (actual_width, actual_height))
+    with span("blend"):
+        result = blurred_bg.copy()
+        
+        # Pastikan dimensi video sesuai dengan area yang akan di-overlay
+        end_y = min(y_offset + video_height, target_height)
+        end_x = min(x_offset + video_width, target_width)
+        
+        actual_height = end_y - y_offset
+        actual_width = end_x - x_offset
         
-        result[y_offset:end_y, x_offset:end_x] = fitted_video
+        if actual_height > 0 and actual_width > 0:
+            # Resize fitted_video jika perlu untuk menyesuaikan area yang tersedia
+            if actual_height != video_height or actual_width != video_width:
+                fitted_video = cv2.resize(fitted_video, (actual_width, actual_height))
+            
+            result[y_offset:end_y, x_offset:end_x] = fitted_video
     
     # CATATAN: Text overlay TIDAK ditambahkan di sini
     # Text harus ditambahkan di lapisan terakhir agar berada di depan
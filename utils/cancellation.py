@@ -0,0 +1,203 @@
+"""
+Cancellation - Cooperative stop for running batches
+A CancelToken is created for every run and made active for the processing
+code. Frame loops and batch loops call check() and unwind by raising
+ProcessingCancelled; cancel() kills registered ffmpeg processes at once and
+signals segment worker processes, so stopping takes well under a second.
+Files registered as partial outputs are deleted when the run is cancelled.
+"""
+
+import os
+import threading
+import subprocess
+import multiprocessing
+from contextlib import contextmanager
+
+class ProcessingCancelled(BaseException):
+    """
+    Raised inside processing code when the run is cancelled.
+    Derives from BaseException (like KeyboardInterrupt) so the generic
+    'except Exception' handlers in the processing functions let it through.
+    """
+
+class CancelToken:
+    """Cancellation state of one run: flag, child processes and partial files."""
+    
+    def __init__(self):
+        self.event = threading.Event()
+        self.lock = threading.Lock()
+        self.processes = set()
+        self.partial_paths = set()
+        self.process_event = None  # multiprocessing.Event for worker processes, created on demand
+        self.children = []
+    
+    def cancel(self):
+        """Request cancellation (does not block)."""
+        with self.lock:
+            self.event.set()
+            if self.process_event is not None:
+                self.process_event.set()
+            processes = list(self.processes)
+            children = list(self.children)
+        
+        for process in processes:
+            _kill_process(process)
+        for child in children:
+            child.cancel()
+    
+    def create_child(self):
+        """Token for part of the run: cancelled with this token, but can be cancelled alone."""
+        child = CancelToken()
+        with self.lock:
+            self.children.append(child)
+            cancelled = self.event.is_set()
+        
+        if cancelled:
+            child.cancel()
+        return child
+    
+    def remove_child(self, child):
+        """Forget a finished child token."""
+        with self.lock:
+            if child in self.children:
+                self.children.remove(child)
+    
+    def is_cancelled(self):
+        """Check whether cancellation was requested."""
+        return self.event.is_set()
+    
+    def check(self):
+        """Raise ProcessingCancelled if cancellation was requested."""
+        if self.event.is_set():
+            raise ProcessingCancelled()
+    
+    def get_process_event(self):
+        """Event for worker processes (pass through ProcessPoolExecutor initargs)."""
+        with self.lock:
+            if self.process_event is None:
+                self.process_event = multiprocessing.Event()
+                if self.event.is_set():
+                    self.process_event.set()
+            return self.process_event
+    
+    def register_process(self, process):
+        """Kill process on cancel (killed right away if already cancelled)."""
+        with self.lock:
+            self.processes.add(process)
+            cancelled = self.event.is_set()
+        
+        if cancelled:
+            _kill_process(process)
+    
+    def unregister_process(self, process):
+        """Forget a finished process."""
+        with self.lock:
+            self.processes.discard(process)
+    
+    def track(self, path):
+        """Register a file to delete if the run is cancelled (temp files, unfinished outputs)."""
+        with self.lock:
+            self.partial_paths.add(os.path.abspath(path))
+        return path
+    
+    def release(self, path):
+        """Keep path on cancel (the file is complete)."""
+        with self.lock:
+            self.partial_paths.discard(os.path.abspath(path))
+    
+    @contextmanager
+    def partial_output(self, path):
+        """
+        Track path while the block writes it. If the block raises (an error or
+        ProcessingCancelled) the partial file is deleted and untracked and the
+        exception propagates; if the block completes the file is released.
+        """
+        self.track(path)
+        try:
+            yield path
+        except BaseException:
+            self.release(path)
+            _remove_partial_file(path)
+            raise
+        self.release(path)
+    
+    def cleanup(self):
+        """Delete registered partial files. Returns number of files removed."""
+        with self.lock:
+            paths = list(self.partial_paths)
+            self.partial_paths.clear()
+        
+        return sum(1 for path in paths if _remove_partial_file(path))
+
+def _remove_partial_file(path):
+    """Delete an unfinished file if it exists. Returns True if it was removed."""
+    try:
+        if os.path.isfile(path):
+            os.remove(path)
+            return True
+    except OSError as e:
+        print(f"⚠️ Could not remove partial file {path}: {e}")
+    return False
+
+def _kill_process(process):
+    """Kill a subprocess, ignoring processes that already exited."""
+    try:
+        if process.poll() is None:
+            process.kill()
+    except OSError:
+        pass
+
+# Token checked by processing code; replaced for every run
+_active_token = CancelToken()
+
+def get_cancel_token():
+    """Get the token of the current run."""
+    return _active_token
+
+def set_cancel_token(token):
+    """Make token the active one (called when a run starts)."""
+    global _active_token
+    _active_token = token
+    return token
+
+def run_subprocess(cmd, timeout=None, capture_output=False, **kwargs):
+    """
+    subprocess.run replacement that is killed when the run is cancelled.
+    Raises ProcessingCancelled if cancelled before or while running.
+    """
+    token = get_cancel_token()
+    token.check()
+    
+    if capture_output:
+        kwargs['stdout'] = subprocess.PIPE
+        kwargs['stderr'] = subprocess.PIPE
+    
+    with subprocess.Popen(cmd, **kwargs) as process:
+        token.register_process(process)
+        try:
+            stdout, stderr = process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
+            raise
+        finally:
+            token.unregister_process(process)
+    
+    token.check()
+    return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+
+def get_moviepy_logger():
+    """
+    proglog logger for MoviePy write calls (write_videofile logger=...).
+    Raises ProcessingCancelled from the frame loop, so MoviePy closes its
+    ffmpeg writer on the way out.
+    """
+    from proglog import ProgressBarLogger
+    
+    token = get_cancel_token()
+    
+    class CancellableLogger(ProgressBarLogger):
+        def bars_callback(self, bar, attr, value, old_value=None):
+            token.check()
+    
+    return CancellableLogger()
@@ -0,0 +1,120 @@
+"""
+Canvas Spec - Output canvas size and frame rate
+Layouts are designed on the 1080x1920 reference canvas and scaled from it,
+so draft and lower resolution renders keep the same relative layout.
+"""
+
+import math
+
+REFERENCE_WIDTH = 1080
+REFERENCE_HEIGHT = 1920
+
+# Output presets: name -> (width, height)
+CANVAS_PRESETS = {
+    'full': (1080, 1920),
+    '720p': (720, 1280),
+    'draft_540': (540, 960),
+    'draft_360': (360, 640)
+}
+
+CANVAS_PRESET_LABELS = {
+    'full': "1080x1920 (Full HD)",
+    '720p': "720x1280 (720p)",
+    'draft_540': "540x960 (Draft)",
+    'draft_360': "360x640 (Fast Draft)"
+}
+
+class CanvasSpec:
+    """Output canvas: width, height and optional fixed fps (None = source fps)."""
+    
+    def __init__(self, width=REFERENCE_WIDTH, height=REFERENCE_HEIGHT, fps=None, preset=None):
+        self.width = int(width)
+        self.height = int(height)
+        self.fps = fps if fps else None
+        self.preset = preset
+    
+    @classmethod
+    def from_preset(cls, preset, fps=None):
+        """Create canvas from preset name ('full', '720p', 'draft_540', 'draft_360')."""
+        width, height = CANVAS_PRESETS.get(preset, CANVAS_PRESETS['full'])
+        return cls(width, height, fps, preset if preset in CANVAS_PRESETS else 'full')
+    
+    @classmethod
+    def from_settings(cls, settings):
+        """Create canvas from settings dict (uses settings['canvas_settings'])."""
+        canvas_settings = (settings or {}).get('canvas_settings') or {}
+        fps = canvas_settings.get('fps') or None
+        
+        if canvas_settings.get('width') and canvas_settings.get('height'):
+            return cls(canvas_settings['width'], canvas_settings['height'], fps,
+                       canvas_settings.get('preset'))
+        
+        return cls.from_preset(canvas_settings.get('preset', 'full'), fps)
+    
+    @classmethod
+    def for_frame(cls, frame):
+        """Create canvas matching an existing frame."""
+        height, width = frame.shape[:2]
+        return cls(width, height)
+    
+    @property
+    def size(self):
+        """Size as (width, height) for cv2.resize / cv2.VideoWriter."""
+        return (self.width, self.height)
+    
+    @property
+    def shape(self):
+        """Shape as (height, width) for comparison with frame.shape[:2]."""
+        return (self.height, self.width)
+    
+    @property
+    def scale(self):
+        """Scale factor relative to the 1080px reference width."""
+        return self.width / REFERENCE_WIDTH
+    
+    @property
+    def is_draft(self):
+        """Check if this is a draft preset."""
+        return bool(self.preset and self.preset.startswith('draft'))
+    
+    def scaled(self, value, minimum=1):
+        """Scale a reference-canvas pixel value to this canvas."""
+        return max(minimum, int(round(value * self.scale)))
+    
+    def get_fps(self, source_fps):
+        """Get output fps (fixed canvas fps, otherwise source fps)."""
+        return self.fps or source_fps
+    
+    def output_repeats(self, source_index, source_fps):
+        """
+        Number of output frames covered by source frame source_index.
+        0 = drop the frame, 1 = keep, >1 = duplicate (when canvas fps differs).
+        """
+        output_fps = self.get_fps(source_fps)
+        if not source_fps or output_fps == source_fps:
+            return 1
+        
+        ratio = output_fps / source_fps
+        start = math.ceil(source_index * ratio - 1e-9)
+        end = math.ceil((source_index + 1) * ratio - 1e-9)
+        return end - start
+    
+    def to_dict(self):
+        """Convert to settings dict."""
+        return {
+            'preset': self.preset,
+            'width': self.width,
+            'height': self.height,
+            'fps': self.fps
+        }
+    
+    def __repr__(self):
+        fps_text = f"{self.fps}fps" if self.fps else "source fps"
+        return f"CanvasSpec({self.width}x{self.height}, {fps_text})"
+
+# Default 1080x1920 canvas at source fps
+DEFAULT_CANVAS = CanvasSpec(preset='full')
+
+def get_canvas(settings):
+    """Get canvas spec from settings (defaults to 1080x1920)."""
+    return CanvasSpec.from_settings(settings)
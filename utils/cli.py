@@ -0,0 +1,291 @@
+"""
+Command Line Interface - Headless batch rendering
+Runs the same processing modes as the GUI from a settings file, without
+tkinter, for render nodes and scripts:
+
+    python -m utils.cli render --mode greenscreen --settings job.json
+    python -m utils.cli defaults --mode blur > job.json
+    python -m utils.cli watch --mode greenscreen --settings job.json
+    python -m utils.cli queue publish --queue /mnt/nas/queue1 --settings job.json
+    python -m utils.cli queue work --queue /mnt/nas/queue1     (on every node)
+
+Progress is written to stdout as JSON lines (one event per line, see
+utils.progress_events for the event types); the processing log goes to
+stderr. The exit code tells how the run ended.
+"""
+
+import sys
+import json
+import time
+import signal
+import argparse
+import contextlib
+import multiprocessing
+
+from utils.job_settings import PROCESSING_MODES, get_default_settings, load_settings, validate_settings
+from utils.cancellation import CancelToken, ProcessingCancelled, set_cancel_token
+from utils.progress_events import EventLogSubscriber
+from utils.timing import timing_session
+
+EXIT_OK = 0
+EXIT_FAILED = 1          # Processing ran but no output was produced
+EXIT_INVALID = 2         # Bad arguments, unreadable or invalid settings
+EXIT_CANCELLED = 130     # Stopped by SIGINT/SIGTERM
+
+class JsonEventWriter:
+    """Writes progress events as JSON lines."""
+    
+    def __init__(self, stream):
+        self.stream = stream
+    
+    def emit(self, event, **fields):
+        """Write one event line."""
+        self.write_event({'event': event, 'time': round(time.time(), 3), **fields})
+    
+    def write_event(self, event):
+        """Progress bus subscriber: write an event dict as one line."""
+        self.stream.write(json.dumps(event) + "\n")
+        self.stream.flush()
+
+class NullEventWriter:
+    """Event writer for --progress none."""
+    
+    def emit(self, event, **fields):
+        pass
+    
+    def write_event(self, event):
+        pass
+
+def install_signal_handlers(token):
+    """Cancel token on SIGINT/SIGTERM (the run unwinds and cleans up partial files)."""
+    def handle_signal(signum, frame):
+        print(f"🛑 Received signal {signum}, cancelling...", file=sys.stderr)
+        token.cancel()
+    
+    signal.signal(signal.SIGINT, handle_signal)
+    if hasattr(signal, 'SIGTERM'):
+        signal.signal(signal.SIGTERM, handle_signal)
+
+def get_subscribers(args, events):
+    """Progress bus subscribers for the command: event writer and optional --event-log file."""
+    subscribers = [events.write_event]
+    if getattr(args, 'event_log', None):
+        subscribers.append(EventLogSubscriber(args.event_log))
+    return subscribers
+
+def run_job(settings, events, subscribers=(), timing_report=None, profile_path=None):
+    """
+    Validate and process settings in the calling thread.
+    timing_report/profile_path write a per-stage timing report / cProfile dump.
+    Returns exit code. Processing output (print) goes to stderr.
+    """
+    from utils.video_processor_main import VideoProcessor
+    
+    is_valid, message = validate_settings(settings)
+    if not is_valid:
+        events.emit('error', message=message)
+        return EXIT_INVALID
+    
+    token = set_cancel_token(CancelToken())
+    install_signal_handlers(token)
+    
+    events.emit('start', mode=settings['mode'])
+    start_time = time.time()
+    
+    try:
+        with contextlib.redirect_stdout(sys.stderr), timing_session(timing_report, profile_path):
+            success = VideoProcessor(None).process_settings(settings, subscribers=subscribers)
+    except ProcessingCancelled:
+        removed = token.cleanup()
+        events.emit('cancelled', elapsed=round(time.time() - start_time, 2), partial_files_removed=removed)
+        return EXIT_CANCELLED
+    except Exception as e:
+        events.emit('error', message=str(e))
+        return EXIT_FAILED
+    
+    exit_code = EXIT_OK if success else EXIT_FAILED
+    events.emit('done', success=bool(success), exit_code=exit_code, elapsed=round(time.time() - start_time, 2))
+    return exit_code
+
+def command_render(args):
+    """render: process one settings file."""
+    events = JsonEventWriter(sys.stdout) if args.progress == "json" else NullEventWriter()
+    
+    try:
+        settings = load_settings(args.settings, args.mode)
+    except (OSError, ValueError) as e:
+        events.emit('error', message=str(e))
+        print(f"❌ {e}", file=sys.stderr)
+        return EXIT_INVALID
+    
+    return run_job(settings, events, get_subscribers(args, events), args.timing_report, args.profile)
+
+def command_watch(args):
+    """watch: render new files in the input folder(s) until SIGINT/SIGTERM."""
+    from utils.watch_folder import WatchFolderDaemon
+    
+    events = JsonEventWriter(sys.stdout) if args.progress == "json" else NullEventWriter()
+    
+    try:
+        settings = load_settings(args.settings, args.mode)
+    except (OSError, ValueError) as e:
+        events.emit('error', message=str(e))
+        print(f"❌ {e}", file=sys.stderr)
+        return EXIT_INVALID
+    
+    is_valid, message = validate_settings(settings)
+    if not is_valid:
+        events.emit('error', message=message)
+        return EXIT_INVALID
+    
+    token = set_cancel_token(CancelToken())
+    install_signal_handlers(token)
+    
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            daemon = WatchFolderDaemon(settings, settle_seconds=args.settle, poll_interval=args.poll,
+                                       on_event=events.emit, use_inotify=not args.no_inotify,
+                                       subscribers=get_subscribers(args, events))
+            daemon.run()
+    except ProcessingCancelled:
+        removed = token.cleanup()
+        events.emit('cancelled', partial_files_removed=removed)
+        return EXIT_CANCELLED
+    except (OSError, ValueError) as e:
+        events.emit('error', message=str(e))
+        return EXIT_FAILED
+    
+    return EXIT_OK
+
+def command_queue_publish(args):
+    """queue publish: publish a settings file as a work queue in a shared folder."""
+    from utils.work_queue import publish_queue
+    
+    try:
+        settings = load_settings(args.settings, args.mode)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return EXIT_INVALID
+    
+    is_valid, message = validate_settings(settings)
+    if not is_valid:
+        print(f"❌ {message}", file=sys.stderr)
+        return EXIT_INVALID
+    
+    with contextlib.redirect_stdout(sys.stderr):
+        publish_queue(args.queue, settings, args.lease)
+    return EXIT_OK
+
+def command_queue_work(args):
+    """queue work: render outputs of a work queue until the queue is finished."""
+    from utils.work_queue import run_worker
+    
+    events = JsonEventWriter(sys.stdout) if args.progress == "json" else NullEventWriter()
+    token = set_cancel_token(CancelToken())
+    install_signal_handlers(token)
+    
+    events.emit('start', queue=args.queue)
+    start_time = time.time()
+    
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            rendered = run_worker(args.queue, args.node, args.poll, get_subscribers(args, events), events.emit)
+    except ProcessingCancelled:
+        removed = token.cleanup()
+        events.emit('cancelled', elapsed=round(time.time() - start_time, 2), partial_files_removed=removed)
+        return EXIT_CANCELLED
+    except (OSError, ValueError) as e:
+        events.emit('error', message=str(e))
+        print(f"❌ {e}", file=sys.stderr)
+        return EXIT_INVALID
+    
+    events.emit('done', outputs=rendered, elapsed=round(time.time() - start_time, 2))
+    return EXIT_OK
+
+def command_queue_status(args):
+    """queue status: print finished/failed/leased counts and per-node throughput as JSON."""
+    from utils.work_queue import get_queue_status
+    
+    try:
+        status = get_queue_status(args.queue)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return EXIT_INVALID
+    
+    json.dump(status, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return EXIT_OK
+
+def command_defaults(args):
+    """defaults: print default settings for a mode (starting point for a job file)."""
+    json.dump(get_default_settings(args.mode), sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return EXIT_OK
+
+def build_parser():
+    """Argument parser with one subcommand per action."""
+    parser = argparse.ArgumentParser(prog="python -m utils.cli", description="Headless batch rendering")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    render_parser = subparsers.add_parser('render', help="Process a batch from a settings file")
+    render_parser.add_argument('--settings', required=True, help="Settings JSON (GUIManager.get_all_settings shape)")
+    render_parser.add_argument('--mode', choices=PROCESSING_MODES, help="Processing mode (overrides 'mode' in settings)")
+    render_parser.add_argument('--progress', choices=("json", "none"), default="json",
+                               help="Progress events on stdout (default: json)")
+    render_parser.add_argument('--event-log', help="Also append progress events to this file (JSON lines)")
+    render_parser.add_argument('--timing-report', help="Write per-stage timings (p50/p95 per stage, fps) to this JSON file")
+    render_parser.add_argument('--profile', help="Profile the job with cProfile (all threads) and dump stats to this file")
+    render_parser.set_defaults(handler=command_render)
+    
+    watch_parser = subparsers.add_parser('watch', help="Render new files in the input folder(s) as they arrive")
+    watch_parser.add_argument('--settings', required=True, help="Settings JSON (GUIManager.get_all_settings shape)")
+    watch_parser.add_argument('--mode', choices=PROCESSING_MODES, help="Processing mode (overrides 'mode' in settings)")
+    watch_parser.add_argument('--progress', choices=("json", "none"), default="json",
+                              help="Progress events on stdout (default: json)")
+    watch_parser.add_argument('--event-log', help="Also append progress events to this file (JSON lines)")
+    watch_parser.add_argument('--settle', type=float, default=2.0,
+                              help="Seconds a new file must stay unchanged before it is processed (default: 2)")
+    watch_parser.add_argument('--poll', type=float, default=1.0, help="Seconds between checks (default: 1)")
+    watch_parser.add_argument('--no-inotify', action='store_true', help="Poll the folders instead of using inotify")
+    watch_parser.set_defaults(handler=command_watch)
+    
+    queue_parser = subparsers.add_parser('queue', help="Distributed rendering through a shared folder")
+    queue_subparsers = queue_parser.add_subparsers(dest='queue_command', required=True)
+    
+    publish_parser = queue_subparsers.add_parser('publish', help="Publish a batch as a work queue")
+    publish_parser.add_argument('--queue', required=True, help="Queue folder on storage all nodes mount")
+    publish_parser.add_argument('--settings', required=True, help="Settings JSON (GUIManager.get_all_settings shape)")
+    publish_parser.add_argument('--mode', choices=PROCESSING_MODES, help="Processing mode (overrides 'mode' in settings)")
+    publish_parser.add_argument('--lease', type=float, default=60.0,
+                                help="Seconds before outputs of a crashed node are retried (default: 60)")
+    publish_parser.set_defaults(handler=command_queue_publish)
+    
+    work_parser = queue_subparsers.add_parser('work', help="Render outputs of a work queue on this node")
+    work_parser.add_argument('--queue', required=True, help="Queue folder on storage all nodes mount")
+    work_parser.add_argument('--node', help="Node name in leases and results (default: hostname:pid)")
+    work_parser.add_argument('--poll', type=float, default=5.0,
+                             help="Seconds between passes while other nodes still render (default: 5)")
+    work_parser.add_argument('--progress', choices=("json", "none"), default="json",
+                             help="Progress events on stdout (default: json)")
+    work_parser.add_argument('--event-log', help="Also append progress events to this file (JSON lines)")
+    work_parser.set_defaults(handler=command_queue_work)
+    
+    status_parser = queue_subparsers.add_parser('status', help="Show progress of a work queue")
+    status_parser.add_argument('--queue', required=True, help="Queue folder")
+    status_parser.set_defaults(handler=command_queue_status)
+    
+    defaults_parser = subparsers.add_parser('defaults', help="Print default settings for a mode")
+    defaults_parser.add_argument('--mode', choices=PROCESSING_MODES, required=True)
+    defaults_parser.set_defaults(handler=command_defaults)
+    
+    return parser
+
+def main(argv=None):
+    """CLI entry point. Returns exit code."""
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+if __name__ == "__main__":
+    # Required for segment worker processes in frozen builds
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -6,6 +6,7 @@ Auto-detects multiple green screen areas in templates
 import cv2
 import numpy as np
 from utils.green_screen_detection import create_green_screen_mask
+from utils.timing import span
 
 def detect_dual_green_screen_areas(template_image):
     """
@@ -82,6 +83,69 @@ def detect_dual_green_screen_areas(template_image):
         'total_areas': len(contours)
     }
 
+# How detected slots are assigned to the inputs (folder1, folder2, ...)
+SLOT_ASSIGNMENTS = ("top_to_bottom", "reading_order", "map")
+
+# Green areas smaller than this fraction of the largest slot are noise, not slots
+MIN_SLOT_AREA_RATIO = 0.02
+
+def order_slots_reading(slots):
+    """Slots in reading order: rows from top to bottom, left to right within a row."""
+    rows = []
+    for slot in sorted(slots, key=lambda slot: slot['rect'][1] + slot['rect'][3] / 2):
+        x, y, w, h = slot['rect']
+        center_y = y + h / 2
+        # Same row if the slot's vertical center lies inside the row's first slot
+        if rows and rows[-1][0]['rect'][1] <= center_y <= rows[-1][0]['rect'][1] + rows[-1][0]['rect'][3]:
+            rows[-1].append(slot)
+        else:
+            rows.append([slot])
+    return [slot for row in rows for slot in sorted(row, key=lambda slot: slot['rect'][0])]
+
+def detect_green_screen_slots(template_image, max_slots=None, assignment="top_to_bottom", slot_map=None):
+    """
+    Detect the green screen slots of a template (largest first, up to max_slots)
+    and order them for the inputs:
+    - 'top_to_bottom': by top edge (dual mode: folder1 = top, folder2 = bottom)
+    - 'reading_order': rows from top to bottom, left to right within a row
+    - 'map': slot_map[i] is the slot (0-based, reading order) used for input i
+    Returns a list of areas {'rect', 'contour', 'position'}, empty if no slot is found.
+    """
+    if assignment not in SLOT_ASSIGNMENTS:
+        raise ValueError(f"Unknown slot assignment: {assignment} (expected one of {', '.join(SLOT_ASSIGNMENTS)})")
+    
+    mask = create_green_screen_mask(template_image)
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    contours = sorted(contours, key=cv2.contourArea, reverse=True)
+    if not contours:
+        return []
+    
+    min_area = cv2.contourArea(contours[0]) * MIN_SLOT_AREA_RATIO
+    contours = [contour for contour in contours if cv2.contourArea(contour) >= min_area]
+    slots = [{'rect': cv2.boundingRect(contour), 'contour': contour} for contour in contours]
+    
+    if assignment == "top_to_bottom":
+        slots = sorted(slots[:max_slots], key=lambda slot: slot['rect'][1])
+    elif assignment == "reading_order":
+        slots = order_slots_reading(slots[:max_slots])
+    else:
+        slots = order_slots_reading(slots)
+        slot_map = list(slot_map or [])
+        if max_slots is not None:
+            slot_map = slot_map[:max_slots]
+        invalid = [index for index in slot_map if not isinstance(index, int) or not 0 <= index < len(slots)]
+        if invalid or len(set(slot_map)) != len(slot_map):
+            raise ValueError(f"Invalid slot map {slot_map} for {len(slots)} detected slots")
+        slots = [slots[index] for index in slot_map]
+    
+    for number, slot in enumerate(slots, 1):
+        slot['position'] = f"slot {number}"
+    
+    print(f"✅ Detected {len(slots)} green screen slot(s) ({assignment}):")
+    for slot in slots:
+        print(f"   {slot['position']}: {slot['rect']}")
+    return slots
+
 def create_dual_masks(template_image, dual_areas):
     """
     Create separate masks for each green screen area.
@@ -126,39 +190,66 @@ def fit_video_to_dual_mask(video_frame, mask_area, video_source):
 def process_dual_frame_with_green_screen(template_frame, video1_frame, video2_frame, dual_areas):
     """
     Process frame with dual green screen replacement.
+    Per-batch callers should build a DualCompositePlan once instead.
     """
-    result = template_frame.copy()
-    
     try:
-        # Process video from folder1
-        if video1_frame is not None:
-            masked_video1, alpha1, rect1 = fit_video_to_dual_mask(
-                video1_frame, dual_areas['folder1_area'], 'folder1'
-            )
-            x1, y1, w1, h1 = rect1
-            
-            # Blend video1 into template
-            roi1 = result[y1:y1+h1, x1:x1+w1]
-            blended_roi1 = (masked_video1 * alpha1 + roi1 * (1 - alpha1)).astype(np.uint8)
-            result[y1:y1+h1, x1:x1+w1] = blended_roi1
-        
-        # Process video from folder2
-        if video2_frame is not None:
-            masked_video2, alpha2, rect2 = fit_video_to_dual_mask(
-                video2_frame, dual_areas['folder2_area'], 'folder2'
-            )
-            x2, y2, w2, h2 = rect2
-            
-            # Blend video2 into template
-            roi2 = result[y2:y2+h2, x2:x2+w2]
-            blended_roi2 = (masked_video2 * alpha2 + roi2 * (1 - alpha2)).astype(np.uint8)
-            result[y2:y2+h2, x2:x2+w2] = blended_roi2
-    
+        return DualCompositePlan.from_dual_areas(template_frame, dual_areas).composite(video1_frame, video2_frame)
     except Exception as e:
         print(f"⚠️ Error in dual frame processing: {e}")
         return template_frame
+
+class DualCompositePlan:
+    """
+    Everything about a template that does not change between frames: the
+    static background (template at canvas size), the slot rectangles and a
+    boolean blend mask per slot. Computed once per template and shared by
+    every output and frame; contour masks are binary, so blending is a masked
+    copy (same result as the float alpha blend). slot_areas are in input
+    order, any number of slots (dual, 3- and 4-up grids).
+    """
+    
+    def __init__(self, background, slot_areas):
+        self.background = background
+        self.slots = []
+        for area in slot_areas:
+            x, y, w, h = area['rect']
+            contour_mask = np.zeros((h, w), dtype=np.uint8)
+            cv2.fillPoly(contour_mask, [area['contour'] - [x, y]], 255)
+            self.slots.append({
+                'rect': (x, y, w, h),
+                'position': area.get('position'),
+                'mask': contour_mask
+            })
+    
+    @classmethod
+    def from_dual_areas(cls, template, dual_areas):
+        """Plan for two slots (folder1 = top, folder2 = bottom) from detect_dual_green_screen_areas."""
+        return cls(template, [dual_areas['folder1_area'], dual_areas['folder2_area']])
+    
+    @classmethod
+    def from_template(cls, template):
+        """Plan for one slot: the largest green screen area (legacy dual mode)."""
+        mask = create_green_screen_mask(template)
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        if not contours:
+            return cls(template, [])
+        
+        largest_contour = max(contours, key=cv2.contourArea)
+        return cls(template, [{'rect': cv2.boundingRect(largest_contour), 'contour': largest_contour}])
     
-    return result
+    def composite(self, *frames):
+        """Background with frames[i] fitted into slot i (None leaves the slot as is)."""
+        result = self.background.copy()
+        for slot, frame in zip(self.slots, frames):
+            if frame is None:
+                continue
+            x, y, w, h = slot['rect']
+            with span("fit"):
+                resized = cv2.resize(frame, (w, h))
+            with span("blend"):
+                # Writes into the slot region of result in place
+                cv2.copyTo(resized, slot['mask'], result[y:y+h, x:x+w])
+        return result
 
 def validate_dual_green_screen_template(template_path):
     """
@@ -11,20 +11,31 @@ from .video_processing import process_frame_with_green_screen
 from .green_screen_detection import create_green_screen_mask
 from .dual_greenscreen_detection import (
     detect_dual_green_screen_areas, 
-    process_dual_frame_with_green_screen,
-    validate_dual_green_screen_template
+    validate_dual_green_screen_template,
+    DualCompositePlan
 )
-from .gif_processing import extract_gif_frames, process_video_with_gif_template
+from .gif_processing import GifFrameReader, get_gif_first_frame, process_video_with_gif_template
 from .file_operations import (add_audio_to_video, add_background_music_to_video, 
                            add_dual_audio_to_video, get_video_properties, 
                            get_audio_files, is_gif_file, is_image_file)
+from .canvas import DEFAULT_CANVAS, CanvasSpec
+from .frame_scheduler import FrameScheduler, FramePrefetcher, BackgroundFrameWriter
+from .cancellation import get_cancel_token
+from .progress_events import get_progress_bus
+from .timing import FRAME_STAGE, span
 import tempfile
 
 def process_dual_greenscreen_image(image_path, video_source, template_path, template_mask, 
-                                 output_path, text_settings, audio_settings, gpu_settings):
-    """Process image with dual green screen mode -> MP4 output."""
+                                 output_path, text_settings, audio_settings, gpu_settings,
+                                 canvas=None, plan=None):
+    """
+    Process image with dual green screen mode -> MP4 output.
+    plan: DualCompositePlan of the template (computed here if not shared by the batch).
+    """
     print(f"🖼️ Processing dual greenscreen image: {os.path.basename(image_path)} (Source: {video_source})")
     
+    canvas = canvas or DEFAULT_CANVAS
+    
     try:
         # Load image
         import cv2
@@ -33,31 +44,31 @@ def process_dual_greenscreen_image(image_path, video_source, template_path, temp
             print(f"❌ Could not load image: {image_path}")
             return False
         
-        # Get template
-        template = get_template_for_processing(template_path)
-        template = cv2.resize(template, (1080, 1920))
+        # Template slot (shared by the batch)
+        plan = plan or get_legacy_composite_plan(template_path, canvas)
         
         # Process image with greenscreen (single frame)
-        processed_frame = process_frame_with_green_screen(template, image, template_mask)
+        processed_frame = plan.composite(image)
         
         # Add text overlay if enabled
         if text_settings['enabled']:
             image_name = os.path.basename(image_path)
-            processed_frame = add_dual_text_overlay(processed_frame, image_name, text_settings)
+            processed_frame = add_dual_text_overlay(processed_frame, image_name, text_settings, canvas)
         
         # Ensure correct size
-        if processed_frame.shape[:2] != (1920, 1080):
-            processed_frame = cv2.resize(processed_frame, (1080, 1920))
+        if processed_frame.shape[:2] != canvas.shape:
+            processed_frame = cv2.resize(processed_frame, canvas.size)
         
         # Create MP4 from single image (5 seconds duration)
-        fps = 30
+        fps = canvas.fps or 30
         duration_seconds = 5
         total_frames = fps * duration_seconds
         
         # Setup MP4 writer
         temp_output = output_path.replace('.mp4', '_temp.mp4')
         fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(temp_output, fourcc, fps, (1080, 1920))
+        out = cv2.VideoWriter(temp_output, fourcc, fps, canvas.size)
+        get_cancel_token().track(temp_output)
         
         if not out.isOpened():
             print(f"❌ Could not create output file: {temp_output}")
@@ -67,6 +78,7 @@ def process_dual_greenscreen_image(image_path, video_source, template_path, temp
         
         # Write same frame multiple times to create video
         for frame_num in range(total_frames):
+            get_cancel_token().check()
             out.write(processed_frame)
             
             if (frame_num + 1) % 30 == 0:
@@ -89,45 +101,22 @@ def handle_dual_image_audio_processing(temp_output, output_path, video_source, d
     """Handle audio for image to MP4 conversion in dual mode."""
     try:
         # Determine which audio folder to use based on source
-        if audio_settings.get('audio_source', 'folder1') == "folder1":
-            audio_folder = audio_settings['folder1_path']
-        else:
-            audio_folder = audio_settings['folder2_path']
+        audio_folder = get_dual_audio_folder(audio_settings)
         
         # For image conversion, we only add background music (no original audio)
-        if (audio_settings['enabled'] or audio_settings.get('dual_audio_enabled', False)) and audio_folder:
+        if (audio_settings.get('enabled', False) or audio_settings.get('dual_audio_enabled', False)) and audio_folder:
             # Add background music
-            background_audio_path = get_random_audio_file(audio_folder)
+            background_audio_path = get_background_audio_file(audio_settings, audio_folder)
             
             if background_audio_path:
                 print(f"🎵 Adding background music to converted MP4 from {audio_settings.get('audio_source', 'folder1')}")
-                from moviepy.editor import VideoFileClip, AudioFileClip
+                from .audio_engine import mix_audio_to_video
                 
-                video_clip = VideoFileClip(temp_output)
-                background_audio = AudioFileClip(background_audio_path)
-                
-                # Adjust volume based on mode
-                if audio_settings.get('dual_audio_enabled', False):
-                    # Use background volume from dual audio settings
-                    background_volume = audio_settings['background_volume'] / 100.0
-                else:
-                    # Use regular background volume
-                    background_volume = audio_settings['background_volume'] / 100.0
-                
-                background_audio = background_audio.volumex(background_volume)
-                
-                # Loop or trim audio to match video duration
-                if background_audio.duration < video_clip.duration:
-                    background_audio = background_audio.loop(duration=video_clip.duration)
-                else:
-                    background_audio = background_audio.subclip(0, video_clip.duration)
-                
-                final_clip = video_clip.set_audio(background_audio)
-                final_clip.write_videofile(output_path, codec="libx264", audio_codec="aac", logger=None)
-                
-                video_clip.close()
-                background_audio.close()
-                final_clip.close()
+                # Background volume (same setting for dual audio and regular mode),
+                # looped or trimmed to match video duration
+                mix_audio_to_video(temp_output, output_path, [
+                    {'path': background_audio_path, 'volume': audio_settings.get('background_volume', 50), 'loop': True, 'cached': True}
+                ])
                 
                 # Remove temp file
                 if os.path.exists(temp_output):
@@ -147,134 +136,161 @@ def handle_dual_image_audio_processing(temp_output, output_path, video_source, d
             import shutil
             shutil.move(temp_output, output_path)
 def process_dual_greenscreen_video_auto(video1_path, video2_path, template_path, 
-                                       output_path, text_settings, audio_settings, gpu_settings):
+                                       output_path, text_settings, audio_settings, gpu_settings,
+                                       canvas=None, plan=None):
     """
     Process two videos with auto-detected dual green screen areas.
+    plan: DualCompositePlan of the template (detected here if not shared by the batch).
     """
     print(f"🎬🎬 Processing dual videos with auto-detection:")
     print(f"   Video 1: {os.path.basename(video1_path)}")
     print(f"   Video 2: {os.path.basename(video2_path)}")
     
-    # Load and validate template
-    template = get_template_for_processing(template_path)
-    template = cv2.resize(template, (1080, 1920))
-    
-    # Detect dual green screen areas
-    dual_areas = detect_dual_green_screen_areas(template)
-    if dual_areas is None:
-        print("❌ Could not detect dual green screen areas")
-        return False
+    canvas = canvas or DEFAULT_CANVAS
     
-    # Open both videos
-    cap1 = cv2.VideoCapture(video1_path)
-    cap2 = cv2.VideoCapture(video2_path)
+    if plan is None:
+        # Load template and detect dual green screen areas
+        template = get_template_for_processing(template_path)
+        template = cv2.resize(template, canvas.size)
+        
+        dual_areas = detect_dual_green_screen_areas(template)
+        if dual_areas is None:
+            print("❌ Could not detect dual green screen areas")
+            return False
+        plan = DualCompositePlan.from_dual_areas(template, dual_areas)
     
-    if not cap1.isOpened() or not cap2.isOpened():
-        print("❌ Could not open one or both videos")
-        cap1.release()
-        cap2.release()
-        return False
+    return process_multi_greenscreen_video(
+        [video1_path, video2_path], output_path, text_settings, audio_settings, gpu_settings, canvas, plan
+    )
+
+def process_multi_greenscreen_video(input_paths, output_path, text_settings, audio_settings, gpu_settings,
+                                    canvas, plan):
+    """
+    Composite input_paths[i] into slot i of plan (DualCompositePlan with one slot
+    per input) in a single pass. Every input has its own decoder thread; frames
+    are picked by output timestamp, so inputs with different fps keep their speed.
+    Audio comes from the first input.
+    """
+    canvas = canvas or DEFAULT_CANVAS
     
-    # Get video properties (use video1 as reference)
-    fps1, _, _ = get_video_properties(video1_path)
-    fps2, _, _ = get_video_properties(video2_path)
+    # One scheduler per slot
+    sources = [FrameScheduler(path) for path in input_paths]
     
-    # Use the higher FPS for output
-    output_fps = max(fps1, fps2)
+    if not all(source.is_opened() for source in sources):
+        print("❌ Could not open one or more input videos")
+        for source in sources:
+            source.release()
+        return False
     
-    total_frames1 = int(cap1.get(cv2.CAP_PROP_FRAME_COUNT))
-    total_frames2 = int(cap2.get(cv2.CAP_PROP_FRAME_COUNT))
+    # Use the highest FPS for output (unless the canvas fixes the fps)
+    source_fps = max(source.fps for source in sources) or 30
+    output_fps = canvas.get_fps(source_fps)
     
-    # Use the longer video as reference for total frames
-    max_frames = max(total_frames1, total_frames2)
+    # Use the longest video as reference for the duration (shorter ones loop)
+    duration = max(source.duration for source in sources)
+    for source in sources:
+        source.set_output_duration(duration)
+    total_frames = max(1, int(round(duration * output_fps)))
     
-    print(f"📹 Video 1: {total_frames1} frames at {fps1} FPS")
-    print(f"📹 Video 2: {total_frames2} frames at {fps2} FPS")
-    print(f"📹 Output: {max_frames} frames at {output_fps} FPS")
+    for number, (path, source) in enumerate(zip(input_paths, sources), 1):
+        print(f"📹 Video {number}: {os.path.basename(path)}, {source.frame_count} frames at {source.fps:g} FPS")
+    print(f"📹 Output: {canvas.width}x{canvas.height} at {output_fps:g} FPS, {total_frames} frames")
     
     # Setup output
     temp_output = output_path.replace('.mp4', '_temp.mp4')
     fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    out = cv2.VideoWriter(temp_output, fourcc, output_fps, (1080, 1920))
+    out = cv2.VideoWriter(temp_output, fourcc, output_fps, canvas.size)
+    get_cancel_token().track(temp_output)
     
     if not out.isOpened():
         print("❌ Could not create output file")
-        cap1.release()
-        cap2.release()
+        for source in sources:
+            source.release()
         return False
     
+    # Decode all inputs in parallel, ahead of the compositor, and encode behind it
+    timestamps = [frame_index / output_fps for frame_index in range(total_frames)]
+    prefetchers = [FramePrefetcher(source, timestamps) for source in sources]
+    writer = BackgroundFrameWriter(out)
+    
+    video_name = " + ".join(os.path.basename(path) for path in input_paths)
     frame_count = 0
+    previous_frames = None
+    processed_frame = None
     
     try:
-        while frame_count < max_frames:
-            # Read frames from both videos
-            ret1, frame1 = cap1.read()
-            ret2, frame2 = cap2.read()
-            
-            # Handle video looping if one video is shorter
-            if not ret1 and total_frames1 > 0:
-                cap1.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                ret1, frame1 = cap1.read()
-            
-            if not ret2 and total_frames2 > 0:
-                cap2.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                ret2, frame2 = cap2.read()
+        while frame_count < total_frames:
+            get_cancel_token().check()
+            # Source frames shown at this output time (duplicated or skipped by fps)
+            with span("decode"):
+                frames = [prefetcher.next() for prefetcher in prefetchers]
             
-            # If both videos ended, break
-            if not ret1 and not ret2:
+            # If all videos ended, break
+            if all(frame is None for frame in frames):
                 break
             
-            # Use black frame if one video is not available
-            if not ret1:
-                frame1 = np.zeros((480, 640, 3), dtype=np.uint8)
-            if not ret2:
-                frame2 = np.zeros((480, 640, 3), dtype=np.uint8)
-            
-            # Process frame with dual green screen
-            processed_frame = process_dual_frame_with_green_screen(
-                template, frame1, frame2, dual_areas
-            )
-            
-            # Add text overlay if enabled
-            if text_settings['enabled']:
-                video_name = f"{os.path.basename(video1_path)} + {os.path.basename(video2_path)}"
-                processed_frame = add_dual_text_overlay(processed_frame, video_name, text_settings)
-            
-            # Ensure correct size
-            if processed_frame.shape[:2] != (1920, 1080):
-                processed_frame = cv2.resize(processed_frame, (1080, 1920))
+            # Same source frames as the previous output frame: write it again
+            if previous_frames is None or any(frame is not previous for frame, previous in zip(frames, previous_frames)):
+                previous_frames = frames
+                
+                with span(FRAME_STAGE):
+                    # Use black frame if a video is not available
+                    frames = [np.zeros((480, 640, 3), dtype=np.uint8) if frame is None else frame for frame in frames]
+                    
+                    # Process frame with all slots in one pass
+                    processed_frame = plan.composite(*frames)
+                    
+                    # Add text overlay if enabled
+                    if text_settings['enabled']:
+                        with span("text"):
+                            processed_frame = add_dual_text_overlay(processed_frame, video_name, text_settings, canvas)
+                    
+                    # Ensure correct size
+                    if processed_frame.shape[:2] != canvas.shape:
+                        with span("resize"):
+                            processed_frame = cv2.resize(processed_frame, canvas.size)
             
-            out.write(processed_frame)
+            with span("write"):
+                writer.write(processed_frame)
             frame_count += 1
             
             # Progress update
+            get_progress_bus().frames(frame_count, total_frames)
             if frame_count % 30 == 0:
-                progress = (frame_count / max_frames) * 100
-                print(f"📊 Processed {frame_count}/{max_frames} frames ({progress:.1f}%)")
+                progress = (frame_count / total_frames) * 100
+                print(f"📊 Processed {frame_count}/{total_frames} frames ({progress:.1f}%)")
+        
+        writer.close()
     
     except Exception as e:
-        print(f"❌ Error during dual processing: {e}")
+        print(f"❌ Error during multi-slot processing: {e}")
         return False
     
     finally:
-        cap1.release()
-        cap2.release()
+        try:
+            writer.close()
+        except Exception:
+            pass
+        for prefetcher in prefetchers:
+            prefetcher.close()
+        for source in sources:
+            source.release()
         out.release()
     
-    print(f"✅ Dual video processing completed: {frame_count} frames")
+    print(f"✅ Multi-slot video processing completed: {frame_count} frames")
     
-    # Handle audio (use video1 as primary audio source)
-    handle_dual_audio_processing(temp_output, video1_path, "folder1", output_path, audio_settings)
+    # Handle audio (use the first input as primary audio source)
+    handle_dual_audio_processing(temp_output, input_paths[0], "folder1", output_path, audio_settings)
     
     return True
 
 def get_template_for_processing(template_path):
     """Get template for processing - handles static images, GIFs, and videos."""
     if template_path.lower().endswith('.gif'):
-        # For GIF templates, extract first frame as the base template
-        frames, _ = extract_gif_frames(template_path)
-        if frames:
-            return frames[0]  # Use first frame as template
+        # For GIF templates, decode only the first frame as the base template
+        frame = get_gif_first_frame(template_path)
+        if frame is not None:
+            return frame
         else:
             raise Exception("Could not extract frames from GIF template")
     elif template_path.lower().endswith(('.mp4', '.avi', '.mov')):
@@ -293,6 +309,20 @@ def get_template_for_processing(template_path):
             raise Exception("Could not load image template")
         return template
 
+def get_legacy_composite_plan(template_path, canvas):
+    """DualCompositePlan of the template's largest green screen area (legacy dual mode)."""
+    template = get_template_for_processing(template_path)
+    return DualCompositePlan.from_template(cv2.resize(template, canvas.size))
+
+def get_dual_audio_folder(audio_settings):
+    """Background music folder of the selected audio source (folder1/folder2), '' if none."""
+    audio_source = audio_settings.get('audio_source', 'folder1')
+    return audio_settings.get(f"{audio_source}_path") or audio_settings.get('folder_path') or ""
+
+def get_background_audio_file(audio_settings, audio_folder):
+    """Get the background track planned for this output (random pick if not planned)."""
+    return audio_settings.get('background_audio_path') or get_random_audio_file(audio_folder)
+
 def get_random_audio_file(audio_folder):
     """Get random audio file from folder."""
     if not audio_folder or not os.path.exists(audio_folder):
@@ -305,15 +335,22 @@ def get_random_audio_file(audio_folder):
     return os.path.join(audio_folder, random.choice(audio_files))
 
 def process_dual_greenscreen_video(video_path, video_source, template_path, template_mask, 
-                                 output_path, text_settings, audio_settings, gpu_settings):
-    """Process single video with dual green screen mode."""
+                                 output_path, text_settings, audio_settings, gpu_settings,
+                                 canvas=None, plan=None):
+    """
+    Process single video with dual green screen mode.
+    plan: DualCompositePlan of a static template (computed here if not shared by the batch).
+    """
     print(f"🎬🎬 Processing dual greenscreen video: {os.path.basename(video_path)} (Source: {video_source})")
     
+    canvas = canvas or DEFAULT_CANVAS
+    
     # Check if template is a GIF or video - IMPORTANT: Output is still MP4!
     if template_path.lower().endswith('.gif'):
         print(f"🎬 Processing with animated GIF template -> MP4 output")
-        temp_output = output_path.replace('.mp4', '_temp.mp4')
-        success = process_video_with_gif_template(template_path, video_path, temp_output, text_settings)
+        temp_output = get_cancel_token().track(output_path.replace('.mp4', '_temp.mp4'))
+        success = process_video_with_gif_template(template_path, video_path, temp_output, text_settings,
+                                                  canvas=canvas)
         
         if success:
             # Handle audio processing for dual mode
@@ -324,20 +361,22 @@ def process_dual_greenscreen_video(video_path, video_source, template_path, temp
     elif template_path.lower().endswith(('.mp4', '.avi', '.mov')):
         print(f"🎥 Processing with video template -> MP4 output")
         return process_video_with_video_template(video_path, video_source, template_path, 
-                                               output_path, text_settings, audio_settings, gpu_settings)
+                                               output_path, text_settings, audio_settings, gpu_settings,
+                                               canvas)
     
-    # Regular static template processing
-    template = get_template_for_processing(template_path)
-    template = cv2.resize(template, (1080, 1920))
+    # Regular static template processing (template slot shared by the batch)
+    plan = plan or get_legacy_composite_plan(template_path, canvas)
     
     cap = cv2.VideoCapture(video_path)
     fps, _, _ = get_video_properties(video_path)
+    output_fps = canvas.get_fps(fps)
     
     temp_output = output_path.replace('.mp4', '_temp.mp4')
     
     # Setup video writer
     fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    out = cv2.VideoWriter(temp_output, fourcc, fps, (1080, 1920))
+    out = cv2.VideoWriter(temp_output, fourcc, output_fps, canvas.size)
+    get_cancel_token().track(temp_output)
     
     video_name = os.path.basename(video_path)
     frame_count = 0
@@ -346,25 +385,33 @@ def process_dual_greenscreen_video(video_path, video_source, template_path, temp
     
     try:
         while True:
+            get_cancel_token().check()
             ret, video_frame = cap.read()
             if not ret:
                 break
             
-            processed_frame = process_frame_with_green_screen(template, video_frame, template_mask)
+            # Drop/duplicate frames when canvas fps differs from source fps
+            repeats = canvas.output_repeats(frame_count, fps)
+            frame_count += 1
+            if repeats == 0:
+                continue
+            
+            processed_frame = plan.composite(video_frame)
             
             # Add text overlay (use video name based on text source)
             if text_settings['enabled']:
                 # Use video name for text overlay
-                processed_frame = add_dual_text_overlay(processed_frame, video_name, text_settings)
+                processed_frame = add_dual_text_overlay(processed_frame, video_name, text_settings, canvas)
             
             # Ensure frame is the correct size
-            if processed_frame.shape[:2] != (1920, 1080):
-                processed_frame = cv2.resize(processed_frame, (1080, 1920))
+            if processed_frame.shape[:2] != canvas.shape:
+                processed_frame = cv2.resize(processed_frame, canvas.size)
             
-            out.write(processed_frame)
-            frame_count += 1
+            for _ in range(repeats):
+                out.write(processed_frame)
             
             # Progress update every 30 frames
+            get_progress_bus().frames(frame_count)
             if frame_count % 30 == 0:
                 print(f"📊 Processed {frame_count} frames")
     
@@ -382,10 +429,13 @@ def process_dual_greenscreen_video(video_path, video_source, template_path, temp
     return True
 
 def process_video_with_video_template(video_path, video_source, template_path, 
-                                    output_path, text_settings, audio_settings, gpu_settings):
+                                    output_path, text_settings, audio_settings, gpu_settings,
+                                    canvas=None):
     """Process video with video template."""
     print(f"🎥 Processing video with video template")
     
+    canvas = canvas or DEFAULT_CANVAS
+    
     # Open template video
     template_cap = cv2.VideoCapture(template_path)
     template_fps = int(template_cap.get(cv2.CAP_PROP_FPS))
@@ -399,7 +449,8 @@ def process_video_with_video_template(video_path, video_source, template_path,
     # Use input video FPS for output
     temp_output = output_path.replace('.mp4', '_temp.mp4')
     fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    out = cv2.VideoWriter(temp_output, fourcc, input_fps, (1080, 1920))
+    out = cv2.VideoWriter(temp_output, fourcc, input_fps, canvas.size)
+    get_cancel_token().track(temp_output)
     
     video_name = os.path.basename(video_path)
     frame_count = 0
@@ -410,6 +461,7 @@ def process_video_with_video_template(video_path, video_source, template_path,
     
     try:
         while True:
+            get_cancel_token().check()
             # Read input video frame
             ret_input, input_frame = input_cap.read()
             if not ret_input:
@@ -427,7 +479,7 @@ def process_video_with_video_template(video_path, video_source, template_path,
             
             if ret_template:
                 # Resize template frame
-                template_frame = cv2.resize(template_frame, (1080, 1920))
+                template_frame = cv2.resize(template_frame, canvas.size)
                 
                 # Create mask from current template frame
                 template_mask = create_green_screen_mask(template_frame)
@@ -437,11 +489,11 @@ def process_video_with_video_template(video_path, video_source, template_path,
                 
                 # Add text overlay
                 if text_settings['enabled']:
-                    processed_frame = add_dual_text_overlay(processed_frame, video_name, text_settings)
+                    processed_frame = add_dual_text_overlay(processed_frame, video_name, text_settings, canvas)
                 
                 # Ensure correct size
-                if processed_frame.shape[:2] != (1920, 1080):
-                    processed_frame = cv2.resize(processed_frame, (1080, 1920))
+                if processed_frame.shape[:2] != canvas.shape:
+                    processed_frame = cv2.resize(processed_frame, canvas.size)
                 
                 out.write(processed_frame)
                 
@@ -449,6 +501,7 @@ def process_video_with_video_template(video_path, video_source, template_path,
                 template_frame_index = (template_frame_index + 1) % template_frame_count
             
             frame_count += 1
+            get_progress_bus().frames(frame_count, input_frame_count)
             
             if frame_count % 30 == 0:
                 print(f"📊 Processed {frame_count} frames (Template frame: {template_frame_index + 1}/{template_frame_count})")
@@ -468,51 +521,62 @@ def process_video_with_video_template(video_path, video_source, template_path,
     return True
 
 def process_dual_greenscreen_gif(gif_path, video_source, template_path, template_mask, 
-                               output_path, text_settings, audio_settings, gpu_settings):
-    """Process GIF with dual green screen mode -> MP4 output."""
+                               output_path, text_settings, audio_settings, gpu_settings,
+                               canvas=None, plan=None):
+    """
+    Process GIF with dual green screen mode -> MP4 output.
+    plan: DualCompositePlan of the template (computed here if not shared by the batch).
+    """
     print(f"🎬🎬 Processing dual greenscreen GIF: {os.path.basename(gif_path)} (Source: {video_source})")
     
+    canvas = canvas or DEFAULT_CANVAS
+    
     try:
-        # Extract GIF frames
-        frames, durations = extract_gif_frames(gif_path)
-        if not frames:
+        # GIF frames are converted as they are decoded
+        reader = GifFrameReader(gif_path)
+        frame_count = len(reader)
+        if frame_count == 0:
             return False
         
-        # Get template
-        template = get_template_for_processing(template_path)
-        template = cv2.resize(template, (1080, 1920))
+        # Template slot (shared by the batch)
+        plan = plan or get_legacy_composite_plan(template_path, canvas)
         
         # Setup MP4 writer
         fps = 10  # Default FPS for GIF conversion
         temp_output = output_path.replace('.mp4', '_temp.mp4')
         fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(temp_output, fourcc, fps, (1080, 1920))
+        out = cv2.VideoWriter(temp_output, fourcc, fps, canvas.size)
+        get_cancel_token().track(temp_output)
         
         gif_name = os.path.basename(gif_path)
         
-        print(f"🎬 Converting GIF to MP4: {len(frames)} frames")
+        print(f"🎬 Converting GIF to MP4: {frame_count} frames")
         
-        for i, frame in enumerate(frames):
+        frames_written = 0
+        for i, (frame, _) in enumerate(reader):
+            get_cancel_token().check()
             # Process with greenscreen
-            processed_frame = process_frame_with_green_screen(template, frame, template_mask)
+            processed_frame = plan.composite(frame)
             
             # Add text overlay
             if text_settings['enabled']:
-                processed_frame = add_dual_text_overlay(processed_frame, gif_name, text_settings)
+                processed_frame = add_dual_text_overlay(processed_frame, gif_name, text_settings, canvas)
             
             # Ensure correct size
-            if processed_frame.shape[:2] != (1920, 1080):
-                processed_frame = cv2.resize(processed_frame, (1080, 1920))
+            if processed_frame.shape[:2] != canvas.shape:
+                processed_frame = cv2.resize(processed_frame, canvas.size)
             
             out.write(processed_frame)
+            frames_written += 1
+            get_progress_bus().frames(i + 1, frame_count)
             
             if (i + 1) % 10 == 0:
-                print(f"📊 Converted {i + 1}/{len(frames)} frames")
+                print(f"📊 Converted {i + 1}/{frame_count} frames")
         
         out.release()
         
         # Handle audio (use silence for GIF conversion)
-        handle_dual_gif_audio_processing(temp_output, output_path, video_source, len(frames), fps, audio_settings)
+        handle_dual_gif_audio_processing(temp_output, output_path, video_source, frames_written, fps, audio_settings)
         
         return True
         
@@ -520,45 +584,52 @@ def process_dual_greenscreen_gif(gif_path, video_source, template_path, template
         print(f"❌ GIF to MP4 conversion error: {e}")
         return False
 
-def add_dual_text_overlay(frame, video_name, text_settings):
+def add_dual_text_overlay(frame, video_name, text_settings, canvas=None):
     """Add text overlay for dual mode (simplified version)."""
     try:
         from PIL import Image, ImageDraw, ImageFont
         from utils.text_rendering import smart_text_wrap, render_text_with_emoji_multiline
         
+        canvas = canvas or CanvasSpec.for_frame(frame)
         pil_image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
         draw = ImageDraw.Draw(pil_image)
         
+        # Scale font, emoji and margins to the canvas
+        font_size = canvas.scaled(text_settings['size'])
+        emoji_size = canvas.scaled(80)
+        margin = canvas.scaled(40)
+        line_spacing = canvas.scaled(10)
+        
         try:
             font_file = get_font_file(text_settings['font'])
-            font = ImageFont.truetype(font_file, text_settings['size'])
-        except:
+            font = ImageFont.truetype(font_file, font_size)
+        except Exception:
             font = ImageFont.load_default()
         
         video_name_text = os.path.splitext(video_name)[0].replace("_", " ")
         
         # Calculate available text area
-        max_text_width = 1080 - 80  # 40px margin left-right
+        max_text_width = canvas.width - 2 * margin  # margin left-right
         
         # Auto-wrap text based on frame width
-        lines = smart_text_wrap(video_name_text, draw, font, max_text_width, emoji_size=80)
+        lines = smart_text_wrap(video_name_text, draw, font, max_text_width, emoji_size=emoji_size)
         
         # Calculate position based on settings
         x_percent = text_settings['x_position'] / 100
         y_percent = text_settings['y_position'] / 100
         
         # Calculate total text height
-        line_height = text_settings['size'] + 10
+        line_height = font_size + line_spacing
         total_text_height = len(lines) * line_height
         
         # Y position based on percentage, with auto-adjustment
-        base_y = int(y_percent * (1920 - total_text_height - 40))
-        base_y = max(20, min(base_y, 1920 - total_text_height - 20))
+        base_y = int(y_percent * (canvas.height - total_text_height - margin))
+        base_y = max(margin // 2, min(base_y, canvas.height - total_text_height - margin // 2))
         
         # Render multiline text with emoji
         rendered_lines = render_text_with_emoji_multiline(
-            draw, lines, font, 1080, 1920, 
-            base_y, emoji_size=80, line_spacing=10
+            draw, lines, font, canvas.width, canvas.height, 
+            base_y, emoji_size=emoji_size, line_spacing=line_spacing, margin=margin
         )
         
         # Get text color from settings (default to black if not specified)
@@ -569,7 +640,7 @@ def add_dual_text_overlay(frame, video_name, text_settings):
             for item_type, item, x_offset in line_data['items']:
                 if item_type == 'emoji':
                     # Position emoji adjusted to font height
-                    emoji_y = line_data['y'] + (text_settings['size'] - line_data['emoji_size']) // 2
+                    emoji_y = line_data['y'] + (font_size - line_data['emoji_size']) // 2
                     pil_image.paste(item, (line_data['x_start'] + x_offset, emoji_y), item)
                 elif item_type == 'text':
                     # Draw text with selected color
@@ -602,16 +673,13 @@ def handle_dual_audio_processing(temp_output, video_path, video_source, output_p
     """Handle audio processing for dual green screen mode."""
     try:
         # Determine which audio folder to use based on source
-        if audio_settings.get('audio_source', 'folder1') == "folder1":
-            audio_folder = audio_settings['folder1_path']
-        else:
-            audio_folder = audio_settings['folder2_path']
+        audio_folder = get_dual_audio_folder(audio_settings)
         
         # Check if dual audio mixing is enabled
         if audio_settings.get('dual_audio_enabled', False):
             # Dual audio mixing mode
             if audio_folder:
-                background_audio_path = get_random_audio_file(audio_folder)
+                background_audio_path = get_background_audio_file(audio_settings, audio_folder)
                 
                 if background_audio_path:
                     print(f"🎭 Dual audio mixing: Original + Background (Source: {audio_settings.get('audio_source', 'folder1')})")
@@ -619,8 +687,8 @@ def handle_dual_audio_processing(temp_output, video_path, video_source, output_p
                     
                     success = add_dual_audio_to_video(
                         temp_output, video_path, background_audio_path, output_path,
-                        original_volume=audio_settings['original_volume'],
-                        background_volume=audio_settings['background_volume']
+                        original_volume=audio_settings.get('original_volume', 100),
+                        background_volume=audio_settings.get('background_volume', 50)
                     )
                     
                     if success:
@@ -636,16 +704,16 @@ def handle_dual_audio_processing(temp_output, video_path, video_source, output_p
             # Fallback to original audio if dual audio fails
             add_audio_to_video(temp_output, video_path, output_path)
             
-        elif audio_settings['enabled'] and audio_folder:
+        elif audio_settings.get('enabled', False) and audio_folder:
             # Background music only mode
-            background_audio_path = get_random_audio_file(audio_folder)
+            background_audio_path = get_background_audio_file(audio_settings, audio_folder)
             
             if background_audio_path:
                 print(f"🎵 Adding background music from {audio_settings.get('audio_source', 'folder1')}: {os.path.basename(background_audio_path)}")
                 # Add background music with specified volume
                 success = add_background_music_to_video(
                     temp_output, video_path, background_audio_path, output_path,
-                    volume=audio_settings['background_volume']
+                    volume=audio_settings.get('background_volume', 50)
                 )
                 if not success:
                     print("🔄 Background music failed, using original audio")
@@ -674,45 +742,22 @@ def handle_dual_gif_audio_processing(temp_output, output_path, video_source, fra
     """Handle audio for GIF to MP4 conversion in dual mode."""
     try:
         # Determine which audio folder to use based on source
-        if audio_settings.get('audio_source', 'folder1') == "folder1":
-            audio_folder = audio_settings['folder1_path']
-        else:
-            audio_folder = audio_settings['folder2_path']
+        audio_folder = get_dual_audio_folder(audio_settings)
         
         # For GIF conversion, we only add background music (no original audio)
-        if (audio_settings['enabled'] or audio_settings.get('dual_audio_enabled', False)) and audio_folder:
+        if (audio_settings.get('enabled', False) or audio_settings.get('dual_audio_enabled', False)) and audio_folder:
             # Add background music
-            background_audio_path = get_random_audio_file(audio_folder)
+            background_audio_path = get_background_audio_file(audio_settings, audio_folder)
             
             if background_audio_path:
                 print(f"🎵 Adding background music to converted MP4 from {audio_settings.get('audio_source', 'folder1')}")
-                from moviepy.editor import VideoFileClip, AudioFileClip
-                
-                video_clip = VideoFileClip(temp_output)
-                background_audio = AudioFileClip(background_audio_path)
-                
-                # Adjust volume based on mode
-                if audio_settings.get('dual_audio_enabled', False):
-                    # Use background volume from dual audio settings
-                    background_volume = audio_settings['background_volume'] / 100.0
-                else:
-                    # Use regular background volume
-                    background_volume = audio_settings['background_volume'] / 100.0
-                
-                background_audio = background_audio.volumex(background_volume)
-                
-                # Loop or trim audio to match video duration
-                if background_audio.duration < video_clip.duration:
-                    background_audio = background_audio.loop(duration=video_clip.duration)
-                else:
-                    background_audio = background_audio.subclip(0, video_clip.duration)
-                
-                final_clip = video_clip.set_audio(background_audio)
-                final_clip.write_videofile(output_path, codec="libx264", audio_codec="aac", logger=None)
+                from .audio_engine import mix_audio_to_video
                 
-                video_clip.close()
-                background_audio.close()
-                final_clip.close()
+                # Background volume (same setting for dual audio and regular mode),
+                # looped or trimmed to match video duration
+                mix_audio_to_video(temp_output, output_path, [
+                    {'path': background_audio_path, 'volume': audio_settings.get('background_volume', 50), 'loop': True, 'cached': True}
+                ])
                 
                 # Remove temp file
                 if os.path.exists(temp_output):
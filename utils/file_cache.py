@@ -0,0 +1,92 @@
+"""
+File Cache - Folder of cache entries with a byte budget
+Shared by the decoded audio cache and the segment cache: entries are keyed
+by their source (path, size, mtime) and a spec string, written to a private
+temp file and published with an atomic rename (other processes never see a
+partial entry), and evicted least-recently-used first (by mtime) when the
+folder exceeds its byte budget.
+"""
+
+import os
+import hashlib
+import tempfile
+
+class FileCache:
+    """Cache entries named <key><extension> in folder, kept within budget_bytes."""
+    
+    def __init__(self, folder, extension, budget_bytes):
+        self.folder = folder
+        self.extension = extension
+        self.budget_bytes = budget_bytes
+    
+    def get_key(self, source_path, spec):
+        """Cache key from path, size and mtime of the source (changes when the file changes) and spec."""
+        stat = os.stat(source_path)
+        identity = f"{os.path.abspath(source_path)}|{stat.st_size}|{stat.st_mtime_ns}|{spec}"
+        return hashlib.sha1(identity.encode('utf-8')).hexdigest()
+    
+    def get_path(self, key):
+        return os.path.join(self.folder, key + self.extension)
+    
+    def lookup(self, key):
+        """Path of the entry for key marked as recently used, None on a cache miss."""
+        path = self.get_path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+    
+    def create_temp(self):
+        """Private temp file in the cache folder: (file object opened for writing, path)."""
+        os.makedirs(self.folder, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=self.folder)
+        return os.fdopen(fd, 'wb'), temp_path
+    
+    def publish(self, temp_path, key):
+        """Move a written temp file into the cache as the entry for key, then evict. Returns its path."""
+        path = self.get_path(key)
+        os.replace(temp_path, path)
+        self.evict(keep=path)
+        return path
+    
+    def discard(self, temp_path):
+        """Remove an unpublished temp file."""
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+    
+    def evict(self, budget_bytes=None, keep=None):
+        """Delete least recently used entries until the cache fits in budget_bytes (default: its budget)."""
+        if budget_bytes is None:
+            budget_bytes = self.budget_bytes
+        
+        entries = []
+        for name in os.listdir(self.folder):
+            if not name.endswith(self.extension):
+                continue
+            path = os.path.join(self.folder, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        
+        total_bytes = sum(size for _, size, _ in entries)
+        
+        for _, size, path in sorted(entries):
+            if total_bytes <= budget_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                total_bytes -= size
+            except OSError:
+                pass  # Still mapped by another process (Windows), try the next one
+    
+    def clear(self):
+        """Remove all entries."""
+        if os.path.exists(self.folder):
+            self.evict(budget_bytes=0)
@@ -1,6 +1,5 @@
 import os
 import cv2
-from moviepy.editor import VideoFileClip, AudioFileClip, CompositeAudioClip
 
 def get_video_files(folder_path):
     """Mendapatkan daftar file video dari folder."""
@@ -88,10 +87,73 @@ def get_all_media_files(folder_path):
     image_files = get_image_files(folder_path)
     return video_files + gif_files + image_files
 
+def get_dual_files_to_process(folder1_path, folder2_path):
+    """Semua file media dari kedua folder dual mode: list of (folder path, file name, "folder1"/"folder2")."""
+    files_to_process = []
+    
+    for folder_path, video_source in ((folder1_path, "folder1"), (folder2_path, "folder2")):
+        if not folder_path:
+            continue
+        try:
+            for file_name in get_all_media_files(folder_path):
+                files_to_process.append((folder_path, file_name, video_source))
+        except Exception as e:
+            print(f"Error getting files from {video_source}: {e}")
+    
+    return files_to_process
+
+# Playlist files usable as a slot input instead of a folder (one media path per line)
+PLAYLIST_EXTENSIONS = ('.m3u', '.m3u8', '.txt')
+
+def get_slot_sources(folder_paths):
+    """Input slot multi green screen dari folder_paths ('folder1', 'folder2', 'folder3', ...) sesuai urutan nomor."""
+    numbered = []
+    for key, source in folder_paths.items():
+        if key.startswith('folder') and key[len('folder'):].isdigit() and source:
+            numbered.append((int(key[len('folder'):]), key, source))
+    return [(key, source) for _, key, source in sorted(numbered)]
+
+def get_slot_input_files(source):
+    """
+    Path lengkap file media dari satu input slot: folder (semua file media)
+    atau playlist (satu path per baris, relatif terhadap folder playlist, '#' = komentar).
+    """
+    if os.path.isdir(source):
+        return [os.path.join(source, file_name) for file_name in get_all_media_files(source)]
+    
+    if not source.lower().endswith(PLAYLIST_EXTENSIONS):
+        raise ValueError(f"Slot input must be a folder or a playlist ({', '.join(PLAYLIST_EXTENSIONS)}): {source}")
+    
+    playlist_folder = os.path.dirname(os.path.abspath(source))
+    files = []
+    with open(source, 'r', encoding='utf-8-sig') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            path = line if os.path.isabs(line) else os.path.join(playlist_folder, line)
+            if os.path.isfile(path):
+                files.append(path)
+            else:
+                print(f"⚠️ Playlist entry not found: {line}")
+    return files
+
+# Audio folder listings keyed by folder path -> (folder mtime, files)
+_audio_files_cache = {}
+
 def get_audio_files(folder_path):
-    """Mendapatkan daftar file audio dari folder."""
+    """Mendapatkan daftar file audio dari folder (di-cache sampai isi folder berubah)."""
     audio_extensions = ('.mp3', '.wav', '.aac', '.m4a', '.ogg', '.flac', '.wma')
-    return [f for f in os.listdir(folder_path) if f.lower().endswith(audio_extensions)]
+    
+    # Folder mtime changes when files are added, removed or renamed
+    folder_mtime = os.stat(folder_path).st_mtime_ns
+    cached = _audio_files_cache.get(folder_path)
+    if cached and cached[0] == folder_mtime:
+        return list(cached[1])
+    
+    audio_files = [f for f in os.listdir(folder_path) if f.lower().endswith(audio_extensions)]
+    _audio_files_cache[folder_path] = (folder_mtime, audio_files)
+    return list(audio_files)
 
 def create_output_folder(base_path, folder_name="edited_videos_greenscreen"):
     """Membuat folder output untuk video hasil."""
@@ -103,17 +165,25 @@ def is_image_file(file_path):
     """Check if file is an image."""
     image_extensions = ('.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif', '.webp')
     return file_path.lower().endswith(image_extensions)
-def add_audio_to_video(temp_video_path, original_video_path, output_path):
+
+def is_media_file(file_path):
+    """Check if file is a video, GIF or image (same extensions as get_all_media_files)."""
+    video_extensions = ('.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv')
+    return file_path.lower().endswith(video_extensions) or is_gif_file(file_path) or is_image_file(file_path)
+
+def is_audio_file(file_path):
+    """Check if file is an audio file (same extensions as get_audio_files)."""
+    audio_extensions = ('.mp3', '.wav', '.aac', '.m4a', '.ogg', '.flac', '.wma')
+    return file_path.lower().endswith(audio_extensions)
+
+def add_audio_to_video(temp_video_path, original_video_path, output_path, video_codec="libx264"):
     """Menambahkan audio dari video asli ke video hasil."""
-    video_clip = None
-    original_audio = None
-    final_clip = None
+    from utils.audio_engine import mix_audio_to_video
     
     try:
-        video_clip = VideoFileClip(temp_video_path)
-        original_audio = AudioFileClip(original_video_path)
-        final_clip = video_clip.set_audio(original_audio)
-        final_clip.write_videofile(output_path, codec="libx264", audio_codec="aac", logger=None)
+        mix_audio_to_video(temp_video_path, output_path, [
+            {'path': original_video_path, 'volume': 100, 'loop': False}
+        ], video_codec=video_codec)
         return True
     except Exception as e:
         print(f"Error adding audio: {e}")
@@ -121,142 +191,60 @@ def add_audio_to_video(temp_video_path, original_video_path, output_path):
             # Fallback: rename temp file to output
             if os.path.exists(temp_video_path):
                 os.rename(temp_video_path, output_path)
-        except:
+        except Exception:
             pass
         return False
     finally:
-        # Cleanup resources
-        if video_clip:
-            video_clip.close()
-        if original_audio:
-            original_audio.close()
-        if final_clip:
-            final_clip.close()
-        
         # Remove temp file if it still exists
         try:
             if os.path.exists(temp_video_path):
                 os.remove(temp_video_path)
-        except:
+        except Exception:
             pass
 
 def add_background_music_to_video(temp_video_path, original_video_path, background_audio_path, 
-                                 output_path, volume=50):
+                                 output_path, volume=50, video_codec="libx264"):
     """Menambahkan background music ke video (background only mode)."""
-    video_clip = None
-    background_audio = None
-    final_clip = None
+    from utils.audio_engine import mix_audio_to_video
     
     try:
-        video_clip = VideoFileClip(temp_video_path)
-        background_audio = AudioFileClip(background_audio_path)
-        
-        # Sesuaikan volume background music (0-100 ke 0-1)
-        background_volume = volume / 100.0
-        background_audio = background_audio.volumex(background_volume)
-        
-        # Loop background audio jika lebih pendek dari video
-        if background_audio.duration < video_clip.duration:
-            background_audio = background_audio.loop(duration=video_clip.duration)
-        else:
-            background_audio = background_audio.subclip(0, video_clip.duration)
-        
-        # Hanya background music
-        final_clip = video_clip.set_audio(background_audio)
-        final_clip.write_videofile(output_path, codec="libx264", audio_codec="aac", logger=None)
+        # Hanya background music (loop jika lebih pendek dari video, volume 0-100)
+        mix_audio_to_video(temp_video_path, output_path, [
+            {'path': background_audio_path, 'volume': volume, 'loop': True, 'cached': True}
+        ], video_codec=video_codec)
         return True
         
     except Exception as e:
         print(f"Error adding background music: {e}")
         # Fallback ke audio asli jika gagal
-        return add_audio_to_video(temp_video_path, original_video_path, output_path)
+        return add_audio_to_video(temp_video_path, original_video_path, output_path, video_codec)
     finally:
-        # Cleanup resources
-        if video_clip:
-            video_clip.close()
-        if background_audio:
-            background_audio.close()
-        if final_clip:
-            final_clip.close()
-        
         # Remove temp file if it still exists
         try:
             if os.path.exists(temp_video_path):
                 os.remove(temp_video_path)
-        except:
+        except Exception:
             pass
 
 def add_dual_audio_to_video(temp_video_path, original_video_path, background_audio_path, 
-                           output_path, original_volume=100, background_volume=50):
+                           output_path, original_volume=100, background_volume=50, video_codec="libx264"):
     """
-    FIXED: Add dual audio mixing (original + background) to video.
-    Compatible with Python 3.12.0 and MoviePy 1.0.3.
+    Add dual audio mixing (original + background) to video.
+    Both tracks are decoded once and mixed with NumPy (see utils.audio_engine).
     """
-    video_clip = None
-    original_audio = None
-    background_audio = None
-    final_clip = None
+    from utils.audio_engine import mix_audio_to_video
     
     try:
         print(f"🎭 Starting dual audio mixing...")
         print(f"   Original volume: {original_volume}%")
         print(f"   Background volume: {background_volume}%")
         
-        # Load video and audio clips
-        video_clip = VideoFileClip(temp_video_path)
-        original_audio = AudioFileClip(original_video_path)
-        background_audio = AudioFileClip(background_audio_path)
-        
-        # Adjust volumes (0-100 to 0-1)
-        original_volume_factor = original_volume / 100.0
-        background_volume_factor = background_volume / 100.0
-        
-        # Apply volume adjustments
-        if original_volume_factor != 1.0:
-            original_audio = original_audio.volumex(original_volume_factor)
-            print(f"   📊 Original audio volume adjusted to {original_volume}%")
-        
-        if background_volume_factor != 1.0:
-            background_audio = background_audio.volumex(background_volume_factor)
-            print(f"   📊 Background audio volume adjusted to {background_volume}%")
-        
-        # Synchronize audio durations
-        video_duration = video_clip.duration
-        
-        # Adjust original audio to match video duration
-        if original_audio.duration > video_duration:
-            original_audio = original_audio.subclip(0, video_duration)
-            print(f"   ✂️ Original audio trimmed to {video_duration:.2f}s")
-        elif original_audio.duration < video_duration:
-            # For shorter original audio, we'll keep it as is and let CompositeAudioClip handle it
-            print(f"   ⚠️ Original audio shorter than video ({original_audio.duration:.2f}s vs {video_duration:.2f}s)")
-        
-        # Adjust background audio to match video duration
-        if background_audio.duration < video_duration:
-            # Loop background audio to match video duration
-            background_audio = background_audio.loop(duration=video_duration)
-            print(f"   🔄 Background audio looped to {video_duration:.2f}s")
-        else:
-            # Trim background audio to match video duration
-            background_audio = background_audio.subclip(0, video_duration)
-            print(f"   ✂️ Background audio trimmed to {video_duration:.2f}s")
-        
-        # Create composite audio (mix both audio tracks)
+        # Original audio is trimmed to the video, background music is looped or trimmed
         print(f"   🎵 Mixing audio tracks...")
-        composite_audio = CompositeAudioClip([original_audio, background_audio])
-        
-        # Set the mixed audio to the video
-        final_clip = video_clip.set_audio(composite_audio)
-        
-        # Write the final video with mixed audio - FIXED: Remove unsupported parameter
-        print(f"   💾 Writing final video with dual audio...")
-        final_clip.write_videofile(
-            output_path, 
-            codec="libx264", 
-            audio_codec="aac", 
-            logger=None
-            # REMOVED: temp_audiofile_path parameter (not supported in MoviePy 1.0.3)
-        )
+        mix_audio_to_video(temp_video_path, output_path, [
+            {'path': original_video_path, 'volume': original_volume, 'loop': False},
+            {'path': background_audio_path, 'volume': background_volume, 'loop': True, 'cached': True}
+        ], video_codec=video_codec)
         
         print(f"✅ Dual audio mixing completed successfully!")
         return True
@@ -271,27 +259,14 @@ def add_dual_audio_to_video(temp_video_path, original_video_path, background_aud
         try:
             return add_background_music_to_video(
                 temp_video_path, original_video_path, background_audio_path, 
-                output_path, background_volume
+                output_path, background_volume, video_codec
             )
         except Exception as fallback_error:
             print(f"❌ Fallback also failed: {fallback_error}")
             # Final fallback to original audio only
-            return add_audio_to_video(temp_video_path, original_video_path, output_path)
+            return add_audio_to_video(temp_video_path, original_video_path, output_path, video_codec)
         
     finally:
-        # Cleanup resources
-        try:
-            if video_clip:
-                video_clip.close()
-            if original_audio:
-                original_audio.close()
-            if background_audio:
-                background_audio.close()
-            if final_clip:
-                final_clip.close()
-        except Exception as cleanup_error:
-            print(f"⚠️ Cleanup error: {cleanup_error}")
-        
         # Remove temp file if it still exists
         try:
             if os.path.exists(temp_video_path):
@@ -311,4 +286,12 @@ def get_video_properties(video_path):
 
 def is_gif_file(file_path):
     """Check if file is a GIF."""
-    return file_path.lower().endswith('.gif')
\ No newline at end of file
+    return file_path.lower().endswith('.gif')
+
+def get_ffmpeg_binary():
+    """Get ffmpeg binary path (same binary used by MoviePy)."""
+    try:
+        from moviepy.config import get_setting
+        return get_setting("FFMPEG_BINARY")
+    except Exception:
+        return "ffmpeg"
\ No newline at end of file
@@ -0,0 +1,196 @@
+"""
+Frame Scheduler - Source frames picked by output timestamp
+Compositing several inputs with different frame rates cannot read one frame
+from each input per output frame (a 30fps clip next to a 60fps clip would
+play at double speed). A FrameScheduler maps an output timestamp to the
+source frame shown at that time: frames are duplicated when the source is
+slower than the output and skipped with grab() (no decode) when it is faster.
+
+Sources shorter than the output loop. The frames decoded in the first pass
+are kept (up to LOOP_CACHE_MAX_BYTES) and replayed for the loops, so a loop
+does not seek; frames missing from the cache are decoded again by reading
+the video from the start.
+
+FramePrefetcher runs a scheduler in its own thread, so the inputs of a
+multi-slot composite are decoded in parallel (OpenCV releases the GIL while
+decoding), and BackgroundFrameWriter encodes in another thread while the
+main thread composites.
+"""
+
+import queue
+import threading
+
+import cv2
+
+from utils.timeline_reader import LOOP_CACHE_MAX_BYTES
+
+class FrameScheduler:
+    """One input stream: frame_at(timestamp) returns the frame shown at that time (looped)."""
+    
+    def __init__(self, video_path, cache_max_bytes=LOOP_CACHE_MAX_BYTES):
+        self.video_path = video_path
+        self.cap = cv2.VideoCapture(video_path)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) if self.cap.isOpened() else 0
+        if self.fps > 0:
+            self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        else:
+            # Still image (no frame rate): one frame shown for the whole output
+            self.frame_count = 1 if self.cap.isOpened() else 0
+        self.duration = self.frame_count / self.fps if self.fps > 0 else 0.0
+        
+        self.position = 0        # Index of the frame the capture returns next
+        self.last_index = None   # Last returned frame (duplicated frames are not decoded again)
+        self.last_frame = None
+        
+        self.cache = {}          # Source index -> decoded frame, for the loops
+        self.cache_bytes = 0
+        self.cache_enabled = False
+        self.cache_max_bytes = cache_max_bytes
+    
+    def is_opened(self):
+        return self.frame_count > 0
+    
+    def set_output_duration(self, duration):
+        """Keep decoded frames for the loops if the output is longer than the source."""
+        self.cache_enabled = self.is_opened() and duration > self.duration
+    
+    def get_source_index(self, timestamp):
+        """Source frame shown at timestamp (seconds), wrapped to the source length."""
+        if self.fps <= 0:
+            return 0
+        return int(timestamp * self.fps + 1e-6) % self.frame_count
+    
+    def frame_at(self, timestamp):
+        """Frame shown at timestamp, None if the video has no readable frames."""
+        if self.frame_count <= 0:
+            return None
+        
+        index = self.get_source_index(timestamp)
+        if index == self.last_index:
+            return self.last_frame
+        
+        frame = self.cache.get(index)
+        if frame is None:
+            frame = self._decode(index)
+            if frame is None:
+                # Video is shorter than its container reported: wrap at the real length
+                self.frame_count = self.position
+                self.duration = self.frame_count / self.fps if self.fps > 0 else 0.0
+                return self.frame_at(timestamp)
+            
+            if self.cache_enabled and self.cache_bytes + frame.nbytes <= self.cache_max_bytes:
+                self.cache[index] = frame
+                self.cache_bytes += frame.nbytes
+        
+        self.last_index = index
+        self.last_frame = frame
+        return frame
+    
+    def _decode(self, index):
+        """Decode frame index, skipping earlier frames with grab() (None past the end)."""
+        if index < self.position:
+            # Looped past a frame that is not cached: read again from the start (no seek)
+            self.cap.release()
+            self.cap = cv2.VideoCapture(self.video_path)
+            self.position = 0
+        
+        while self.position < index:
+            if not self.cap.grab():
+                return None
+            self.position += 1
+        
+        ret, frame = self.cap.read()
+        if not ret:
+            return None
+        self.position += 1
+        return frame
+    
+    def release(self):
+        self.cap.release()
+        self.cache = {}
+        self.cache_bytes = 0
+        self.last_frame = None
+
+# Frames decoded ahead of the compositor per input
+PREFETCH_DEPTH = 4
+
+class FramePrefetcher:
+    """
+    Decodes scheduler.frame_at(t) for every timestamp in a background thread;
+    next() returns the frames in order (errors of the decoder are raised there).
+    """
+    
+    def __init__(self, scheduler, timestamps, depth=PREFETCH_DEPTH):
+        self.queue = queue.Queue(maxsize=depth)
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(scheduler, timestamps), daemon=True)
+        self.thread.start()
+    
+    def _put(self, item):
+        # Wait for room, unless the consumer stopped
+        while not self.stopped.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+    
+    def _run(self, scheduler, timestamps):
+        try:
+            for timestamp in timestamps:
+                if not self._put((True, scheduler.frame_at(timestamp))):
+                    return
+        except Exception as e:
+            self._put((False, e))
+    
+    def next(self):
+        ok, value = self.queue.get()
+        if not ok:
+            raise value
+        return value
+    
+    def close(self):
+        """Stop the decoder thread (the scheduler is released by its owner)."""
+        self.stopped.set()
+        self.thread.join()
+
+class BackgroundFrameWriter:
+    """
+    Writes frames to a cv2.VideoWriter in its own thread, so encoding overlaps
+    compositing. Frames must not be modified after write(). A failed write is
+    raised by the next write() or by close().
+    """
+    
+    def __init__(self, out, depth=PREFETCH_DEPTH):
+        self.out = out
+        self.queue = queue.Queue(maxsize=depth)
+        self.error = None
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+    
+    def _run(self):
+        while True:
+            frame = self.queue.get()
+            if frame is None:
+                return
+            if self.error is None:
+                try:
+                    self.out.write(frame)
+                except Exception as e:
+                    self.error = e
+    
+    def write(self, frame):
+        if self.error is not None:
+            raise self.error
+        self.queue.put(frame)
+    
+    def close(self):
+        """Wait until every queued frame is written (the VideoWriter is released by its owner)."""
+        if not self.closed:
+            self.closed = True
+            self.queue.put(None)
+            self.thread.join()
+        if self.error is not None:
+            raise self.error
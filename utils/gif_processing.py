@@ -1,14 +1,180 @@
 import cv2
 import numpy as np
-from PIL import Image
+from PIL import Image, GifImagePlugin
 import os
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from .canvas import DEFAULT_CANVAS
+from .cancellation import get_cancel_token
+from .progress_events import get_progress_bus
+from .timing import FRAME_STAGE, span
 
 def is_gif_file(file_path):
     """Check if file is a GIF."""
     return file_path.lower().endswith('.gif')
 
-def extract_gif_frames(gif_path):
-    """Extract frames from GIF file with improved frame synchronization."""
+# Frame duration used when a GIF frame has no graphic control extension (ms)
+DEFAULT_GIF_DURATION = 100
+
+def _skip_gif_sub_blocks(f):
+    """Skip a chain of GIF data sub-blocks (up to and including the terminator)."""
+    while True:
+        length = f.read(1)
+        if not length or length[0] == 0:
+            return
+        f.seek(length[0], 1)
+
+def read_gif_summary(gif_path):
+    """
+    Frame count, size and frame durations of a GIF from its block headers
+    (image data is skipped, not decoded). Returns (size, durations) with
+    durations in ms (minimum MIN_GIF_DURATION, as used for decoding).
+    """
+    with open(gif_path, 'rb') as f:
+        header = f.read(13)
+        if len(header) < 13 or header[:3] != b'GIF':
+            raise ValueError(f"Not a GIF file: {gif_path}")
+        size = (int.from_bytes(header[6:8], 'little'), int.from_bytes(header[8:10], 'little'))
+        if header[10] & 0x80:
+            # Global color table
+            f.seek(3 << ((header[10] & 0x07) + 1), 1)
+        
+        durations = []
+        delay = None
+        while True:
+            introducer = f.read(1)
+            if not introducer or introducer == b';':
+                break
+            if introducer == b'!':
+                label = f.read(1)
+                if label == b'\xf9':
+                    # Graphic control extension: delay of the next image (1/100 s)
+                    length = f.read(1)
+                    block = f.read(length[0]) if length else b''
+                    if len(block) >= 3:
+                        delay = int.from_bytes(block[1:3], 'little') * 10
+                _skip_gif_sub_blocks(f)
+            elif introducer == b',':
+                descriptor = f.read(9)
+                if len(descriptor) < 9:
+                    break
+                if descriptor[8] & 0x80:
+                    # Local color table
+                    f.seek(3 << ((descriptor[8] & 0x07) + 1), 1)
+                f.read(1)  # LZW minimum code size
+                _skip_gif_sub_blocks(f)
+                durations.append(max(MIN_GIF_DURATION, DEFAULT_GIF_DURATION if delay is None else delay))
+                delay = None
+            else:
+                break  # Corrupt or truncated: count the images read so far
+    
+    return size, durations
+
+class GifFrameReader:
+    """
+    Single-pass streaming GIF decoder. Iterating yields (frame, duration_ms)
+    as the GIF is decoded, with transparent pixels on white and frames in BGR,
+    optionally resized to size (width, height). Frames are written into
+    buffers reused for the whole GIF: a frame is valid until the next one is
+    read, copy it to keep it. len() and durations come from the block headers
+    (no decoding), so they are available before the first frame.
+    """
+    
+    def __init__(self, gif_path, size=None):
+        self.gif_path = gif_path
+        self.size = tuple(size) if size else None
+        self._summary = None
+        self._buffer = None    # Composited frame (GIF size)
+        self._resized = None   # Composited frame resized to self.size
+    
+    def _get_summary(self):
+        if self._summary is None:
+            self._summary = read_gif_summary(self.gif_path)
+        return self._summary
+    
+    def __len__(self):
+        return len(self._get_summary()[1])
+    
+    @property
+    def gif_size(self):
+        return self._get_summary()[0]
+    
+    @property
+    def durations(self):
+        """Frame durations in ms from the headers."""
+        return list(self._get_summary()[1])
+    
+    @property
+    def total_duration(self):
+        """Length of one loop of the GIF in ms."""
+        return sum(self._get_summary()[1])
+    
+    def _composite(self, gif):
+        """Current PIL frame on white, in BGR, into the reused buffers."""
+        if gif.mode not in ('RGB', 'RGBA'):
+            frame = gif.convert('RGBA' if 'transparency' in gif.info else 'RGB')
+        else:
+            frame = gif
+        pixels = np.asarray(frame)
+        
+        height, width = pixels.shape[:2]
+        if self._buffer is None or self._buffer.shape[:2] != (height, width):
+            self._buffer = np.empty((height, width, 3), dtype=np.uint8)
+        
+        if frame.mode == 'RGBA':
+            cv2.cvtColor(pixels, cv2.COLOR_RGBA2BGR, dst=self._buffer)
+            # GIF transparency is all or nothing: transparent pixels show the white background
+            self._buffer[pixels[:, :, 3] == 0] = 255
+        else:
+            cv2.cvtColor(pixels, cv2.COLOR_RGB2BGR, dst=self._buffer)
+        
+        if self.size is None or self.size == (width, height):
+            return self._buffer
+        if self._resized is None:
+            self._resized = np.empty((self.size[1], self.size[0], 3), dtype=np.uint8)
+        cv2.resize(self._buffer, self.size, dst=self._resized)
+        return self._resized
+    
+    def __iter__(self):
+        with Image.open(self.gif_path) as gif:
+            frame_num = 0
+            while True:
+                try:
+                    # Sequential seek: continues from the previous frame (one pass)
+                    gif.seek(frame_num)
+                except EOFError:
+                    return
+                except Exception as e:
+                    # Later frames build on this one, none of them can be decoded
+                    print(f"❌ Error extracting frame {frame_num}: {e}")
+                    return
+                
+                duration = gif.info.get('duration', DEFAULT_GIF_DURATION)
+                yield self._composite(gif), max(MIN_GIF_DURATION, duration)
+                frame_num += 1
+
+def _timed_frames(reader):
+    """Iterate reader with the decode of every frame timed as the "decode" stage."""
+    frames = iter(reader)
+    while True:
+        with span("decode"):
+            item = next(frames, None)
+        if item is None:
+            return
+        yield item
+
+def get_gif_first_frame(gif_path, size=None):
+    """First frame of a GIF (BGR, on white), None if it cannot be decoded."""
+    try:
+        for frame, _ in GifFrameReader(gif_path, size):
+            return frame.copy()
+    except Exception as e:
+        print(f"❌ Error reading GIF: {e}")
+    return None
+
+def extract_gif_frames(gif_path, size=None):
+    """Extract all frames (BGR, optionally resized to size) and durations of a GIF."""
     try:
         print(f"🔍 Opening GIF: {gif_path}")
         
@@ -25,70 +191,23 @@ def extract_gif_frames(gif_path):
             print("❌ GIF file is empty")
             return [], []
         
-        gif = Image.open(gif_path)
+        reader = GifFrameReader(gif_path, size)
+        frame_count = len(reader)
+        print(f"📊 GIF has {frame_count} frames")
         
         frames = []
         durations = []
+        for frame, duration in reader:
+            get_cancel_token().check()
+            frames.append(frame.copy())
+            durations.append(duration)
+            
+            if len(frames) % 10 == 0:
+                print(f"📊 Extracted {len(frames)}/{frame_count} frames")
         
-        # Get total number of frames more reliably
-        frame_count = 0
-        try:
-            while True:
-                gif.seek(frame_count)
-                frame_count += 1
-        except EOFError:
-            pass
-        
-        print(f"📊 GIF has {frame_count} frames")
-        
-        if frame_count == 0:
-            print("❌ No frames found in GIF")
-            return [], []
-        
-        # Extract all frames with better error handling
-        successful_frames = 0
-        for frame_num in range(frame_count):
-            try:
-                gif.seek(frame_num)
-                
-                # Get frame info
-                frame_info = gif.info
-                duration = frame_info.get('duration', 100)  # Default 100ms
-                
-                # Convert to RGBA first to handle transparency properly
-                if gif.mode != 'RGBA':
-                    frame = gif.convert('RGBA')
-                else:
-                    frame = gif.copy()
-                
-                # Create white background for transparency
-                background = Image.new('RGB', frame.size, (255, 255, 255))
-                
-                # Paste frame onto background using alpha channel
-                if frame.mode == 'RGBA':
-                    background.paste(frame, mask=frame.split()[-1])
-                else:
-                    background.paste(frame)
-                
-                # Convert PIL to OpenCV format (RGB to BGR)
-                frame_array = np.array(background)
-                frame_cv = cv2.cvtColor(frame_array, cv2.COLOR_RGB2BGR)
-                
-                frames.append(frame_cv)
-                durations.append(max(50, duration))  # Minimum 50ms per frame
-                successful_frames += 1
-                
-                if (frame_num + 1) % 10 == 0:
-                    print(f"📊 Extracted {frame_num + 1}/{frame_count} frames")
-                    
-            except Exception as e:
-                print(f"❌ Error extracting frame {frame_num}: {e}")
-                # Skip this frame and continue
-                continue
-        
-        print(f"✅ Successfully extracted {successful_frames}/{frame_count} frames from GIF")
+        print(f"✅ Successfully extracted {len(frames)}/{frame_count} frames from GIF")
         
-        if successful_frames == 0:
+        if not frames:
             print("❌ No frames could be extracted")
             return [], []
         
@@ -100,131 +219,435 @@ def extract_gif_frames(gif_path):
         traceback.print_exc()
         return [], []
 
-def create_gif_from_frames(frames, output_path, durations=None, fps=10):
-    """Create animated GIF from frames with proper frame timing."""
-    try:
-        if not frames:
-            print("❌ No frames to create GIF")
-            return False
+# Frame duration limits of GIF output (milliseconds)
+MIN_GIF_DURATION = 50
+MAX_GIF_DURATION = 1000
+
+# Output GIF encoders: built-in shared palette with delta frames, or ffmpeg palettegen/paletteuse
+GIF_ENCODERS = ("palette", "ffmpeg")
+
+# Colors of the shared palette; the last index marks unchanged pixels of delta frames
+GIF_PALETTE_COLORS = 255
+TRANSPARENT_INDEX = 255
+
+# Frames buffered at the start of a stream to build the shared palette from
+PALETTE_SAMPLE_FRAMES = 8
+
+# Pixels per frame sampled for the palette
+PALETTE_SAMPLE_PIXELS = 32768
+
+# Mean error (per channel) of a frame on the palette above which the frame gets a new palette
+PALETTE_DRIFT_ERROR = 8
+
+# Frames with at least this many pixels are mapped in row bands on several threads
+PARALLEL_MAP_PIXELS = 512 * 1024
+
+_map_executor = None
+
+def _get_map_executor():
+    global _map_executor
+    if _map_executor is None:
+        _map_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1)
+    return _map_executor
+
+def get_gif_output_size(width, height, max_dimension):
+    """Output size: frames larger than max_dimension are scaled down keeping the aspect ratio."""
+    if width <= max_dimension and height <= max_dimension:
+        return width, height
+    if width > height:
+        return max_dimension, int(height * (max_dimension / width))
+    return int(width * (max_dimension / height)), max_dimension
+
+class GifPalette:
+    """
+    One palette for every frame of a GIF, with a 15-bit lookup table (5 bits
+    per channel -> nearest palette color), so mapping a frame to the palette
+    is a vectorized table lookup instead of a quantization per frame.
+    """
+    
+    def __init__(self, colors):
+        self.colors = colors  # (n, 3) uint8 BGR, n <= GIF_PALETTE_COLORS
         
-        print(f"🎬 Creating animated GIF with {len(frames)} frames")
+        # Nearest color for the center of every 15-bit cell (index = b << 10 | g << 5 | r)
+        levels = np.arange(32, dtype=np.float32) * 8 + 4
+        cells = np.stack(np.meshgrid(levels, levels, levels, indexing='ij'), axis=-1).reshape(-1, 3)
+        palette = colors.astype(np.float32)
+        distances = (palette * palette).sum(axis=1) - 2 * cells @ palette.T  # |cell|^2 is the same for all colors
+        self.lut = distances.argmin(axis=1).astype(np.uint8)
+    
+    @classmethod
+    def from_frames(cls, frames, colors=GIF_PALETTE_COLORS):
+        """Median cut palette of pixels sampled from BGR frames."""
+        samples = []
+        for frame in frames:
+            pixels = frame.reshape(-1, 3)
+            samples.append(pixels[::max(1, len(pixels) // PALETTE_SAMPLE_PIXELS)])
+        samples = np.concatenate(samples)
         
-        # Convert OpenCV frames to PIL
-        pil_frames = []
-        for i, frame in enumerate(frames):
-            try:
-                # Convert BGR to RGB
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                pil_frame = Image.fromarray(frame_rgb)
-                
-                # Resize if frame is too large (for reasonable file size)
-                width, height = pil_frame.size
-                max_dimension = 1080
-                
-                if width > max_dimension or height > max_dimension:
-                    # Calculate new dimensions maintaining aspect ratio
-                    if width > height:
-                        new_width = max_dimension
-                        new_height = int(height * (max_dimension / width))
-                    else:
-                        new_height = max_dimension
-                        new_width = int(width * (max_dimension / height))
-                    
-                    pil_frame = pil_frame.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                    print(f"📏 Resized frame {i+1}: {width}x{height} -> {new_width}x{new_height}")
-                
-                # Optimize for GIF (reduce colors)
-                pil_frame = pil_frame.convert('P', palette=Image.ADAPTIVE, colors=256)
-                pil_frames.append(pil_frame)
-                
-                if (i + 1) % 20 == 0:
-                    print(f"📊 Converted {i + 1}/{len(frames)} frames")
-                    
-            except Exception as e:
-                print(f"❌ Error converting frame {i}: {e}")
-                continue
+        sample_image = Image.fromarray(np.ascontiguousarray(samples[:, None, ::-1]))
+        quantized = sample_image.quantize(colors=colors, method=Image.Quantize.MEDIANCUT)
         
-        if not pil_frames:
-            print("❌ No frames could be converted")
-            return False
+        # Only the entries in use (the rest of the PIL palette is padding)
+        used = np.unique(np.asarray(quantized))
+        rgb = np.array(quantized.getpalette()[:256 * 3], dtype=np.uint8).reshape(-1, 3)
+        return cls(np.ascontiguousarray(rgb[used][:, ::-1]))
+    
+    def get_color_table(self):
+        """GIF color table (256 RGB entries)."""
+        table = np.zeros((256, 3), dtype=np.uint8)
+        table[:len(self.colors)] = self.colors[:, ::-1]
+        return table.tobytes()
+    
+    def _map_rows(self, frame, out=None):
+        quantized = frame >> 3
+        key = quantized[:, :, 0].astype(np.uint16) << 10
+        key |= quantized[:, :, 1].astype(np.uint16) << 5
+        key |= quantized[:, :, 2]
+        return np.take(self.lut, key, out=out)
+    
+    def get_error(self, frame):
+        """Mean color error (per channel) of a frame mapped to the palette, from sampled pixels."""
+        pixels = frame.reshape(-1, 3)
+        pixels = pixels[::max(1, len(pixels) // 4096)]
+        mapped = self.colors[self._map_rows(pixels[None])[0]]
+        return cv2.absdiff(mapped, pixels).mean()
+    
+    def map(self, frame):
+        """Palette indices (height x width, uint8) of a BGR frame."""
+        height, width = frame.shape[:2]
+        workers = os.cpu_count() or 1
+        if workers == 1 or height * width < PARALLEL_MAP_PIXELS:
+            return self._map_rows(frame)
+        
+        # NumPy releases the GIL, row bands are mapped in parallel
+        indices = np.empty((height, width), dtype=np.uint8)
+        bounds = np.linspace(0, height, workers + 1).astype(int)
+        bands = [(start, stop) for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+        list(_get_map_executor().map(
+            lambda band: self._map_rows(frame[band[0]:band[1]], indices[band[0]:band[1]]), bands
+        ))
+        return indices
+
+class GifStreamWriter:
+    """
+    Animated GIF writer that encodes every frame as soon as it is produced
+    (header, one image block per frame, trailer), so memory holds a few
+    frames however long the GIF is. All frames share one global palette,
+    built from palette_frames or else from the first PALETTE_SAMPLE_FRAMES
+    frames (buffered until then); a frame whose colors are far from it
+    (PALETTE_DRIFT_ERROR) switches to a palette of its own, written as local
+    color table. After the first frame only the rectangle that changed is
+    written, with its unchanged pixels transparent; a frame identical to the
+    previous one extends the previous frame's duration.
+    """
+    
+    def __init__(self, output_path, max_dimension=1080, loop=0, palette_frames=None):
+        self.output_path = output_path
+        self.max_dimension = max_dimension
+        self.loop = loop
+        self.file = None
+        self.size = None
+        self.frame_count = 0
+        self.duration_range = None
+        
+        self.palette = GifPalette.from_frames(palette_frames) if palette_frames else None
+        self.local_palette = None  # Palette replacing the global one after a color change
+        self.sample_frames = []  # (frame, duration) waiting for the palette
+        self.previous = None     # Palette indices of the last frame
+        self.pending = None      # Last encoded frame, written once its duration is final
+    
+    def _resize(self, frame):
+        """Frame at output size (the first frame sets the size)."""
+        height, width = frame.shape[:2]
+        if self.size is None:
+            self.size = get_gif_output_size(width, height, self.max_dimension)
+            if self.size != (width, height):
+                print(f"📏 Resizing GIF frames: {width}x{height} -> {self.size[0]}x{self.size[1]}")
+        if (width, height) != self.size:
+            return cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        return frame
+    
+    def _add_duration(self, duration):
+        """Clamp a frame duration (ms) and count the frame."""
+        duration = int(max(MIN_GIF_DURATION, min(MAX_GIF_DURATION, duration)))
+        self.frame_count += 1
+        low, high = self.duration_range or (duration, duration)
+        self.duration_range = (min(low, duration), max(high, duration))
+        return duration
+    
+    def write(self, frame, duration=100):
+        """Map and write one frame (duration in ms)."""
+        duration = self._add_duration(duration)
+        resized = self._resize(frame)
         
-        # Handle durations
-        if durations is None or len(durations) != len(pil_frames):
-            print(f"⚠️ Duration mismatch or missing, using default timing")
-            duration_ms = int(1000 / fps)  # Convert fps to milliseconds
-            durations = [duration_ms] * len(pil_frames)
+        if self.palette is None:
+            # Callers may reuse their frame buffer
+            self.sample_frames.append((resized.copy() if resized is frame else resized, duration))
+            if len(self.sample_frames) >= PALETTE_SAMPLE_FRAMES:
+                self._build_palette()
+            return
+        
+        self._encode(resized, duration)
+    
+    def _build_palette(self):
+        """Palette from the buffered frames, then encode them."""
+        self.palette = GifPalette.from_frames([frame for frame, _ in self.sample_frames])
+        sample_frames, self.sample_frames = self.sample_frames, []
+        for frame, duration in sample_frames:
+            self._encode(frame, duration)
+    
+    def _open(self):
+        os.makedirs(os.path.dirname(self.output_path) or ".", exist_ok=True)
+        get_cancel_token().track(self.output_path)
+        self.file = open(self.output_path, 'wb')
+        
+        width, height = self.size
+        # Logical screen with a global color table of 256 entries
+        self.file.write(b"GIF89a" + width.to_bytes(2, 'little') + height.to_bytes(2, 'little') + b"\xf7\x00\x00")
+        self.file.write(self.palette.get_color_table())
+        if self.loop is not None:
+            self.file.write(b"!\xff\x0bNETSCAPE2.0\x03\x01" + self.loop.to_bytes(2, 'little') + b"\x00")
+    
+    def _encode(self, frame, duration):
+        palette = self.local_palette or self.palette
+        if self.previous is not None and palette.get_error(frame) > PALETTE_DRIFT_ERROR:
+            # Colors changed: new palette, full frame (indices of different palettes cannot be compared)
+            palette = self.local_palette = GifPalette.from_frames([frame])
+            self.previous = None
+        indices = palette.map(frame)
+        
+        if self.previous is None:
+            block = [indices, (0, 0), False]
         else:
-            # Ensure durations match frame count
-            durations = durations[:len(pil_frames)]
-            while len(durations) < len(pil_frames):
-                durations.append(100)  # Default 100ms
-        
-        # Clamp durations to reasonable range
-        durations = [max(50, min(1000, d)) for d in durations]
-        
-        print(f"💾 Saving animated GIF to: {output_path}")
-        print(f"⏱️ Frame count: {len(pil_frames)}")
-        print(f"⏱️ Duration range: {min(durations)}ms - {max(durations)}ms")
-        
-        # Create output directory if needed
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        
-        # Save as animated GIF
-        pil_frames[0].save(
-            output_path,
-            save_all=True,
-            append_images=pil_frames[1:],
-            duration=durations,
-            loop=0,  # Infinite loop
-            optimize=True,
-            disposal=2  # Clear frame before next
-        )
-        
-        # Verify the created file
-        if os.path.exists(output_path):
-            file_size = os.path.getsize(output_path) / (1024 * 1024)  # MB
-            print(f"✅ Animated GIF created successfully!")
-            print(f"📁 Output: {output_path}")
-            print(f"📊 Size: {file_size:.2f} MB")
+            changed = indices != self.previous
+            rows = np.flatnonzero(changed.any(axis=1))
+            if rows.size == 0:
+                # Same picture: show the previous frame longer
+                self.pending[4] += duration
+                return
             
-            # Test if it's actually animated
-            try:
-                test_gif = Image.open(output_path)
-                if hasattr(test_gif, 'is_animated') and test_gif.is_animated:
-                    print(f"🎬 Animation verified: {test_gif.n_frames} frames")
-                    return True
-                elif hasattr(test_gif, 'n_frames') and test_gif.n_frames > 1:
-                    print(f"🎬 Multi-frame GIF: {test_gif.n_frames} frames")
-                    return True
-                else:
-                    print("⚠️ Created GIF appears to be static")
-                    return True  # Still consider it successful
-                test_gif.close()
-            except Exception as e:
-                print(f"⚠️ Could not verify GIF: {e}")
-                return True  # File exists, assume success
-        else:
-            print("❌ GIF file was not created")
-            return False
+            top, bottom = rows[0], rows[-1] + 1
+            changed = changed[top:bottom]
+            columns = np.flatnonzero(changed.any(axis=0))
+            left, right = columns[0], columns[-1] + 1
             
+            delta = indices[top:bottom, left:right].copy()
+            delta[~changed[:, left:right]] = TRANSPARENT_INDEX
+            block = [delta, (int(left), int(top)), True]
+        
+        self._flush()
+        self.pending = block + [self.local_palette, duration]
+        self.previous = indices
+    
+    def _flush(self):
+        """Write the pending frame (frames stay on screen: disposal 1)."""
+        if self.pending is None:
+            return
+        if self.file is None:
+            self._open()
+        
+        indices, offset, transparent, local_palette, duration = self.pending
+        self.pending = None
+        height, width = indices.shape
+        image = Image.frombytes('P', (width, height), np.ascontiguousarray(indices).tobytes())
+        params = {'duration': duration, 'disposal': 1, 'include_color_table': local_palette is not None}
+        if local_palette is not None:
+            image.putpalette(local_palette.get_color_table())
+        if transparent:
+            params['transparency'] = TRANSPARENT_INDEX
+        for block in GifImagePlugin.getdata(image, offset=offset, **params):
+            self.file.write(block)
+    
+    def close(self):
+        """Write the trailer and close the file. Returns True if any frame was written."""
+        if self.palette is None and self.sample_frames:
+            self._build_palette()
+        self._flush()
+        
+        if self.file is None:
+            print("❌ No frames to create GIF")
+            return False
+        
+        self.file.write(b";")
+        self.file.close()
+        self.file = None
+        get_cancel_token().release(self.output_path)
+        self._report()
+        return True
+    
+    def _report(self):
+        file_size = os.path.getsize(self.output_path) / (1024 * 1024)  # MB
+        print(f"✅ Animated GIF created successfully!")
+        print(f"📁 Output: {self.output_path}")
+        print(f"⏱️ Frame count: {self.frame_count}, duration range: {self.duration_range[0]}ms - {self.duration_range[1]}ms")
+        print(f"📊 Size: {file_size:.2f} MB")
+    
+    def abort(self):
+        """Close and delete an unfinished file."""
+        self.sample_frames = []
+        self.pending = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            if os.path.exists(self.output_path):
+                os.remove(self.output_path)
+            get_cancel_token().release(self.output_path)
+
+class FfmpegGifWriter(GifStreamWriter):
+    """
+    GIF writer on ffmpeg palettegen/paletteuse (global palette from the frame
+    statistics, ordered dithering, changed rectangles only): smoother
+    gradients than the built-in encoder, but slower. Frames are piped raw at a constant
+    rate set by the first frame's duration; frames with other durations are
+    repeated or dropped to keep the timing. ffmpeg keeps every frame until
+    the palette is known, so memory grows with the GIF length.
+    """
+    
+    def __init__(self, output_path, max_dimension=1080, loop=0):
+        super().__init__(output_path, max_dimension, loop)
+        self.process = None
+        self.error_log = None
+        self.frame_duration = None  # ms per piped frame
+        self.elapsed = 0            # ms of input written
+        self.frames_piped = 0
+    
+    def _open_process(self, duration):
+        from .file_operations import get_ffmpeg_binary
+        
+        os.makedirs(os.path.dirname(self.output_path) or ".", exist_ok=True)
+        self.frame_duration = duration
+        width, height = self.size
+        cmd = [
+            get_ffmpeg_binary(), '-y', '-hide_banner', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-s', f"{width}x{height}",
+            '-framerate', f"1000/{duration}", '-i', 'pipe:0',
+            '-filter_complex', "split[a][b];[a]palettegen=stats_mode=diff[p];"
+                               "[b][p]paletteuse=dither=bayer:bayer_scale=5:diff_mode=rectangle",
+            '-loop', str(self.loop), self.output_path
+        ]
+        
+        cancel_token = get_cancel_token()
+        cancel_token.check()
+        cancel_token.track(self.output_path)
+        self.error_log = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                                        stderr=self.error_log)
+        cancel_token.register_process(self.process)
+    
+    def write(self, frame, duration=100):
+        """Pipe one frame to ffmpeg (duration in ms)."""
+        duration = self._add_duration(duration)
+        frame = self._resize(frame)
+        if self.process is None:
+            self._open_process(duration)
+        
+        # Piped frames so far must cover the input timeline
+        self.elapsed += duration
+        repeats = int(round(self.elapsed / self.frame_duration)) - self.frames_piped
+        data = np.ascontiguousarray(frame).data
+        try:
+            for _ in range(repeats):
+                self.process.stdin.write(data)
+        except BrokenPipeError:
+            self._finish()  # ffmpeg exited early: raises its error
+        self.frames_piped += repeats
+    
+    def _finish(self):
+        """Close stdin, wait for ffmpeg and raise its error if it failed."""
+        try:
+            self.process.stdin.close()
+        except BrokenPipeError:
+            pass
+        self.process.wait()
+        get_cancel_token().unregister_process(self.process)
+        
+        # A cancelled encoder is killed, that is not an encode error
+        get_cancel_token().check()
+        
+        if self.process.returncode != 0:
+            self.error_log.seek(0)
+            message = self.error_log.read().decode('utf-8', errors='replace').strip()
+            raise RuntimeError(f"ffmpeg GIF encode failed: {message}")
+    
+    def close(self):
+        """Finish the GIF. Returns True if any frame was written."""
+        if self.process is None:
+            print("❌ No frames to create GIF")
+            return False
+        
+        self._finish()
+        self.process = None
+        self.error_log.close()
+        get_cancel_token().release(self.output_path)
+        self._report()
+        return True
+    
+    def abort(self):
+        """Stop ffmpeg and delete an unfinished file."""
+        if self.process is not None:
+            if self.process.poll() is None:
+                self.process.kill()
+            self.process.wait()
+            get_cancel_token().unregister_process(self.process)
+            self.process = None
+            self.error_log.close()
+            if os.path.exists(self.output_path):
+                os.remove(self.output_path)
+            get_cancel_token().release(self.output_path)
+
+def open_gif_writer(output_path, max_dimension=1080, encoder="palette", palette_frames=None):
+    """GIF writer for an encoder of GIF_ENCODERS."""
+    if encoder == "ffmpeg":
+        return FfmpegGifWriter(output_path, max_dimension)
+    if encoder != "palette":
+        raise ValueError(f"Unknown GIF encoder: {encoder} (expected one of {', '.join(GIF_ENCODERS)})")
+    return GifStreamWriter(output_path, max_dimension, palette_frames=palette_frames)
+
+def create_gif_from_frames(frames, output_path, durations=None, fps=10, max_dimension=1080, encoder="palette"):
+    """Create animated GIF from frames with proper frame timing (encoder: one of GIF_ENCODERS)."""
+    if not frames:
+        print("❌ No frames to create GIF")
+        return False
+    
+    # Handle durations
+    if durations is None or len(durations) != len(frames):
+        print(f"⚠️ Duration mismatch or missing, using default timing")
+        durations = [int(1000 / fps)] * len(frames)  # Convert fps to milliseconds
+    
+    print(f"🎬 Creating animated GIF with {len(frames)} frames")
+    print(f"💾 Saving animated GIF to: {output_path}")
+    
+    # All frames are known: the shared palette samples the whole GIF
+    step = max(1, len(frames) // PALETTE_SAMPLE_FRAMES)
+    writer = open_gif_writer(output_path, max_dimension, encoder, palette_frames=frames[::step])
+    try:
+        for frame, duration in zip(frames, durations):
+            get_cancel_token().check()
+            writer.write(frame, duration)
+        return writer.close()
     except Exception as e:
         print(f"❌ Error creating animated GIF: {e}")
         import traceback
         traceback.print_exc()
         return False
+    finally:
+        writer.abort()
 
-def process_video_with_gif_template(gif_template_path, video_path, output_path, text_settings):
+def process_video_with_gif_template(gif_template_path, video_path, output_path, text_settings, canvas=None):
     """Process video with animated GIF template - OUTPUT MP4 (not GIF)."""
     from .video_processing import process_frame_with_green_screen
     from .green_screen_detection import create_green_screen_mask
+    from .video_processor_core import VideoProcessorCore
+    
+    canvas = canvas or DEFAULT_CANVAS
     
     print(f"🎬 Processing video with animated GIF template -> MP4 output")
     print(f"   GIF Template: {os.path.basename(gif_template_path)}")
     print(f"   Video: {os.path.basename(video_path)}")
     print(f"   Output: {os.path.basename(output_path)} (MP4)")
     
-    # Extract GIF frames
-    gif_frames, gif_durations = extract_gif_frames(gif_template_path)
+    # Extract GIF frames (at canvas size, they are reused for every loop)
+    gif_frames, gif_durations = extract_gif_frames(gif_template_path, size=canvas.size)
     if not gif_frames:
         print("❌ Could not extract GIF template frames")
         return False
@@ -251,7 +674,7 @@ def process_video_with_gif_template(gif_template_path, video_path, output_path,
     
     # Setup MP4 output writer
     fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    out = cv2.VideoWriter(output_path, fourcc, fps, (1080, 1920))
+    out = cv2.VideoWriter(output_path, fourcc, fps, canvas.size)
     
     if not out.isOpened():
         print("❌ Could not create MP4 output file")
@@ -264,7 +687,9 @@ def process_video_with_gif_template(gif_template_path, video_path, output_path,
     
     try:
         while True:
-            ret, video_frame = cap.read()
+            get_cancel_token().check()
+            with span("decode"):
+                ret, video_frame = cap.read()
             if not ret:
                 break
             
@@ -272,26 +697,26 @@ def process_video_with_gif_template(gif_template_path, video_path, output_path,
             gif_frame_index = frame_index % gif_frame_count
             current_gif_frame = gif_frames[gif_frame_index]
             
-            # Resize GIF frame to match output dimensions
-            current_gif_frame = cv2.resize(current_gif_frame, (1080, 1920))
-            
-            # Process frame with green screen
-            processed_frame = process_frame_with_green_screen(current_gif_frame, video_frame, template_mask)
-            
-            # Add text overlay if enabled
-            if text_settings and text_settings['enabled']:
-                from .video_processor import VideoProcessor
-                processor = VideoProcessor(None)
-                video_name = os.path.basename(video_path)
-                processed_frame = processor.add_text_overlay(processed_frame, video_name, text_settings)
-            
-            # Ensure frame is correct size
-            if processed_frame.shape[:2] != (1920, 1080):
-                processed_frame = cv2.resize(processed_frame, (1080, 1920))
+            with span(FRAME_STAGE):
+                # Process frame with green screen
+                processed_frame = process_frame_with_green_screen(current_gif_frame, video_frame, template_mask)
+                
+                # Add text overlay if enabled
+                if text_settings and text_settings['enabled']:
+                    video_name = os.path.basename(video_path)
+                    with span("text"):
+                        processed_frame = VideoProcessorCore().add_text_overlay(processed_frame, video_name, text_settings, canvas)
+                
+                # Ensure frame is correct size
+                if processed_frame.shape[:2] != canvas.shape:
+                    with span("resize"):
+                        processed_frame = cv2.resize(processed_frame, canvas.size)
             
             # Write to MP4
-            out.write(processed_frame)
+            with span("write"):
+                out.write(processed_frame)
             frame_index += 1
+            get_progress_bus().frames(frame_index, total_video_frames)
             
             if frame_index % 30 == 0:
                 print(f"📊 Processed {frame_index}/{total_video_frames} frames (GIF frame: {gif_frame_index + 1}/{gif_frame_count})")
@@ -316,52 +741,69 @@ def process_video_with_gif_template(gif_template_path, video_path, output_path,
         print(f"❌ MP4 output file creation failed")
         return False
 
-def process_gif_greenscreen(gif_path, template, template_mask, output_path, text_settings):
+def process_gif_greenscreen(gif_path, template, template_mask, output_path, text_settings, canvas=None, gif_encoder="palette"):
     """Process GIF with green screen mode (legacy function for GIF input)."""
     from .video_processing import process_frame_with_green_screen
+    from .video_processor_core import VideoProcessorCore
+    
+    canvas = canvas or DEFAULT_CANVAS
     
     print(f"🎬 Starting GIF greenscreen processing: {os.path.basename(gif_path)}")
     
-    frames, durations = extract_gif_frames(gif_path)
-    if not frames:
+    # Frames are processed as they are decoded
+    reader = GifFrameReader(gif_path)
+    try:
+        frame_count = len(reader)
+    except Exception as e:
+        print(f"❌ Could not read GIF: {e}")
+        return False
+    if frame_count == 0:
         print("❌ No frames extracted from GIF")
         return False
     
-    processed_frames = []
     gif_name = os.path.basename(gif_path)
+    writer = open_gif_writer(output_path, max_dimension=canvas.scaled(1080), encoder=gif_encoder)
     
-    print(f"🔄 Processing {len(frames)} frames with greenscreen...")
+    print(f"🔄 Processing {frame_count} frames with greenscreen...")
     
-    for i, frame in enumerate(frames):
-        try:
-            # Process frame with green screen
-            processed_frame = process_frame_with_green_screen(template, frame, template_mask)
-            
-            # Add text overlay if enabled
-            if text_settings and text_settings['enabled']:
-                from .video_processor import VideoProcessor
-                processor = VideoProcessor(None)
-                processed_frame = processor.add_text_overlay(processed_frame, gif_name, text_settings)
-            
-            # Ensure frame is correct size (9:16 aspect ratio)
-            if processed_frame.shape[:2] != (1920, 1080):
-                processed_frame = cv2.resize(processed_frame, (1080, 1920))
+    try:
+        for i, (frame, duration) in enumerate(_timed_frames(reader)):
+            get_cancel_token().check()
+            with span(FRAME_STAGE):
+                try:
+                    # Process frame with green screen
+                    processed_frame = process_frame_with_green_screen(template, frame, template_mask)
+                    
+                    # Add text overlay if enabled
+                    if text_settings and text_settings['enabled']:
+                        with span("text"):
+                            processed_frame = VideoProcessorCore().add_text_overlay(processed_frame, gif_name, text_settings, canvas)
+                    
+                    # Ensure frame is correct size (9:16 aspect ratio)
+                    if processed_frame.shape[:2] != canvas.shape:
+                        with span("resize"):
+                            processed_frame = cv2.resize(processed_frame, canvas.size)
+                    
+                except Exception as e:
+                    print(f"❌ Error processing frame {i}: {e}")
+                    # Use resized original frame as fallback
+                    processed_frame = cv2.resize(frame, canvas.size)
             
-            processed_frames.append(processed_frame)
+            # Quantize and append to the output GIF right away (original timing)
+            with span("write"):
+                writer.write(processed_frame, duration)
+            get_progress_bus().frames(i + 1, frame_count)
             
             if (i + 1) % 10 == 0:
-                print(f"📊 Processed {i + 1}/{len(frames)} frames")
-                
-        except Exception as e:
-            print(f"❌ Error processing frame {i}: {e}")
-            # Use resized original frame as fallback
-            fallback_frame = cv2.resize(frame, (1080, 1920))
-            processed_frames.append(fallback_frame)
-    
-    print(f"✅ Processed {len(processed_frames)} frames total")
-    
-    # Create output GIF with original timing
-    success = create_gif_from_frames(processed_frames, output_path, durations)
+                print(f"📊 Processed {i + 1}/{frame_count} frames")
+        
+        print(f"✅ Processed {writer.frame_count} frames total")
+        success = writer.close()
+    except Exception as e:
+        print(f"❌ Error creating animated GIF: {e}")
+        success = False
+    finally:
+        writer.abort()
     
     if success:
         print(f"✅ GIF greenscreen processing completed: {gif_name}")
@@ -370,60 +812,77 @@ def process_gif_greenscreen(gif_path, template, template_mask, output_path, text
     
     return success
 
-def process_gif_blur(gif_path, output_path, blur_settings, text_settings=None):
+def process_gif_blur(gif_path, output_path, blur_settings, text_settings=None, canvas=None, gif_encoder="palette"):
     """Process GIF with blur background mode."""
     from .blur_processing import process_blur_frame
+    from .video_processor_core import VideoProcessorCore
+    
+    canvas = canvas or DEFAULT_CANVAS
     
     print(f"🌀 Starting GIF blur processing: {os.path.basename(gif_path)}")
     
-    frames, durations = extract_gif_frames(gif_path)
-    if not frames:
+    # Frames are processed as they are decoded
+    reader = GifFrameReader(gif_path)
+    try:
+        frame_count = len(reader)
+    except Exception as e:
+        print(f"❌ Could not read GIF: {e}")
+        return False
+    if frame_count == 0:
         print("❌ No frames extracted from GIF")
         return False
     
-    processed_frames = []
     gif_name = os.path.basename(gif_path)
+    writer = open_gif_writer(output_path, max_dimension=canvas.scaled(1080), encoder=gif_encoder)
     
-    print(f"🔄 Processing {len(frames)} frames with blur...")
+    print(f"🔄 Processing {frame_count} frames with blur...")
     
-    for i, frame in enumerate(frames):
-        try:
-            # Process frame with blur background
-            processed_frame = process_blur_frame(
-                frame,
-                blur_settings['crop_top'],
-                blur_settings['crop_bottom'],
-                blur_settings['video_x_position'],
-                blur_settings['video_y_position'],
-                1080,  # target_width
-                1920   # target_height
-            )
-            
-            # Add text overlay if enabled
-            if text_settings and text_settings['enabled']:
-                from .video_processor import VideoProcessor
-                processor = VideoProcessor(None)
-                processed_frame = processor.add_text_overlay(processed_frame, gif_name, text_settings)
-            
-            # Ensure frame is correct size
-            if processed_frame.shape[:2] != (1920, 1080):
-                processed_frame = cv2.resize(processed_frame, (1080, 1920))
+    try:
+        for i, (frame, duration) in enumerate(_timed_frames(reader)):
+            get_cancel_token().check()
+            with span(FRAME_STAGE):
+                try:
+                    # Process frame with blur background
+                    processed_frame = process_blur_frame(
+                        frame,
+                        blur_settings['crop_top'],
+                        blur_settings['crop_bottom'],
+                        blur_settings['video_x_position'],
+                        blur_settings['video_y_position'],
+                        canvas.width,  # target_width
+                        canvas.height  # target_height
+                    )
+                    
+                    # Add text overlay if enabled
+                    if text_settings and text_settings['enabled']:
+                        with span("text"):
+                            processed_frame = VideoProcessorCore().add_text_overlay(processed_frame, gif_name, text_settings, canvas)
+                    
+                    # Ensure frame is correct size
+                    if processed_frame.shape[:2] != canvas.shape:
+                        with span("resize"):
+                            processed_frame = cv2.resize(processed_frame, canvas.size)
+                    
+                except Exception as e:
+                    print(f"❌ Error processing frame {i}: {e}")
+                    # Use resized original frame as fallback
+                    processed_frame = cv2.resize(frame, canvas.size)
             
-            processed_frames.append(processed_frame)
+            # Quantize and append to the output GIF right away (original timing)
+            with span("write"):
+                writer.write(processed_frame, duration)
+            get_progress_bus().frames(i + 1, frame_count)
             
             if (i + 1) % 10 == 0:
-                print(f"📊 Processed {i + 1}/{len(frames)} frames")
-                
-        except Exception as e:
-            print(f"❌ Error processing frame {i}: {e}")
-            # Use resized original frame as fallback
-            fallback_frame = cv2.resize(frame, (1080, 1920))
-            processed_frames.append(fallback_frame)
-    
-    print(f"✅ Processed {len(processed_frames)} frames total")
-    
-    # Create output GIF with original timing
-    success = create_gif_from_frames(processed_frames, output_path, durations)
+                print(f"📊 Processed {i + 1}/{frame_count} frames")
+        
+        print(f"✅ Processed {writer.frame_count} frames total")
+        success = writer.close()
+    except Exception as e:
+        print(f"❌ Error creating animated GIF: {e}")
+        success = False
+    finally:
+        writer.abort()
     
     if success:
         print(f"✅ GIF blur processing completed: {os.path.basename(gif_path)}")
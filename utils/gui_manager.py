@@ -20,6 +20,7 @@ from gui.dual_greenscreen_section import DualGreenScreenSection
 from gui.dual_audio_section import DualAudioSection
 from gui.enhanced_audio_section import EnhancedAudioSection
 from utils.gpu_config import gpu_config
+from utils.canvas import CanvasSpec
 
 class GUIManager(BaseGUI):
     """Main GUI Manager that coordinates all GUI sections."""
@@ -30,6 +31,8 @@ class GUIManager(BaseGUI):
         self.gpu_enabled = tk.BooleanVar(value=gpu_config.GPU_AVAILABLE)
         self.selected_encoder = tk.StringVar(value=gpu_config.get_optimal_encoder())
         self.selected_decoder = tk.StringVar(value=gpu_config.get_optimal_decoder() or "CPU")
+        self.segment_workers = tk.IntVar(value=1)
+        self.stage_workers = {stage: tk.IntVar(value=1) for stage in ("render", "encode", "mux")}
         
         self.init_sections()
         self.setup_gui()
@@ -72,7 +75,7 @@ class GUIManager(BaseGUI):
         self.dual_audio_section = DualAudioSection(self.scrollable_frame)
         
         # Mode-specific sections
-        self.blur_section = BlurSection(self.scrollable_frame)
+        self.blur_section = BlurSection(self.scrollable_frame, self.get_canvas)
         self.narasi_section = NarasiSection(self.scrollable_frame)
         
         # System sections
@@ -81,7 +84,9 @@ class GUIManager(BaseGUI):
             self.scrollable_frame,
             self.gpu_enabled,
             self.selected_encoder,
-            self.selected_decoder
+            self.selected_decoder,
+            self.segment_workers,
+            self.stage_workers
         )
         
         # Process section
@@ -212,6 +217,10 @@ class GUIManager(BaseGUI):
                 self.blur_section.update_blur_preview(text_settings=text_settings)
         # Blur mode doesn't need template preview since it doesn't use templates
     
+    def get_canvas(self):
+        """Output canvas selected in the output section."""
+        return CanvasSpec.from_settings({'canvas_settings': self.output_section.get_canvas_settings()})
+    
     def set_process_callback(self, callback):
         """Set the process callback function."""
         self.process_section.set_process_callback(callback)
@@ -228,10 +237,13 @@ class GUIManager(BaseGUI):
             'mode': mode,
             'text_settings': self.text_section.get_text_settings(),
             'output_settings': self.output_section.get_output_settings(),
+            'canvas_settings': self.output_section.get_canvas_settings(),
             'gpu_settings': {
                 'enabled': self.gpu_enabled.get(),
                 'encoder': self.selected_encoder.get(),
-                'decoder': self.selected_decoder.get()
+                'decoder': self.selected_decoder.get(),
+                'segment_workers': self.segment_workers.get(),
+                **{f'{stage}_workers': variable.get() for stage, variable in self.stage_workers.items()}
             }
         }
         
@@ -0,0 +1,255 @@
+"""
+Job Settings - Processing settings without the GUI
+Default settings in the shape GUIManager.get_all_settings produces, loading
+of settings files (JSON) for headless runs, and settings validation shared
+by the GUI and the command line.
+"""
+
+import os
+import copy
+import json
+
+PROCESSING_MODES = ("greenscreen", "blur", "narasi", "dual_greenscreen")
+
+# GUI defaults per settings section
+DEFAULT_SETTINGS = {
+    'text_settings': {
+        'enabled': False,
+        'font': "Arial",
+        'size': 60,
+        'color': "#000000",
+        'x_position': 50,
+        'y_position': 80
+    },
+    'output_settings': {
+        'custom_enabled': False,
+        'custom_folder': "",
+        'skip_unchanged': True,
+        'gif_encoder': "palette"
+    },
+    'canvas_settings': {
+        'preset': 'full',
+        'fps': None
+    },
+    'gpu_settings': {
+        'enabled': False,
+        'encoder': "CPU",
+        'decoder': "CPU",
+        'segment_workers': 1,
+        'render_workers': 1,
+        'encode_workers': 1,
+        'mux_workers': 1
+    },
+    'template_info': {
+        'path': "",
+        'is_gif': False,
+        'is_video': False,
+        'frames': None,
+        'durations': None,
+        'frame_count': 1
+    },
+    'audio_settings': {
+        'mode': "original_only",
+        'folder_path': "",
+        'original_volume': 100,
+        'background_volume': 50,
+        'music_policy': 'random',
+        'music_seed': None
+    },
+    'blur_settings': {
+        'crop_top': 0,
+        'crop_bottom': 0,
+        'video_x_position': 50,
+        'video_y_position': 50
+    },
+    'narasi_settings': {
+        'audio_folder_path': "",
+        'audio_mode': "narasi_only",
+        'narasi_volume': 100,
+        'original_volume': 30,
+        'segment_cache': False,
+        'segment_cache_gb': 2,
+        'segment_cache_folder': ""
+    },
+    'folder_path': "",
+    'folder_paths': {
+        'folder1': "",
+        'folder2': ""
+    },
+    # Dual mode with more inputs: folder3, folder4, ... in folder_paths (folders or playlists)
+    'slot_settings': {
+        'assignment': "top_to_bottom",
+        'slot_map': []
+    },
+    'text_source': "folder1"
+}
+
+# Audio settings only dual mode has (background music folder per input, like the dual audio section)
+DUAL_AUDIO_DEFAULTS = {
+    'audio_source': "folder1",
+    'folder1_path': "",
+    'folder2_path': ""
+}
+
+DUAL_AUDIO_SOURCES = ("folder1", "folder2")
+
+# Settings sections used by each mode (besides text/output/canvas/gpu)
+MODE_SECTIONS = {
+    'greenscreen': ('folder_path', 'template_info', 'audio_settings'),
+    'blur': ('folder_path', 'blur_settings', 'audio_settings'),
+    'narasi': ('folder_path', 'template_info', 'narasi_settings'),
+    'dual_greenscreen': ('folder_paths', 'slot_settings', 'text_source', 'template_info', 'audio_settings')
+}
+
+def apply_audio_mode(audio_settings):
+    """
+    Derive the processing flags from the audio mode, like the audio section does
+    ('original_only', 'background_only', 'dual_mixing').
+    Settings that already have the flags (GUI exports, dual mode) are left unchanged.
+    """
+    if 'enabled' in audio_settings:
+        return audio_settings
+    
+    audio_mode = audio_settings.get('mode', "original_only")
+    if audio_mode == "background_only":
+        audio_settings.update({
+            'enabled': True,
+            'dual_audio_enabled': False,
+            'volume': audio_settings.get('background_volume', 50)
+        })
+    elif audio_mode == "dual_mixing":
+        audio_settings.update({'enabled': True, 'dual_audio_enabled': True})
+    else:
+        audio_settings.update({'enabled': False, 'dual_audio_enabled': False, 'folder_path': ""})
+    return audio_settings
+
+def apply_dual_audio_source(audio_settings):
+    """
+    Keep folder_path and the folder of the selected audio source in sync, like the
+    dual audio section does (either one may be given in a settings file).
+    """
+    source_key = f"{audio_settings.get('audio_source', 'folder1')}_path"
+    folder_path = audio_settings.get(source_key) or audio_settings.get('folder_path', "")
+    audio_settings['folder_path'] = folder_path
+    if source_key in ('folder1_path', 'folder2_path'):
+        audio_settings[source_key] = folder_path
+    return audio_settings
+
+def get_default_settings(mode):
+    """Default settings for a mode (same keys as GUIManager.get_all_settings)."""
+    settings = {'mode': mode}
+    for section in ('text_settings', 'output_settings', 'canvas_settings', 'gpu_settings') + MODE_SECTIONS[mode]:
+        settings[section] = copy.deepcopy(DEFAULT_SETTINGS[section])
+    if mode == "dual_greenscreen":
+        settings['audio_settings'].update(DUAL_AUDIO_DEFAULTS)
+    return settings
+
+def merge_settings(settings, overrides):
+    """Recursively merge overrides into settings (dicts merged, other values replaced)."""
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(settings.get(key), dict):
+            merge_settings(settings[key], value)
+        else:
+            settings[key] = value
+    return settings
+
+def load_settings(path, mode=None):
+    """
+    Load settings from a JSON file, filling in defaults for missing keys.
+    mode overrides the 'mode' key of the file.
+    Raises ValueError for unknown modes or invalid JSON.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        try:
+            file_settings = json.load(f)
+        except ValueError as e:
+            raise ValueError(f"Invalid JSON in {path}: {e}")
+    
+    if not isinstance(file_settings, dict):
+        raise ValueError(f"Settings file must contain a JSON object: {path}")
+    
+    mode = mode or file_settings.get('mode')
+    if mode not in PROCESSING_MODES:
+        raise ValueError(f"Unknown processing mode: {mode} (expected one of {', '.join(PROCESSING_MODES)})")
+    
+    settings = merge_settings(get_default_settings(mode), file_settings)
+    settings['mode'] = mode
+    
+    if 'audio_settings' in settings:
+        if mode == "dual_greenscreen":
+            apply_dual_audio_source(settings['audio_settings'])
+        apply_audio_mode(settings['audio_settings'])
+    
+    return settings
+
+def validate_settings(settings):
+    """Validate settings before processing. Returns (is_valid, message)."""
+    mode = settings['mode']
+    
+    # Common validations
+    if not settings.get('text_settings'):
+        return False, "Text settings not found"
+    
+    if not settings.get('gpu_settings'):
+        return False, "GPU settings not found"
+    
+    # Mode-specific validations
+    if mode in ["greenscreen", "blur"]:
+        if not settings.get('folder_path'):
+            return False, "No video folder selected"
+        
+        from utils.gif_processing import GIF_ENCODERS
+        gif_encoder = (settings.get('output_settings') or {}).get('gif_encoder', "palette")
+        if gif_encoder not in GIF_ENCODERS:
+            return False, f"Unknown GIF encoder: {gif_encoder} (expected one of {', '.join(GIF_ENCODERS)})"
+    
+    elif mode == "narasi":
+        if not settings.get('folder_path'):
+            return False, "No video folder selected"
+        narasi_settings = settings.get('narasi_settings', {})
+        if not narasi_settings.get('audio_folder_path'):
+            return False, "No audio folder selected for narasi mode"
+        segment_cache_gb = narasi_settings.get('segment_cache_gb', 2)
+        if (isinstance(segment_cache_gb, bool) or not isinstance(segment_cache_gb, (int, float))
+                or segment_cache_gb <= 0):
+            return False, "Segment cache size must be a positive number of GB"
+        if not settings.get('template_info', {}).get('path'):
+            return False, "No template selected"
+    
+    elif mode == "dual_greenscreen":
+        folder_paths = settings.get('folder_paths', {})
+        if not folder_paths.get('folder1') or not folder_paths.get('folder2'):
+            return False, "Both video folders must be selected"
+        if not settings.get('template_info', {}).get('path'):
+            return False, "No template selected"
+        
+        # Background music source of dual mode
+        audio_settings = settings.get('audio_settings') or {}
+        audio_source = audio_settings.get('audio_source', "folder1")
+        if audio_source not in DUAL_AUDIO_SOURCES:
+            return False, f"Unknown audio source: {audio_source} (expected one of {', '.join(DUAL_AUDIO_SOURCES)})"
+        audio_folder = audio_settings.get(f"{audio_source}_path")
+        if audio_folder and not os.path.isdir(audio_folder):
+            return False, f"Background music folder not found: {audio_folder}"
+        
+        # Slot assignment for templates with more than two slots
+        from utils.dual_greenscreen_detection import SLOT_ASSIGNMENTS
+        slot_settings = settings.get('slot_settings') or {}
+        assignment = slot_settings.get('assignment', "top_to_bottom")
+        if assignment not in SLOT_ASSIGNMENTS:
+            return False, f"Unknown slot assignment: {assignment} (expected one of {', '.join(SLOT_ASSIGNMENTS)})"
+        if assignment == "map":
+            slot_map = slot_settings.get('slot_map')
+            if (not isinstance(slot_map, list) or not slot_map
+                    or not all(isinstance(index, int) and index >= 0 for index in slot_map)):
+                return False, "Slot map must be a list of slot numbers (0-based), one per input"
+        
+        # Validate dual green screen template
+        from utils.dual_greenscreen_detection import validate_dual_green_screen_template
+        template_path = settings.get('template_info', {}).get('path')
+        if template_path:
+            is_valid, msg = validate_dual_green_screen_template(template_path)
+            if not is_valid:
+                return False, f"Template validation failed: {msg}"
+    
+    return True, "Settings valid"
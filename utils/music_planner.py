@@ -0,0 +1,97 @@
+"""
+Music Planner - Background music assignment for a whole batch
+Assigns a background track to every output before processing starts, so
+batches are reproducible (seeded) and the work can be ordered by track,
+letting each decoded track serve all of its outputs while still cached.
+"""
+
+import os
+import json
+import random
+import time
+
+from utils.file_operations import get_audio_files
+from utils.audio_cache import CACHE_FOLDER
+
+# Policy name -> GUI label
+MUSIC_POLICIES = {
+    'random': "Random",
+    'round_robin': "Round Robin",
+    'lru': "Least Recently Used"
+}
+
+# Last-use times per track, shared between batches for the 'lru' policy
+USAGE_FILE = os.path.join(CACHE_FOLDER, "music_usage.json")
+
+def load_music_usage():
+    """Load last-use timestamps {track path: time}."""
+    try:
+        with open(USAGE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_music_usage(usage):
+    """Save last-use timestamps."""
+    try:
+        os.makedirs(CACHE_FOLDER, exist_ok=True)
+        with open(USAGE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(usage, f)
+    except OSError as e:
+        print(f"⚠️ Could not save music usage: {e}")
+
+def plan_music(count, audio_folder, policy='random', seed=None):
+    """
+    Assign a background track to each of count outputs.
+    Every policy reuses tracks evenly: no track is used twice before all
+    tracks have been used once. Returns list of track paths (empty if no tracks).
+    """
+    if not audio_folder or not os.path.exists(audio_folder):
+        return []
+    
+    tracks = [os.path.join(audio_folder, f) for f in sorted(get_audio_files(audio_folder))]
+    if not tracks:
+        return []
+    
+    if policy == 'round_robin':
+        return [tracks[i % len(tracks)] for i in range(count)]
+    
+    if policy == 'lru':
+        # Least recently used tracks (across batches) first
+        usage = load_music_usage()
+        order = sorted(tracks, key=lambda track: usage.get(track, 0))
+        assignments = [order[i % len(order)] for i in range(count)]
+        
+        now = time.time()
+        for i, track in enumerate(assignments):
+            usage[track] = now + i * 1e-6  # Keep assignment order as recency order
+        save_music_usage(usage)
+        return assignments
+    
+    # Seeded random: shuffled deck, reshuffled when every track has been dealt
+    rng = random.Random(seed)
+    assignments = []
+    while len(assignments) < count:
+        deck = tracks[:]
+        rng.shuffle(deck)
+        assignments.extend(deck)
+    return assignments[:count]
+
+def order_by_track(items, assignments):
+    """
+    Order work items so outputs sharing a track run back to back.
+    Returns list of (item, track) pairs; tracks keep their first-use order.
+    """
+    first_use = {}
+    for index, track in enumerate(assignments):
+        first_use.setdefault(track, index)
+    
+    pairs = list(zip(items, assignments))
+    return sorted(pairs, key=lambda pair: first_use[pair[1]])
+
+def get_music_settings(audio_settings):
+    """Get (policy, seed) from audio settings."""
+    policy = audio_settings.get('music_policy', 'random')
+    if policy not in MUSIC_POLICIES:
+        policy = 'random'
+    return policy, audio_settings.get('music_seed')
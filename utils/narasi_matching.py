@@ -0,0 +1,135 @@
+"""
+Narasi Matching - Indexed matching of narration audio to video files
+An audio file matches every video whose name (lowercase, without extension)
+equals its name, contains it, or is contained in it; audio files without any
+match get all videos. Instead of testing every audio against every video,
+the video names are indexed once:
+
+- exact-name hash: name -> videos, used for the "video name inside audio
+  name" rule by looking up the substrings of the audio name
+- trigram index: trigram -> videos, used for the "audio name inside video
+  name" rule (only videos with all trigrams of the audio name are tested)
+
+Results are cached per folder listing, so the GUI preview and the run that
+follows share the work.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+# Folder listings whose matches are kept
+_CACHE_SIZE = 8
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def get_match_name(file_name):
+    """Name used for matching: lowercase, without extension."""
+    return os.path.splitext(file_name)[0].lower()
+
+def _trigrams(name):
+    return {name[i:i + 3] for i in range(len(name) - 2)}
+
+class VideoNameIndex:
+    """Exact-name and trigram index of video file names."""
+    
+    def __init__(self, video_files):
+        self.video_files = list(video_files)
+        self.names = [get_match_name(video_file) for video_file in self.video_files]
+        
+        self.by_name = {}      # name -> video indices
+        self.by_trigram = {}   # trigram -> video indices (ascending)
+        for index, name in enumerate(self.names):
+            self.by_name.setdefault(name, []).append(index)
+            for trigram in _trigrams(name):
+                self.by_trigram.setdefault(trigram, []).append(index)
+        
+        # Lengths of names that can be a substring of an audio name
+        self.name_lengths = sorted({len(name) for name in self.by_name})
+    
+    def containing(self, name):
+        """Indices of videos whose name contains name."""
+        if len(name) < 3:
+            return [index for index, video_name in enumerate(self.names) if name in video_name]
+        
+        postings = []
+        for trigram in _trigrams(name):
+            posting = self.by_trigram.get(trigram)
+            if posting is None:
+                return []
+            postings.append(posting)
+        
+        # Candidates: videos with the rarest trigrams, verified with a substring test
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:3]:
+            candidates.intersection_update(posting)
+        return [index for index in candidates if name in self.names[index]]
+    
+    def contained_in(self, name):
+        """Indices of videos whose name is a substring of name."""
+        found = []
+        for length in self.name_lengths:
+            if length > len(name):
+                break
+            for start in range(len(name) - length + 1):
+                indices = self.by_name.get(name[start:start + length])
+                if indices:
+                    found.extend(indices)
+        return found
+    
+    def find(self, name):
+        """Video files matching an audio name, in video list order."""
+        indices = set(self.containing(name))
+        indices.update(self.contained_in(name))
+        return [self.video_files[index] for index in sorted(indices)]
+
+def match_narasi_files(video_files, audio_files, index=None):
+    """
+    Match audio files to videos by filename.
+    Returns (matches, unmatched): matches maps audio file -> list of video
+    files (all videos if nothing matched), unmatched lists the audio files
+    that fell back to all videos.
+    """
+    index = index or VideoNameIndex(video_files)
+    
+    # Audio files with the same name (different extension): the last one is used
+    audio_by_name = {}
+    for audio_file in audio_files:
+        audio_by_name[get_match_name(audio_file)] = audio_file
+    
+    matches = {}
+    unmatched = []
+    for name, audio_file in audio_by_name.items():
+        matched_videos = index.find(name)
+        if not matched_videos:
+            unmatched.append(audio_file)
+            matched_videos = list(video_files)
+        matches[audio_file] = matched_videos
+    return matches, unmatched
+
+def get_narasi_folder_matches(video_folder_path, audio_folder_path):
+    """
+    List both folders and match them (cached per folder listing).
+    Returns (video_files, audio_files, matches, unmatched).
+    """
+    from utils.file_operations import get_all_media_files, get_audio_files
+    
+    video_files = get_all_media_files(video_folder_path)
+    audio_files = get_audio_files(audio_folder_path)
+    key = (tuple(video_files), tuple(audio_files))
+    
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            return (video_files, audio_files) + cached
+    
+    matches, unmatched = match_narasi_files(video_files, audio_files)
+    
+    with _cache_lock:
+        _cache[key] = (matches, unmatched)
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return video_files, audio_files, matches, unmatched
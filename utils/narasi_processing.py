@@ -1,10 +1,18 @@
 import cv2
 import os
+import time
 import numpy as np
-from moviepy.editor import VideoFileClip, AudioFileClip, concatenate_videoclips
+from moviepy.editor import AudioFileClip
 from .video_processing import process_frame_with_green_screen
 from .green_screen_detection import create_green_screen_mask
-from .gif_processing import extract_gif_frames
+from .gif_processing import extract_gif_frames, get_gif_first_frame
+from .segment_rendering import get_segment_workers, render_video_in_segments
+from .canvas import DEFAULT_CANVAS
+from .cancellation import get_cancel_token
+from .work_queue import get_work_queue
+from .progress_events import get_progress_bus
+from .timeline_reader import ConcatenatedVideoReader
+from .timing import FRAME_STAGE, span
 import tempfile
 
 def concatenate_videos_opencv(video_paths, temp_output_path, target_fps=30):
@@ -25,6 +33,7 @@ def concatenate_videos_opencv(video_paths, temp_output_path, target_fps=30):
     out = cv2.VideoWriter(temp_output_path, fourcc, target_fps, (width, height))
     
     total_frames = 0
+    cancel_token = get_cancel_token()
     
     try:
         for i, video_path in enumerate(video_paths):
@@ -34,6 +43,7 @@ def concatenate_videos_opencv(video_paths, temp_output_path, target_fps=30):
             frame_count = 0
             
             while True:
+                cancel_token.check()
                 ret, frame = cap.read()
                 if not ret:
                     break
@@ -60,63 +70,25 @@ def concatenate_videos_opencv(video_paths, temp_output_path, target_fps=30):
     
     return total_duration, total_frames
 
-def concatenate_videos_moviepy(video_paths, temp_output_path):
+def process_concatenated_video_with_template(video_reader, template_path, template_mask, 
+                                           output_path, text_settings, target_duration, gpu_settings,
+                                           canvas=None):
     """
-    Concatenate multiple videos using MoviePy (more reliable for different formats).
-    Returns the total duration in seconds.
+    Process the concatenated timeline of video_reader (ConcatenatedVideoReader)
+    with green screen template and adjust duration.
     """
-    print(f"🔗 Concatenating {len(video_paths)} videos with MoviePy...")
+    from .video_processor_core import VideoProcessorCore
     
-    clips = []
-    total_duration = 0
-    
-    try:
-        for i, video_path in enumerate(video_paths):
-            print(f"📹 Loading video {i+1}/{len(video_paths)}: {os.path.basename(video_path)}")
-            
-            clip = VideoFileClip(video_path)
-            clips.append(clip)
-            total_duration += clip.duration
-            
-            print(f"   ✅ Loaded: {clip.duration:.2f}s, {clip.fps}fps, {clip.size}")
-        
-        print(f"🔗 Concatenating {len(clips)} clips...")
-        final_clip = concatenate_videoclips(clips, method="compose")
-        
-        print(f"💾 Writing concatenated video...")
-        # FIXED: Remove unsupported temp_audiofile_path parameter
-        final_clip.write_videofile(
-            temp_output_path, 
-            codec="libx264", 
-            audio_codec="aac",
-            logger=None
-        )
-        
-        total_duration = final_clip.duration
-        print(f"✅ Video concatenation completed: {total_duration:.2f} seconds")
-        
-    finally:
-        # Cleanup clips
-        for clip in clips:
-            clip.close()
-        if 'final_clip' in locals():
-            final_clip.close()
-    
-    return total_duration
-
-def process_concatenated_video_with_template(concatenated_video_path, template_path, template_mask, 
-                                           output_path, text_settings, target_duration, gpu_settings):
-    """
-    Process concatenated video with green screen template and adjust duration.
-    """
     print(f"🎬 Processing concatenated video with template...")
     print(f"   Target duration: {target_duration:.2f} seconds")
     
+    canvas = canvas or DEFAULT_CANVAS
+    
     # Check if template is GIF
     if template_path.lower().endswith('.gif'):
         return process_concatenated_video_with_gif_template(
-            concatenated_video_path, template_path, output_path, 
-            text_settings, target_duration, gpu_settings
+            video_reader, template_path, output_path, 
+            text_settings, target_duration, gpu_settings, canvas
         )
     
     # Static template processing
@@ -124,146 +96,184 @@ def process_concatenated_video_with_template(concatenated_video_path, template_p
     if template is None:
         raise Exception("Could not load template")
     
-    template = cv2.resize(template, (1080, 1920))
+    template = cv2.resize(template, canvas.size)
     
-    # Open concatenated video
-    cap = cv2.VideoCapture(concatenated_video_path)
-    fps = int(cap.get(cv2.CAP_PROP_FPS))
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    video_duration = total_frames / fps
+    # Concatenated timeline (clips are read one after another, no intermediate file)
+    fps = video_reader.fps
+    total_frames = video_reader.frame_count
+    video_duration = video_reader.duration
     
-    print(f"📹 Concatenated video: {total_frames} frames, {video_duration:.2f}s at {fps}fps")
+    print(f"📹 Concatenated video: {len(video_reader.clips)} clips, {total_frames} frames, "
+          f"{video_duration:.2f}s at {fps:g}fps")
     
     # Calculate target frames
-    target_frames = int(target_duration * fps)
+    output_fps = canvas.get_fps(fps)
+    target_frames = int(target_duration * output_fps)
+    
+    # Long narasi outputs of a single clip can be rendered in parallel segments
+    segment_workers = get_segment_workers(gpu_settings)
+    single_source = video_reader.get_single_source()
+    if segment_workers > 1 and output_fps == fps and single_source:
+        if render_video_in_segments(single_source, output_path, fps, segment_workers,
+                                    text_settings, template=template, template_mask=template_mask,
+                                    video_name="Narasi Video", target_frames=target_frames,
+                                    canvas=canvas):
+            return True
     
     # Setup output writer
     fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    out = cv2.VideoWriter(output_path, fourcc, fps, (1080, 1920))
+    out = cv2.VideoWriter(output_path, fourcc, output_fps, canvas.size)
     
+    core = VideoProcessorCore()
     frames_written = 0
+    source_index = 0
+    cancel_token = get_cancel_token()
+    progress_bus = get_progress_bus()
     
     try:
         while frames_written < target_frames:
-            ret, frame = cap.read()
+            cancel_token.check()
+            with span("decode"):
+                ret, frame = video_reader.read()
             
             if not ret:
                 # Video ended, restart from beginning (loop)
-                cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                ret, frame = cap.read()
+                video_reader.rewind()
+                with span("decode"):
+                    ret, frame = video_reader.read()
                 if not ret:
                     break
                 print(f"🔄 Looping video to match audio duration...")
             
-            # Process frame with green screen
-            processed_frame = process_frame_with_green_screen(template, frame, template_mask)
-            
-            # Add text overlay
-            if text_settings and text_settings['enabled']:
-                from .video_processor import VideoProcessor
-                processor = VideoProcessor(None)
-                video_name = "Narasi Video"  # Generic name for concatenated video
-                processed_frame = processor.add_text_overlay(processed_frame, video_name, text_settings)
+            # Drop/duplicate frames when canvas fps differs from source fps
+            repeats = canvas.output_repeats(source_index, fps)
+            source_index += 1
+            if repeats == 0:
+                continue
             
-            # Ensure correct size
-            if processed_frame.shape[:2] != (1920, 1080):
-                processed_frame = cv2.resize(processed_frame, (1080, 1920))
+            # Process frame with green screen + text (generic name for concatenated video)
+            with span(FRAME_STAGE):
+                processed_frame = core.render_frame(
+                    frame, "Narasi Video", text_settings,
+                    template=template, template_mask=template_mask, canvas=canvas
+                )
             
-            out.write(processed_frame)
-            frames_written += 1
+            with span("write"):
+                for _ in range(min(repeats, target_frames - frames_written)):
+                    out.write(processed_frame)
+                    frames_written += 1
+            progress_bus.frames(frames_written, target_frames)
             
             if frames_written % 100 == 0:
                 progress = (frames_written / target_frames) * 100
                 print(f"📊 Processing: {frames_written}/{target_frames} frames ({progress:.1f}%)")
     
     finally:
-        cap.release()
         out.release()
     
     print(f"✅ Template processing completed: {frames_written} frames")
     return True
 
-def process_concatenated_video_with_gif_template(concatenated_video_path, gif_template_path, 
-                                               output_path, text_settings, target_duration, gpu_settings):
+def process_concatenated_video_with_gif_template(video_reader, gif_template_path, 
+                                               output_path, text_settings, target_duration, gpu_settings,
+                                               canvas=None):
     """
-    Process concatenated video with animated GIF template.
+    Process the concatenated timeline of video_reader with animated GIF template.
     """
+    from .video_processor_core import VideoProcessorCore
+    
     print(f"🎬 Processing with animated GIF template...")
     
-    # Extract GIF frames
-    gif_frames, gif_durations = extract_gif_frames(gif_template_path)
+    canvas = canvas or DEFAULT_CANVAS
+    
+    # Extract GIF frames (at canvas size, they are reused for every loop)
+    gif_frames, gif_durations = extract_gif_frames(gif_template_path, size=canvas.size)
     if not gif_frames:
         raise Exception("Could not extract GIF frames")
     
     print(f"🎬 GIF template: {len(gif_frames)} frames")
     
-    # Open concatenated video
-    cap = cv2.VideoCapture(concatenated_video_path)
-    fps = int(cap.get(cv2.CAP_PROP_FPS))
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    video_duration = total_frames / fps
+    fps = video_reader.fps
     
     # Calculate target frames
-    target_frames = int(target_duration * fps)
+    output_fps = canvas.get_fps(fps)
+    target_frames = int(target_duration * output_fps)
     gif_frame_count = len(gif_frames)
     
     # Setup output writer
     fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    out = cv2.VideoWriter(output_path, fourcc, fps, (1080, 1920))
+    out = cv2.VideoWriter(output_path, fourcc, output_fps, canvas.size)
     
     frames_written = 0
+    source_index = 0
+    cancel_token = get_cancel_token()
+    progress_bus = get_progress_bus()
     
     try:
         while frames_written < target_frames:
-            ret, frame = cap.read()
+            cancel_token.check()
+            with span("decode"):
+                ret, frame = video_reader.read()
             
             if not ret:
                 # Video ended, restart from beginning (loop)
-                cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                ret, frame = cap.read()
+                video_reader.rewind()
+                with span("decode"):
+                    ret, frame = video_reader.read()
                 if not ret:
                     break
             
+            # Drop/duplicate frames when canvas fps differs from source fps
+            repeats = canvas.output_repeats(source_index, fps)
+            source_index += 1
+            if repeats == 0:
+                continue
+            
             # Get current GIF frame (cycle through GIF frames)
             gif_frame_index = frames_written % gif_frame_count
             current_gif_frame = gif_frames[gif_frame_index]
-            current_gif_frame = cv2.resize(current_gif_frame, (1080, 1920))
-            
-            # Create mask from current GIF frame
-            template_mask = create_green_screen_mask(current_gif_frame)
             
-            # Process frame with green screen
-            processed_frame = process_frame_with_green_screen(current_gif_frame, frame, template_mask)
-            
-            # Add text overlay
-            if text_settings and text_settings['enabled']:
-                from .video_processor import VideoProcessor
-                processor = VideoProcessor(None)
-                video_name = "Narasi Video"
-                processed_frame = processor.add_text_overlay(processed_frame, video_name, text_settings)
-            
-            # Ensure correct size
-            if processed_frame.shape[:2] != (1920, 1080):
-                processed_frame = cv2.resize(processed_frame, (1080, 1920))
+            with span(FRAME_STAGE):
+                # Create mask from current GIF frame
+                template_mask = create_green_screen_mask(current_gif_frame)
+                
+                # Process frame with green screen
+                processed_frame = process_frame_with_green_screen(current_gif_frame, frame, template_mask)
+                
+                # Add text overlay
+                if text_settings and text_settings['enabled']:
+                    video_name = "Narasi Video"
+                    with span("text"):
+                        processed_frame = VideoProcessorCore().add_text_overlay(processed_frame, video_name, text_settings, canvas)
+                
+                # Ensure correct size
+                if processed_frame.shape[:2] != canvas.shape:
+                    with span("resize"):
+                        processed_frame = cv2.resize(processed_frame, canvas.size)
             
-            out.write(processed_frame)
-            frames_written += 1
+            with span("write"):
+                for _ in range(min(repeats, target_frames - frames_written)):
+                    out.write(processed_frame)
+                    frames_written += 1
+            progress_bus.frames(frames_written, target_frames)
             
             if frames_written % 100 == 0:
                 progress = (frames_written / target_frames) * 100
                 print(f"📊 Processing: {frames_written}/{target_frames} frames (GIF frame: {gif_frame_index + 1}/{gif_frame_count}) ({progress:.1f}%)")
     
     finally:
-        cap.release()
         out.release()
     
     print(f"✅ GIF template processing completed: {frames_written} frames")
     return True
 
 def add_audio_to_narasi_video(temp_video_path, audio_path, output_path, target_duration, 
-                             audio_mode="narasi_only", narasi_volume=100, original_volume=30):
+                             audio_mode="narasi_only", narasi_volume=100, original_volume=30,
+                             original_clips=None):
     """
     Add audio to narasi video with duration matching and audio mode support.
+    original_clips: [(path, seconds), ...] of the concatenated source clips (mixed_audio mode),
+    their audio is streamed clip by clip.
     """
     print(f"🎵 Adding audio to narasi video (Mode: {audio_mode})...")
     print(f"   Target duration: {target_duration:.2f} seconds")
@@ -271,84 +281,26 @@ def add_audio_to_narasi_video(temp_video_path, audio_path, output_path, target_d
     if audio_mode == "mixed_audio":
         print(f"   Original volume: {original_volume}%")
     
-    video_clip = None
-    audio_clip = None
-    original_audio_clip = None
-    final_clip = None
+    from .audio_engine import mix_audio_to_video
     
     try:
-        video_clip = VideoFileClip(temp_video_path)
-        audio_clip = AudioFileClip(audio_path)
-        
-        print(f"📹 Video duration: {video_clip.duration:.2f}s")
-        print(f"🎵 Audio duration: {audio_clip.duration:.2f}s")
-        
-        # Adjust audio to match target duration
-        if audio_clip.duration > target_duration:
-            # Cut audio to target duration
-            audio_clip = audio_clip.subclip(0, target_duration)
-            print(f"✂️ Audio cut to {target_duration:.2f} seconds")
-        elif audio_clip.duration < target_duration:
-            # Loop audio to match target duration
-            loops_needed = int(target_duration / audio_clip.duration) + 1
-            audio_clip = audio_clip.loop(duration=target_duration)
-            print(f"🔄 Audio looped to {target_duration:.2f} seconds")
-        
-        # Apply narasi volume
-        if narasi_volume != 100:
-            narasi_volume_factor = narasi_volume / 100.0
-            audio_clip = audio_clip.volumex(narasi_volume_factor)
-            print(f"🔊 Narasi audio volume adjusted to {narasi_volume}%")
+        # Narasi audio is looped or cut to the target duration
+        tracks = [{'path': audio_path, 'volume': narasi_volume, 'loop': True}]
         
         # Handle audio mode
-        if audio_mode == "narasi_only":
-            # Use only narasi audio
-            final_audio = audio_clip
-            print(f"🎙️ Using narasi audio only")
-        
-        elif audio_mode == "mixed_audio":
+        if audio_mode == "mixed_audio":
             # Mix narasi audio with original video audio
-            print(f"🎭 Mixing narasi audio with original video audio...")
-            
-            # Get original video audio
-            if video_clip.audio is not None:
-                original_audio_clip = video_clip.audio
-                
-                # Apply original volume
-                if original_volume != 100:
-                    original_volume_factor = original_volume / 100.0
-                    original_audio_clip = original_audio_clip.volumex(original_volume_factor)
-                    print(f"🔊 Original audio volume adjusted to {original_volume}%")
-                
-                # Adjust original audio duration to match target
-                if original_audio_clip.duration > target_duration:
-                    original_audio_clip = original_audio_clip.subclip(0, target_duration)
-                elif original_audio_clip.duration < target_duration:
-                    original_audio_clip = original_audio_clip.loop(duration=target_duration)
-                
-                # Mix both audio tracks
-                from moviepy.editor import CompositeAudioClip
-                final_audio = CompositeAudioClip([audio_clip, original_audio_clip])
-                print(f"✅ Audio tracks mixed successfully")
+            if original_clips:
+                print(f"🎭 Mixing narasi audio with original video audio...")
+                tracks.append({'clips': original_clips, 'volume': original_volume, 'loop': True})
             else:
-                # No original audio, use narasi only
-                final_audio = audio_clip
-                print(f"⚠️ No original audio found, using narasi audio only")
-        
+                print("⚠️ Source videos have no audio, using narasi audio only")
         else:
-            # Default to narasi only
-            final_audio = audio_clip
-        
-        # Set final audio to video
-        final_clip = video_clip.set_audio(final_audio)
+            # Use only narasi audio
+            print(f"🎙️ Using narasi audio only")
         
-        # Write final video - FIXED: Remove unsupported parameter
-        final_clip.write_videofile(
-            output_path, 
-            codec="libx264", 
-            audio_codec="aac", 
-            logger=None
-        )
+        # Mix tracks and write final video in one encoder pass
+        mix_audio_to_video(temp_video_path, output_path, tracks, duration=target_duration)
         
         print(f"✅ Audio processing completed (Mode: {audio_mode})")
         return True
@@ -365,32 +317,25 @@ def add_audio_to_narasi_video(temp_video_path, audio_path, output_path, target_d
         return False
         
     finally:
-        # Cleanup
-        if video_clip:
-            video_clip.close()
-        if audio_clip:
-            audio_clip.close()
-        if original_audio_clip:
-            original_audio_clip.close()
-        if final_clip:
-            final_clip.close()
-        
         # Remove temp file
         try:
             if os.path.exists(temp_video_path):
                 os.remove(temp_video_path)
-        except:
+        except Exception:
             pass
 
 def process_narasi_mode_bulk(video_folder_path, audio_folder_path, template_path, 
                             output_folder, text_settings, gpu_settings, 
                             audio_mode="narasi_only", narasi_volume=100, original_volume=30,
-                            progress_callback=None):
+                            canvas=None, manifest=None, segment_cache=None):
     """
     Main function to process narasi mode with bulk processing:
     1. Match video and audio files by filename
     2. For each match: concatenate videos, process with template, add audio
     3. Create multiple output files
+    Matches whose output is up to date in the render manifest are skipped.
+    With segment_cache (utils.segment_cache.get_segment_cache) clips used by
+    several matches are normalised once and shared through the cache.
     """
     print(f"🎬 Starting Narasi Mode bulk processing...")
     print(f"   Video folder: {video_folder_path}")
@@ -398,12 +343,13 @@ def process_narasi_mode_bulk(video_folder_path, audio_folder_path, template_path
     print(f"   Template: {os.path.basename(template_path)}")
     print(f"   Audio mode: {audio_mode}")
     
-    from utils.file_operations import get_all_media_files, get_audio_files
+    from utils.narasi_matching import get_narasi_folder_matches
     
-    # Get video and audio files
+    # Get video and audio files, matched by filename (cached per folder listing)
     try:
-        video_files = get_all_media_files(video_folder_path)
-        audio_files = get_audio_files(audio_folder_path)
+        video_files, audio_files, matches, unmatched = get_narasi_folder_matches(
+            video_folder_path, audio_folder_path
+        )
         
         if not video_files:
             print("❌ No video files found")
@@ -416,8 +362,8 @@ def process_narasi_mode_bulk(video_folder_path, audio_folder_path, template_path
         print(f"📹 Found {len(video_files)} video files")
         print(f"🎵 Found {len(audio_files)} audio files")
         
-        # Create file matches
-        matches = create_narasi_file_matches(video_files, audio_files)
+        for audio_file in unmatched:
+            print(f"⚠️ No specific matches for '{audio_file}', using all videos")
         
         if not matches:
             print("❌ No matching files found")
@@ -429,13 +375,30 @@ def process_narasi_mode_bulk(video_folder_path, audio_folder_path, template_path
         successful_count = 0
         total_matches = len(matches)
         
+        from utils.render_manifest import get_render_settings
+        render_settings = get_render_settings(
+            "narasi", template_path, text_settings,
+            {'audio_mode': audio_mode, 'narasi_volume': narasi_volume, 'original_volume': original_volume},
+            canvas
+        )
+        
+        work_queue = get_work_queue()
+        progress_bus = get_progress_bus()
+        progress_bus.batch_started([
+            (f"narasi_{os.path.splitext(audio_file)[0]}.mp4",
+             [os.path.join(video_folder_path, vf) for vf in matched_videos])
+            for audio_file, matched_videos in matches.items()
+        ])
+        
+        # Last match using each video (clips used again later are stored in the segment cache)
+        last_use = {}
+        if segment_cache is not None:
+            for i, matched_videos in enumerate(matches.values()):
+                for vf in matched_videos:
+                    last_use[os.path.join(video_folder_path, vf)] = i
+        
         for i, (audio_file, matched_videos) in enumerate(matches.items()):
-            if progress_callback:
-                overall_progress = (i / total_matches) * 100
-                progress_callback(
-                    overall_progress, 
-                    f"Processing {i+1}/{total_matches}: {audio_file}"
-                )
+            get_cancel_token().check()
             
             try:
                 # Prepare paths
@@ -446,27 +409,56 @@ def process_narasi_mode_bulk(video_folder_path, audio_folder_path, template_path
                 audio_base_name = os.path.splitext(audio_file)[0]
                 output_path = os.path.join(output_folder, f"narasi_{audio_base_name}.mp4")
                 
-                print(f"\n🎬 Processing match {i+1}/{total_matches}:")
-                print(f"   Audio: {audio_file}")
-                print(f"   Videos: {len(matched_videos)} files")
-                print(f"   Output: {os.path.basename(output_path)}")
+                # Skip matches rendered before with the same inputs and settings
+                if manifest is not None:
+                    manifest_entry = manifest.get_entry(video_paths + [audio_path], render_settings)
+                    if manifest.is_current(output_path, manifest_entry):
+                        successful_count += 1
+                        print(f"⏭️ Unchanged, skipping: {audio_file}")
+                        continue
                 
-                # Process this match
-                success = process_single_narasi_match(
-                    video_paths, template_path, audio_path, output_path,
-                    text_settings, gpu_settings, audio_mode, narasi_volume, original_volume
-                )
+                # Distributed run: skip matches claimed by other nodes
+                if work_queue is not None and not work_queue.claim(output_path):
+                    continue
+                
+                start_time = time.time()
+                success = False
+                try:
+                    print(f"\n🎬 Processing match {i+1}/{total_matches}:")
+                    print(f"   Audio: {audio_file}")
+                    print(f"   Videos: {len(matched_videos)} files")
+                    print(f"   Output: {os.path.basename(output_path)}")
+                    
+                    # Process this match
+                    progress_bus.file_started(os.path.basename(output_path))
+                    success = process_single_narasi_match(
+                        video_paths, template_path, audio_path, output_path,
+                        text_settings, gpu_settings, audio_mode, narasi_volume, original_volume,
+                        canvas, segment_cache, {path for path in video_paths if last_use.get(path, i) > i}
+                    )
+                    
+                    if success:
+                        successful_count += 1
+                        print(f"✅ Completed: {audio_file}")
+                        if manifest is not None:
+                            manifest.record(output_path, manifest_entry)
+                    else:
+                        print(f"❌ Failed: {audio_file}")
+                    
+                    progress_bus.file_finished(os.path.basename(output_path), success)
                 
-                if success:
-                    successful_count += 1
-                    print(f"✅ Completed: {audio_file}")
-                else:
-                    print(f"❌ Failed: {audio_file}")
+                finally:
+                    # Also finish a claimed match that raised, so its lease is not renewed forever
+                    # (a cancelled run leaves it unfinished: stop() releases it for other nodes)
+                    if work_queue is not None and not get_cancel_token().is_cancelled():
+                        work_queue.finish(output_path, success, {'render': time.time() - start_time})
             
             except Exception as e:
                 print(f"❌ Error processing {audio_file}: {e}")
+                progress_bus.error(e)
                 continue
         
+        progress_bus.batch_finished(successful_count)
         print(f"\n🎬 Narasi Mode bulk processing completed!")
         print(f"✅ Successfully processed: {successful_count}/{total_matches} matches")
         print(f"📁 Output folder: {output_folder}")
@@ -478,55 +470,41 @@ def process_narasi_mode_bulk(video_folder_path, audio_folder_path, template_path
         import traceback
         traceback.print_exc()
         return False
+    
+    finally:
+        # Save outputs recorded since the last batched manifest save
+        if manifest is not None:
+            manifest.flush()
 
 def create_narasi_file_matches(video_files, audio_files):
-    """Create matches between video and audio files based on filename."""
-    matches = {}
-    
-    # Get base names (without extensions) for audio files
-    audio_base_names = {}
-    for audio_file in audio_files:
-        base_name = os.path.splitext(audio_file)[0].lower()
-        audio_base_names[base_name] = audio_file
-    
-    # For each audio file, find matching videos
-    for base_name, audio_file in audio_base_names.items():
-        matched_videos = []
-        
-        # Find videos that match this audio file name
-        for video_file in video_files:
-            video_base_name = os.path.splitext(video_file)[0].lower()
-            
-            # Exact match or partial match
-            if (base_name == video_base_name or 
-                base_name in video_base_name or 
-                video_base_name in base_name):
-                matched_videos.append(video_file)
-        
-        # If no exact matches found, use all videos (fallback)
-        if not matched_videos:
-            print(f"⚠️ No specific matches for '{audio_file}', using all videos")
-            matched_videos = video_files.copy()
-        
-        matches[audio_file] = matched_videos
+    """Create matches between video and audio files based on filename (indexed, see utils.narasi_matching)."""
+    from utils.narasi_matching import match_narasi_files
     
+    matches, unmatched = match_narasi_files(video_files, audio_files)
+    for audio_file in unmatched:
+        print(f"⚠️ No specific matches for '{audio_file}', using all videos")
     return matches
 
 def process_single_narasi_match(video_paths, template_path, audio_path, output_path, 
                                text_settings, gpu_settings, audio_mode="narasi_only", 
-                               narasi_volume=100, original_volume=30):
+                               narasi_volume=100, original_volume=30, canvas=None,
+                               segment_cache=None, reuse_paths=()):
     """
     Process a single narasi match:
-    1. Concatenate videos for this match
+    1. Read the matched videos as one timeline (no concatenated temp file)
     2. Process with green screen template
     3. Adjust duration to match audio
     4. Add audio
+    reuse_paths are the videos later matches of the batch use again (stored
+    in segment_cache, if given).
     """
     print(f"🎬 Processing single narasi match...")
     print(f"   Videos: {len(video_paths)} files")
     print(f"   Audio: {os.path.basename(audio_path)}")
     print(f"   Audio mode: {audio_mode}")
     
+    canvas = canvas or DEFAULT_CANVAS
+    
     # Get audio duration first
     try:
         audio_clip = AudioFileClip(audio_path)
@@ -540,49 +518,54 @@ def process_single_narasi_match(video_paths, template_path, audio_path, output_p
     
     # Create temporary files
     temp_dir = tempfile.mkdtemp()
-    concatenated_video_path = os.path.join(temp_dir, "concatenated_video.mp4")
     processed_video_path = os.path.join(temp_dir, "processed_video.mp4")
+    video_reader = None
     
     try:
-        # Step 1: Concatenate videos
-        print(f"\n📝 Step 1: Concatenating videos...")
-        video_duration = concatenate_videos_moviepy(video_paths, concatenated_video_path)
+        # Step 1: Open videos as one concatenated timeline
+        print(f"\n📝 Step 1: Opening videos as one timeline...")
+        video_reader = ConcatenatedVideoReader(video_paths, max_duration=target_duration, canvas=canvas,
+                                               segment_cache=segment_cache, reuse_paths=reuse_paths)
         
         # Step 2: Process with template
         print(f"\n📝 Step 2: Processing with template...")
         
         # Get template for mask creation
         if template_path.lower().endswith('.gif'):
-            # For GIF templates, extract first frame for mask
-            gif_frames, _ = extract_gif_frames(template_path)
-            if gif_frames:
-                template_for_mask = gif_frames[0]
-            else:
+            # For GIF templates, decode only the first frame for mask
+            template_for_mask = get_gif_first_frame(template_path)
+            if template_for_mask is None:
                 raise Exception("Could not extract GIF frames")
         else:
             template_for_mask = cv2.imread(template_path)
             if template_for_mask is None:
                 raise Exception("Could not load template")
         
-        template_for_mask = cv2.resize(template_for_mask, (1080, 1920))
+        template_for_mask = cv2.resize(template_for_mask, canvas.size)
         template_mask = create_green_screen_mask(template_for_mask)
         
         if np.sum(template_mask) == 0:
             raise Exception("No green screen detected in template")
         
         success = process_concatenated_video_with_template(
-            concatenated_video_path, template_path, template_mask,
-            processed_video_path, text_settings, target_duration, gpu_settings
+            video_reader, template_path, template_mask,
+            processed_video_path, text_settings, target_duration, gpu_settings, canvas
         )
         
         if not success:
             raise Exception("Template processing failed")
         
+        # Finish caching the clip the output stopped in if the next outputs use it
+        # (the partial segment of any other clip is dropped on release)
+        if reuse_paths:
+            video_reader.complete_segment()
+        
         # Step 3: Add audio
         print(f"\n📝 Step 3: Adding audio...")
+        original_clips = video_reader.get_audio_clips() if audio_mode == "mixed_audio" else None
         success = add_audio_to_narasi_video(
             processed_video_path, audio_path, output_path, target_duration,
-            audio_mode, narasi_volume, original_volume
+            audio_mode, narasi_volume, original_volume, original_clips
         )
         
         if success:
@@ -600,6 +583,9 @@ def process_single_narasi_match(video_paths, template_path, audio_path, output_p
         return False
         
     finally:
+        if video_reader is not None:
+            video_reader.release()
+        
         # Cleanup temporary files
         try:
             import shutil
@@ -611,10 +597,10 @@ def process_single_narasi_match(video_paths, template_path, audio_path, output_p
 # Keep the original function for backward compatibility
 def process_narasi_mode(video_paths, template_path, audio_path, output_path, 
                        text_settings, gpu_settings, audio_mode="narasi_only", 
-                       narasi_volume=100, original_volume=30):
+                       narasi_volume=100, original_volume=30, canvas=None):
     """
     Original narasi mode function (for backward compatibility).
     """
     return process_single_narasi_match(video_paths, template_path, audio_path, output_path, 
                                      text_settings, gpu_settings, audio_mode, 
-                                     narasi_volume, original_volume)
\ No newline at end of file
+                                     narasi_volume, original_volume, canvas)
\ No newline at end of file
@@ -0,0 +1,353 @@
+"""
+Progress Events - Structured progress reporting for processing runs
+Processing code publishes typed events (batch/file start and end, frames,
+stage timings, errors) on the active ProgressBus. Publishing only updates
+counters under a lock, so it never waits on a subscriber; frame updates are
+coalesced per file. A dispatcher thread delivers the events to subscribers
+every interval, together with a 'progress' event holding overall percent,
+measured fps and ETA (remaining probed frames / measured fps).
+
+Subscribers are plain callables taking an event dict. They run on the
+dispatcher thread: the GUI hands events to Tk through the threading manager's
+queue (polled with root.after), the CLI writes JSON lines.
+"""
+
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+# Event types
+BATCH_START = "batch_start"   # files: [{'key', 'inputs'}]
+FILE_START = "file_start"     # key
+FRAMES = "frames"             # key, frames, total_frames (coalesced, delivered with the latest count)
+STAGE = "stage"               # key, stage, seconds
+FILE_END = "file_end"         # key, success, seconds, fps
+ERROR = "error"               # key, message
+BATCH_END = "batch_end"       # files, successful, seconds
+PROGRESS = "progress"         # progress, status, fps, eta (derived, sent every interval while running)
+
+# Seconds between deliveries to subscribers
+DEFAULT_INTERVAL = 0.25
+
+# Weight of the newest fps sample in the moving average
+_FPS_SMOOTHING = 0.3
+
+def probe_frame_count(path):
+    """Frame count of a video or GIF (1 for images, None if unknown)."""
+    from utils.file_operations import is_gif_file, is_image_file
+    
+    try:
+        if is_gif_file(path):
+            from PIL import Image
+            with Image.open(path) as gif:
+                return getattr(gif, 'n_frames', 1)
+        if is_image_file(path):
+            return 1
+        
+        import cv2
+        cap = cv2.VideoCapture(path)
+        try:
+            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        finally:
+            cap.release()
+        return frame_count if frame_count > 0 else None
+    except Exception:
+        return None
+
+def format_eta(seconds):
+    """ETA as m:ss or h:mm:ss."""
+    if seconds is None:
+        return "--:--"
+    seconds = int(seconds)
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+class ProgressBus:
+    """
+    Collects progress events from processing threads and delivers them to
+    subscribers from a dispatcher thread. Without subscribers publishing is
+    a no-op, so the default bus costs nothing.
+    """
+    
+    def __init__(self, interval=DEFAULT_INTERVAL):
+        self.interval = interval
+        self.subscribers = []
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.pending = []           # Discrete events not delivered yet
+        self.frame_updates = {}     # key -> latest frames event (coalesced)
+        self.files = {}             # key -> {'inputs', 'total_frames', 'frames', 'started', 'done'}
+        self.order = []             # File keys in batch order
+        self.batch_start_time = None
+        self.frames_rendered = 0    # Frames rendered in finished files
+        self.fps = None
+        self.fps_sample = (None, 0)  # (time, frames) of the last fps measurement
+        self.changed = False
+        self.stop_event = threading.Event()
+        self.dispatcher = None
+    
+    def subscribe(self, subscriber):
+        """Add subscriber(event dict)."""
+        self.subscribers.append(subscriber)
+        return subscriber
+    
+    # Publishing (called from processing threads, never blocks on subscribers)
+    
+    def publish(self, event, **fields):
+        """Publish a discrete event."""
+        if not self.subscribers:
+            return
+        with self.lock:
+            self.pending.append({'event': event, 'time': round(time.time(), 3), **fields})
+            self.changed = True
+    
+    def batch_started(self, files):
+        """Start of a batch: files is a list of (key, input paths) in processing order."""
+        if not self.subscribers:
+            return
+        with self.lock:
+            if self.batch_start_time is None:
+                self.batch_start_time = time.time()
+            for key, inputs in files:
+                if key not in self.files:
+                    self.order.append(key)
+                self.files[key] = {'inputs': list(inputs), 'total_frames': None, 'frames': 0,
+                                   'started': None, 'done': False}
+        self.publish(BATCH_START, files=[{'key': key, 'inputs': list(inputs)} for key, inputs in files])
+    
+    def file_started(self, key):
+        """Start of a file; frames() calls from this thread are counted for it."""
+        self.local.key = key
+        if not self.subscribers:
+            return
+        with self.lock:
+            entry = self.files.setdefault(key, {'inputs': [], 'total_frames': None, 'frames': 0,
+                                                'started': None, 'done': False})
+            if key not in self.order:
+                self.order.append(key)
+            entry['started'] = entry['started'] or time.time()
+        self.publish(FILE_START, key=key)
+    
+    def frames(self, frames, total_frames=None):
+        """Frames rendered so far for the current file of this thread (coalesced)."""
+        if not self.subscribers:
+            return
+        key = getattr(self.local, 'key', None)
+        with self.lock:
+            entry = self.files.get(key)
+            if entry is not None:
+                entry['frames'] = frames
+                if total_frames:
+                    entry['total_frames'] = total_frames
+            self.frame_updates[key] = {'event': FRAMES, 'time': round(time.time(), 3), 'key': key,
+                                       'frames': frames, 'total_frames': total_frames}
+            self.changed = True
+    
+    def stage_finished(self, key, stage, seconds):
+        """Time one stage took for a file."""
+        self.publish(STAGE, key=key, stage=stage, seconds=round(seconds, 3))
+    
+    def file_finished(self, key, success):
+        """End of a file."""
+        if not self.subscribers:
+            return
+        with self.lock:
+            entry = self.files.get(key)
+            seconds = fps = None
+            if entry is not None and not entry['done']:
+                entry['done'] = True
+                self.frames_rendered += entry['frames']
+                if entry['started']:
+                    seconds = time.time() - entry['started']
+                    fps = round(entry['frames'] / seconds, 2) if seconds > 0 and entry['frames'] else None
+        self.publish(FILE_END, key=key, success=bool(success),
+                     seconds=round(seconds, 3) if seconds is not None else None, fps=fps)
+    
+    def error(self, message, key=None):
+        """Error while processing a file."""
+        self.publish(ERROR, key=key or getattr(self.local, 'key', None), message=str(message))
+    
+    def batch_finished(self, successful):
+        """End of a batch."""
+        if not self.subscribers:
+            return
+        with self.lock:
+            seconds = time.time() - self.batch_start_time if self.batch_start_time else 0.0
+            files = len(self.files)
+        self.publish(BATCH_END, files=files, successful=successful, seconds=round(seconds, 3))
+    
+    # Progress and ETA (dispatcher thread)
+    
+    def _probe_missing(self):
+        """Probe frame counts of files in the batch (outside the lock, off the render threads)."""
+        with self.lock:
+            missing = [(key, entry['inputs']) for key, entry in self.files.items()
+                       if entry['total_frames'] is None and entry['inputs'] and 'probed' not in entry]
+        
+        for key, inputs in missing[:8]:  # A few per tick so delivery stays responsive
+            counts = [probe_frame_count(path) for path in inputs]
+            counts = [count for count in counts if count]
+            with self.lock:
+                entry = self.files[key]
+                entry['probed'] = True
+                if entry['total_frames'] is None and counts:
+                    entry['total_frames'] = max(counts)
+    
+    def get_progress(self):
+        """Progress event: percent of batch frames, current files, fps and ETA."""
+        now = time.time()
+        with self.lock:
+            entries = [self.files[key] for key in self.order]
+            running = [(key, self.files[key]) for key in self.order
+                       if self.files[key]['started'] and not self.files[key]['done']]
+            running_frames = sum(entry['frames'] for _, entry in running)
+            frames_rendered = self.frames_rendered + running_frames
+            
+            # Files without a probed count are estimated with the average count
+            known = [entry['total_frames'] for entry in entries if entry['total_frames']]
+            average = sum(known) / len(known) if known else None
+            total_frames = sum(entry['total_frames'] or average or 0 for entry in entries)
+            frames_done = running_frames + sum(
+                entry['total_frames'] or entry['frames'] for entry in entries if entry['done']
+            )
+            
+            # Moving average of rendered frames per second
+            sample_time, sample_frames = self.fps_sample
+            if sample_time is not None and now - sample_time >= self.interval:
+                current_fps = (frames_rendered - sample_frames) / (now - sample_time)
+                self.fps = current_fps if self.fps is None else (
+                    _FPS_SMOOTHING * current_fps + (1 - _FPS_SMOOTHING) * self.fps
+                )
+            if sample_time is None or now - sample_time >= self.interval:
+                self.fps_sample = (now, frames_rendered)
+            fps = self.fps
+            
+            finished = sum(1 for entry in entries if entry['done'])
+            position = self.order.index(running[-1][0]) + 1 if running else 0
+        
+        progress = min(100.0, frames_done / total_frames * 100) if total_frames else 0.0
+        eta = max(0.0, total_frames - frames_done) / fps if fps and total_frames else None
+        
+        if running:
+            # Latest started file is the one rendering; earlier ones may be in encode/mux stages
+            key, entry = running[-1]
+            frames_text = f"{entry['frames']}/{entry['total_frames']}" if entry['total_frames'] else str(entry['frames'])
+            status = f"File {position}/{len(entries)}: {key} ({frames_text} frames)"
+        else:
+            status = f"{finished}/{len(entries)} files"
+        if fps:
+            status += f" · {fps:.1f} fps · ETA {format_eta(eta)}"
+        
+        return {
+            'event': PROGRESS,
+            'time': round(now, 3),
+            'progress': round(progress, 1),
+            'status': status,
+            'files_done': finished,
+            'files': len(entries),
+            'frames': int(frames_done),
+            'total_frames': int(total_frames),
+            'fps': round(fps, 2) if fps else None,
+            'eta': round(eta, 1) if eta is not None else None
+        }
+    
+    # Delivery
+    
+    def flush(self):
+        """Deliver pending events and a progress update to subscribers."""
+        self._probe_missing()
+        
+        with self.lock:
+            events = self.pending + list(self.frame_updates.values())
+            self.pending = []
+            self.frame_updates = {}
+            changed = self.changed
+            self.changed = False
+        
+        if changed and self.files:
+            events.append(self.get_progress())
+        
+        for event in events:
+            for subscriber in self.subscribers:
+                try:
+                    subscriber(event)
+                except Exception as e:
+                    print(f"⚠️ Progress subscriber error: {e}")
+    
+    def _dispatch_loop(self):
+        while not self.stop_event.wait(self.interval):
+            self.flush()
+    
+    def start(self):
+        """Start delivering events in the background."""
+        if self.dispatcher is None and self.subscribers:
+            self.stop_event.clear()
+            self.dispatcher = threading.Thread(target=self._dispatch_loop, name="progress-events", daemon=True)
+            self.dispatcher.start()
+        return self
+    
+    def stop(self):
+        """Stop the dispatcher and deliver remaining events."""
+        if self.dispatcher is not None:
+            self.stop_event.set()
+            self.dispatcher.join()
+            self.dispatcher = None
+        self.flush()
+
+def progress_callback_subscriber(progress_callback):
+    """Subscriber forwarding progress events to a progress_callback(progress, status)."""
+    def subscriber(event):
+        if event['event'] == PROGRESS:
+            progress_callback(event['progress'], event['status'])
+    return subscriber
+
+class EventLogSubscriber:
+    """Subscriber appending every event to a log file as a JSON line."""
+    
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'a', encoding='utf-8')
+    
+    def __call__(self, event):
+        self.file.write(json.dumps(event) + "\n")
+        self.file.flush()
+    
+    def close(self):
+        self.file.close()
+
+# Bus of the current run (no subscribers outside a run)
+_active_bus = ProgressBus()
+
+def get_progress_bus():
+    """Get the bus of the current run."""
+    return _active_bus
+
+def set_progress_bus(bus):
+    """Make bus active (called when a run starts)."""
+    global _active_bus
+    _active_bus = bus
+    return bus
+
+@contextmanager
+def progress_session(subscribers=(), progress_callback=None):
+    """
+    Active bus for one run: events go to subscribers (and progress updates to
+    progress_callback) until the block exits; remaining events are delivered then.
+    """
+    bus = ProgressBus()
+    for subscriber in subscribers:
+        bus.subscribe(subscriber)
+    if progress_callback:
+        bus.subscribe(progress_callback_subscriber(progress_callback))
+    
+    previous_bus = get_progress_bus()
+    set_progress_bus(bus).start()
+    try:
+        yield bus
+    finally:
+        bus.stop()
+        set_progress_bus(previous_bus)
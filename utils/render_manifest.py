@@ -0,0 +1,209 @@
+"""
+Render Manifest - Resumable, incremental batches
+Every output folder keeps a manifest recording, per output file, a hash of
+its input files and of the template and settings it was rendered with.
+A rerun skips outputs that exist and whose inputs and settings are unchanged,
+so an interrupted batch resumes where it stopped and adding new clips to a
+folder only renders the new clips.
+
+Recorded outputs are saved in batches (every SAVE_EVERY_OUTPUTS outputs or
+SAVE_INTERVAL_SECONDS) and once more when the batch ends (manifest_batch),
+so large batches do not rewrite the whole manifest after every output.
+"""
+
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from contextlib import contextmanager
+
+MANIFEST_NAME = ".render_manifest.json"
+MANIFEST_VERSION = 1
+
+# Input files are hashed from samples (start, middle, end) plus their size,
+# so hashing a large video costs a few reads instead of reading the whole file
+HASH_SAMPLE_BYTES = 1024 * 1024
+
+# Recorded outputs between manifest saves (a crash re-renders at most these)
+SAVE_EVERY_OUTPUTS = 25
+SAVE_INTERVAL_SECONDS = 30.0
+
+# Per-output settings that do not change what is rendered for a file
+_IGNORED_AUDIO_KEYS = ('background_audio_path',)
+
+def get_file_hash(path):
+    """Hash of file size and sampled content (start, middle and end)."""
+    size = os.path.getsize(path)
+    digest = hashlib.sha1(str(size).encode('utf-8'))
+    
+    with open(path, 'rb') as f:
+        for offset in sorted({0, max(0, size // 2 - HASH_SAMPLE_BYTES // 2), max(0, size - HASH_SAMPLE_BYTES)}):
+            f.seek(offset)
+            digest.update(f.read(HASH_SAMPLE_BYTES))
+    
+    return digest.hexdigest()
+
+def get_settings_hash(settings):
+    """Hash of a settings dict (key order independent)."""
+    encoded = json.dumps(settings, sort_keys=True, default=str)
+    return hashlib.sha1(encoded.encode('utf-8')).hexdigest()
+
+def get_render_settings(mode, template_path=None, text_settings=None, audio_settings=None,
+                        canvas=None, **extra):
+    """
+    Settings that determine the rendered output of a mode.
+    The background track assigned per output is left out: with an unseeded
+    random policy it differs on every run without the inputs changing.
+    """
+    audio_settings = {
+        key: value for key, value in (audio_settings or {}).items()
+        if key not in _IGNORED_AUDIO_KEYS
+    }
+    
+    return {
+        'mode': mode,
+        'template': template_path,
+        'text_settings': text_settings,
+        'audio_settings': audio_settings,
+        'canvas': canvas.to_dict() if canvas is not None else None,
+        **extra
+    }
+
+class RenderManifest:
+    """Manifest of one output folder. Thread-safe; recorded outputs are saved in batches."""
+    
+    def __init__(self, output_folder):
+        self.output_folder = output_folder
+        self.path = os.path.join(output_folder, MANIFEST_NAME)
+        self.lock = threading.Lock()
+        self.outputs = {}
+        self.files = {}  # input path -> {'size', 'mtime_ns', 'hash'}, avoids rehashing unchanged files
+        self.recorded = set()  # outputs recorded by this instance
+        self.unsaved_count = 0
+        self.saved_time = time.time()
+        self.load()
+    
+    def load(self):
+        """Load manifest from the output folder (empty if missing or unreadable)."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        
+        if data.get('version') != MANIFEST_VERSION:
+            return
+        
+        self.outputs = data.get('outputs', {})
+        self.files = data.get('files', {})
+    
+    def save(self):
+        """
+        Write manifest atomically (temp file + rename).
+        Outputs recorded meanwhile by other processes (work queue nodes sharing
+        the output folder) are merged in instead of being overwritten.
+        """
+        with self.lock:
+            outputs = {}
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == MANIFEST_VERSION:
+                    outputs = data.get('outputs', {})
+            except (OSError, ValueError):
+                pass
+            
+            outputs.update({name: self.outputs[name] for name in self.recorded})
+            self.outputs = outputs
+            data = {'version': MANIFEST_VERSION, 'outputs': self.outputs, 'files': self.files}
+            
+            try:
+                fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=self.output_folder)
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, indent=1)
+                os.replace(temp_path, self.path)
+            except OSError as e:
+                print(f"⚠️ Could not save render manifest: {e}")
+            
+            self.unsaved_count = 0
+            self.saved_time = time.time()
+    
+    def flush(self):
+        """Save outputs recorded since the last save."""
+        with self.lock:
+            unsaved = self.unsaved_count > 0
+        if unsaved:
+            self.save()
+    
+    def get_input_hash(self, path):
+        """Hash of an input file, reused from the manifest while size and mtime are unchanged."""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        
+        with self.lock:
+            entry = self.files.get(path)
+            if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+                return entry['hash']
+        
+        file_hash = get_file_hash(path)
+        
+        with self.lock:
+            self.files[path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'hash': file_hash}
+        return file_hash
+    
+    def get_entry(self, input_paths, settings):
+        """Manifest entry describing an output rendered from input_paths with settings."""
+        inputs = {}
+        for path in input_paths:
+            try:
+                inputs[os.path.basename(path)] = self.get_input_hash(path)
+            except OSError:
+                inputs[os.path.basename(path)] = None
+        
+        template_path = settings.get('template')
+        template_hash = None
+        if template_path and os.path.exists(template_path):
+            template_hash = self.get_input_hash(template_path)
+        
+        return {
+            'inputs': inputs,
+            'settings': get_settings_hash({**settings, 'template': template_hash})
+        }
+    
+    def is_current(self, output_path, entry):
+        """True if output_path exists and was rendered from the same inputs and settings."""
+        if not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
+            return False
+        
+        with self.lock:
+            recorded = self.outputs.get(os.path.basename(output_path))
+        
+        return bool(recorded) and recorded['inputs'] == entry['inputs'] and recorded['settings'] == entry['settings']
+    
+    def record(self, output_path, entry):
+        """Record a finished output (saved with the next batch of outputs)."""
+        with self.lock:
+            self.outputs[os.path.basename(output_path)] = {**entry, 'time': time.time()}
+            self.recorded.add(os.path.basename(output_path))
+            self.unsaved_count += 1
+            save_due = (self.unsaved_count >= SAVE_EVERY_OUTPUTS
+                        or time.time() - self.saved_time >= SAVE_INTERVAL_SECONDS)
+        if save_due:
+            self.save()
+
+def get_manifest(output_folder, output_settings):
+    """RenderManifest for output_folder, or None if skipping unchanged outputs is disabled."""
+    if not (output_settings or {}).get('skip_unchanged', True):
+        return None
+    return RenderManifest(output_folder)
+
+@contextmanager
+def manifest_batch(manifest):
+    """Batch recording into manifest (None without one): saves the outputs recorded since the last save at the end."""
+    try:
+        yield manifest
+    finally:
+        if manifest is not None:
+            manifest.flush()
@@ -0,0 +1,117 @@
+"""
+Segment Cache - Normalised video segments shared between narasi outputs
+Narasi outputs without a specific match all use the same clip pool, so the
+same clips are decoded, centered and scaled again for every narration. With
+the segment cache enabled in the narasi settings, the timeline reader stores
+the clips that later outputs of the batch reuse as JPEG frames (at canvas
+size and fps) in a cache folder, so a batch decodes every clip once.
+Entries are keyed by the source (path, size, mtime) and the normalisation
+spec and evicted least-recently-used first when the cache exceeds its byte
+budget (utils.file_cache).
+
+Segment file: the encoded frames back to back, then the frame offsets
+(frames + 1, int64) and the frame count (int64).
+"""
+
+import os
+import tempfile
+
+import cv2
+import numpy as np
+
+from utils.file_cache import FileCache
+
+DEFAULT_CACHE_FOLDER = os.path.join(tempfile.gettempdir(), "yts_segment_cache")
+
+# Default size of all cached segments in GB (JPEG frames, about 30 minutes of 1080x1920 at 30fps)
+DEFAULT_CACHE_GB = 2
+
+CACHE_EXTENSION = ".seg"
+
+# Cached frames are lossy, high enough to be indistinguishable after the final encode
+JPEG_QUALITY = 95
+
+def get_segment_cache(narasi_settings):
+    """FileCache for normalised segments from narasi settings, or None if the segment cache is disabled."""
+    narasi_settings = narasi_settings or {}
+    if not narasi_settings.get('segment_cache', False):
+        return None
+    
+    folder = narasi_settings.get('segment_cache_folder') or DEFAULT_CACHE_FOLDER
+    budget_gb = narasi_settings.get('segment_cache_gb', DEFAULT_CACHE_GB)
+    return FileCache(folder, CACHE_EXTENSION, int(budget_gb * 1024 ** 3))
+
+def load_segment(cache, key):
+    """Cached frames of a segment as a CachedSegment, None on a cache miss."""
+    path = cache.lookup(key)
+    if path is None:
+        return None
+    try:
+        return CachedSegment(path)
+    except (OSError, ValueError):
+        return None
+
+class CachedSegment:
+    """Frames of a segment file, decoded on access (segment[index])."""
+    
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        try:
+            self.file.seek(-8, os.SEEK_END)
+            count = int(np.frombuffer(self.file.read(8), dtype=np.int64)[0])
+            self.file.seek(-8 * (count + 2), os.SEEK_END)
+            self.offsets = np.frombuffer(self.file.read(8 * (count + 1)), dtype=np.int64)
+        except (OSError, ValueError, IndexError):
+            self.file.close()
+            raise ValueError(f"Invalid segment file: {path}")
+    
+    def __len__(self):
+        return len(self.offsets) - 1
+    
+    def __getitem__(self, index):
+        start, end = int(self.offsets[index]), int(self.offsets[index + 1])
+        self.file.seek(start)
+        data = np.frombuffer(self.file.read(end - start), dtype=np.uint8)
+        return cv2.imdecode(data, cv2.IMREAD_COLOR)
+    
+    def close(self):
+        self.file.close()
+
+class SegmentWriter:
+    """
+    Writes normalised frames of one segment to a private temp file; commit()
+    publishes it in the cache, abort() (segment not read to the end) drops it.
+    """
+    
+    def __init__(self, cache, key):
+        self.cache = cache
+        self.key = key
+        self.offsets = [0]
+        self.file, self.temp_path = cache.create_temp()
+    
+    def write(self, frame):
+        # Full chroma resolution (4:2:0 smears sharp colour edges)
+        ok, data = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY,
+                                                cv2.IMWRITE_JPEG_SAMPLING_FACTOR,
+                                                cv2.IMWRITE_JPEG_SAMPLING_FACTOR_444])
+        if not ok:
+            raise ValueError("Could not encode segment frame")
+        self.file.write(data.tobytes())
+        self.offsets.append(self.offsets[-1] + len(data))
+    
+    def commit(self):
+        """Publish the written frames (nothing is stored for an empty segment)."""
+        frame_count = len(self.offsets) - 1
+        if frame_count == 0:
+            self.abort()
+            return
+        
+        self.file.write(np.array(self.offsets + [frame_count], dtype=np.int64).tobytes())
+        self.file.close()
+        path = self.cache.publish(self.temp_path, self.key)
+        print(f"💾 Cached normalised segment: {frame_count} frames "
+              f"({os.path.getsize(path) / 1024 ** 2:.1f} MB)")
+    
+    def abort(self):
+        self.file.close()
+        self.cache.discard(self.temp_path)
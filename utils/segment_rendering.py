@@ -0,0 +1,239 @@
+"""
+Segment Rendering - Parallel rendering of single long inputs
+Splits one input at keyframe boundaries, renders every segment in a worker
+process with the same frame plan and joins the encoded segments losslessly
+with the ffmpeg concat demuxer. Audio is muxed once by the caller afterwards.
+"""
+
+import os
+import re
+import bisect
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+from utils.file_operations import get_ffmpeg_binary
+from utils.canvas import DEFAULT_CANVAS
+from utils.cancellation import get_cancel_token, run_subprocess
+from utils.progress_events import get_progress_bus
+
+# Set in worker processes: multiprocessing.Event signalled when the run is cancelled
+_worker_cancel_event = None
+
+# Segments shorter than this are not worth a worker process
+MIN_SEGMENT_FRAMES = 300
+
+def get_segment_workers(gpu_settings):
+    """Get number of parallel segments from settings (1 = serial rendering)."""
+    if not gpu_settings:
+        return 1
+    try:
+        workers = int(gpu_settings.get('segment_workers', 1))
+    except (TypeError, ValueError):
+        return 1
+    return max(1, min(workers, os.cpu_count() or 1))
+
+def find_keyframe_frames(video_path, fps):
+    """Find keyframe positions (frame indices) by decoding keyframes only."""
+    cmd = [
+        get_ffmpeg_binary(), '-hide_banner', '-nostats',
+        '-skip_frame', 'nokey', '-i', video_path,
+        '-map', '0:v:0', '-vf', 'showinfo', '-f', 'null', '-'
+    ]
+    try:
+        result = run_subprocess(cmd, capture_output=True, text=True, errors='replace', timeout=300)
+    except (subprocess.SubprocessError, OSError) as e:
+        print(f"⚠️ Could not probe keyframes: {e}")
+        return []
+    
+    # Some decoders ignore -skip_frame, so filter on the keyframe flag as well
+    times = []
+    for line in result.stderr.splitlines():
+        match = re.search(r'pts_time:\s*(-?[0-9.]+)', line)
+        if match and 'iskey:1' in line:
+            times.append(float(match.group(1)))
+    
+    if not times:
+        return []
+    
+    # Keyframe times are relative to the stream start, like OpenCV frame positions
+    start_time = min(times)
+    return sorted({int(round((t - start_time) * fps)) for t in times})
+
+def plan_segments(total_frames, segment_count, keyframes=None):
+    """Split [0, total_frames) into frame ranges, snapping boundaries to keyframes."""
+    segment_count = max(1, min(segment_count, total_frames // MIN_SEGMENT_FRAMES))
+    boundaries = [0]
+    
+    for k in range(1, segment_count):
+        boundary = k * total_frames // segment_count
+        
+        if keyframes:
+            # Nearest keyframe to the ideal boundary
+            pos = bisect.bisect_left(keyframes, boundary)
+            candidates = keyframes[max(0, pos - 1):pos + 1]
+            boundary = min(candidates, key=lambda f: abs(f - boundary))
+        
+        if boundaries[-1] + MIN_SEGMENT_FRAMES <= boundary <= total_frames - MIN_SEGMENT_FRAMES:
+            boundaries.append(boundary)
+    
+    boundaries.append(total_frames)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+def _init_segment_worker(cancel_event):
+    """Worker process initializer: keep the run's cancel event."""
+    global _worker_cancel_event
+    _worker_cancel_event = cancel_event
+
+def _render_segment(job):
+    """Worker process: render output frames [start, end) into one segment file."""
+    from utils.video_processor_core import VideoProcessorCore
+    core = VideoProcessorCore()
+    
+    cap = cv2.VideoCapture(job['video_path'])
+    cap.set(cv2.CAP_PROP_POS_FRAMES, job['start'] % job['source_frames'])
+    
+    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+    out = cv2.VideoWriter(job['segment_path'], fourcc, job['fps'], job['canvas'].size)
+    
+    if not out.isOpened():
+        cap.release()
+        return 0
+    
+    frames_written = 0
+    
+    try:
+        for _ in range(job['start'], job['end']):
+            if _worker_cancel_event is not None and _worker_cancel_event.is_set():
+                break
+            
+            ret, frame = cap.read()
+            
+            if not ret and job['loop']:
+                # Source ended, restart from beginning (loop)
+                cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                ret, frame = cap.read()
+            
+            if not ret:
+                break
+            
+            processed_frame = core.render_frame(
+                frame, job['video_name'], job['text_settings'],
+                template=job['template'], template_mask=job['template_mask'],
+                blur_settings=job['blur_settings'], canvas=job['canvas']
+            )
+            out.write(processed_frame)
+            frames_written += 1
+    
+    finally:
+        cap.release()
+        out.release()
+    
+    return frames_written
+
+def concat_segments(segment_paths, output_path):
+    """Join encoded segments without re-encoding (ffmpeg concat demuxer)."""
+    list_path = os.path.join(os.path.dirname(segment_paths[0]), "segments.txt")
+    
+    with open(list_path, 'w', encoding='utf-8') as f:
+        for segment_path in segment_paths:
+            escaped_path = segment_path.replace("'", "'\\''")
+            f.write(f"file '{escaped_path}'\n")
+    
+    cmd = [
+        get_ffmpeg_binary(), '-y', '-hide_banner', '-loglevel', 'error',
+        '-f', 'concat', '-safe', '0', '-i', list_path,
+        '-c', 'copy', output_path
+    ]
+    result = run_subprocess(cmd, capture_output=True, text=True, errors='replace')
+    
+    if result.returncode != 0:
+        print(f"❌ Segment concatenation failed: {result.stderr.strip()}")
+        return False
+    
+    return os.path.exists(output_path) and os.path.getsize(output_path) > 0
+
+def render_video_in_segments(video_path, output_path, fps, segment_workers, text_settings,
+                             template=None, template_mask=None, blur_settings=None,
+                             video_name=None, target_frames=None, canvas=None):
+    """
+    Render one input in parallel segments.
+    If target_frames is longer than the source, the source is looped.
+    Returns output_path, or None if segmenting is not possible (caller renders serially).
+    """
+    cap = cv2.VideoCapture(video_path)
+    source_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    
+    if source_frames <= 0 or fps <= 0:
+        return None
+    
+    total_frames = target_frames or source_frames
+    loop = total_frames > source_frames
+    
+    # Keyframe snapping only makes sense when output frames map 1:1 to source frames
+    keyframes = [] if loop else find_keyframe_frames(video_path, fps)
+    segments = plan_segments(total_frames, segment_workers, keyframes)
+    
+    if len(segments) < 2:
+        return None
+    
+    print(f"⚡ Rendering {total_frames} frames in {len(segments)} parallel segments "
+          f"({'keyframe-aligned' if keyframes else 'frame-aligned'})")
+    
+    temp_dir = tempfile.mkdtemp(prefix="segments_", dir=os.path.dirname(os.path.abspath(output_path)))
+    
+    jobs = []
+    for index, (start, end) in enumerate(segments):
+        jobs.append({
+            'video_path': video_path,
+            'segment_path': os.path.join(temp_dir, f"segment_{index:04d}.mp4"),
+            'start': start,
+            'end': end,
+            'loop': loop,
+            'source_frames': source_frames,
+            'fps': fps,
+            'video_name': video_name or os.path.basename(video_path),
+            'text_settings': text_settings,
+            'template': template,
+            'template_mask': template_mask,
+            'blur_settings': blur_settings,
+            'canvas': canvas or DEFAULT_CANVAS
+        })
+    
+    cancel_token = get_cancel_token()
+    
+    try:
+        with ProcessPoolExecutor(max_workers=min(segment_workers, len(jobs)),
+                                 initializer=_init_segment_worker,
+                                 initargs=(cancel_token.get_process_event(),)) as executor:
+            frames_per_segment = []
+            for frames in executor.map(_render_segment, jobs):
+                frames_per_segment.append(frames)
+                get_progress_bus().frames(sum(frames_per_segment), total_frames)
+        
+        cancel_token.check()
+        
+        # A short segment (failed writer, early end of the source) would leave a gap
+        # or shift the timeline against the audio: render serially instead
+        for job, frames in zip(jobs, frames_per_segment):
+            expected = job['end'] - job['start']
+            if frames != expected:
+                print(f"❌ Segment {job['start']}-{job['end']} rendered {frames}/{expected} frames")
+                return None
+        
+        if not concat_segments([job['segment_path'] for job in jobs], output_path):
+            return None
+        
+        print(f"✅ Segment rendering completed: {sum(frames_per_segment)} frames")
+        return output_path
+    
+    except Exception as e:
+        print(f"❌ Segment rendering error: {e}")
+        return None
+    
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
@@ -0,0 +1,190 @@
+"""
+Stage Scheduler - Pipelined processing of a batch
+Each stage (render, encode, mux, ...) has its own worker pool. Jobs flow
+between stages through bounded queues, so while file N is being muxed,
+file N+1 can already be rendering. Per-stage utilisation is reported
+after the run to help size the pools for the machine.
+"""
+
+import os
+import queue
+import threading
+import time
+
+from utils.cancellation import ProcessingCancelled, get_cancel_token
+from utils.work_queue import get_work_queue
+from utils.progress_events import get_progress_bus
+from utils.timing import record
+
+# Queue marker telling a stage worker to exit
+_STOP = object()
+
+class Stage:
+    """One pipeline stage: function(job) -> job, run by workers threads."""
+    
+    def __init__(self, name, function, workers=1):
+        self.name = name
+        self.function = function
+        self.workers = max(1, int(workers))
+        self.jobs_done = 0
+        self.busy_seconds = 0.0
+
+class StageScheduler:
+    """
+    Runs job dicts through a list of stages.
+    A stage can finish a job early by setting job['done'] = True (remaining
+    stages are skipped). job['success'] holds the result of the job.
+    When the run is cancelled, queued jobs are dropped (their 'temp_output'
+    deleted) and run() raises ProcessingCancelled once all workers have exited.
+    In a distributed run (work queue active) a job is only started if this node
+    claims its 'output_path'; jobs claimed by other nodes are left out of the results.
+    File, stage and error events go to the active progress bus, keyed by the
+    output file name ('input_paths' of a job are probed for the ETA).
+    """
+    
+    def __init__(self, stages, queue_size=2):
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+        self.wall_seconds = 0.0
+        self.lock = threading.Lock()
+        self.work_queue = None
+        self.progress_bus = None
+    
+    def run(self, jobs, on_done=None):
+        """
+        Process all jobs, return finished jobs in completion order.
+        on_done(job) is called from the worker thread as each job finishes.
+        """
+        # First queue holds the whole batch, queues between stages are bounded
+        queues = [queue.Queue()] + [queue.Queue(maxsize=self.queue_size) for _ in self.stages[1:]]
+        results = []
+        cancel_token = get_cancel_token()
+        self.work_queue = get_work_queue()
+        self.progress_bus = get_progress_bus()
+        start_time = time.time()
+        
+        self.progress_bus.batch_started([
+            (os.path.basename(job['output_path']), job.get('input_paths', [])) for job in jobs
+        ])
+        
+        stage_threads = []
+        for index, stage in enumerate(self.stages):
+            output_queue = queues[index + 1] if index + 1 < len(queues) else None
+            threads = [
+                threading.Thread(
+                    target=self._worker,
+                    args=(stage, queues[index], output_queue, results, cancel_token, on_done, index == 0),
+                    name=f"{stage.name}-{n}",
+                    daemon=True
+                )
+                for n in range(stage.workers)
+            ]
+            for thread in threads:
+                thread.start()
+            stage_threads.append(threads)
+        
+        for job in jobs:
+            queues[0].put(job)
+        
+        # Shut stages down in order, each after its input is drained
+        for index, stage in enumerate(self.stages):
+            for _ in range(stage.workers):
+                queues[index].put(_STOP)
+            for thread in stage_threads[index]:
+                thread.join()
+        
+        self.wall_seconds = time.time() - start_time
+        cancel_token.check()
+        self.progress_bus.batch_finished(sum(1 for job in results if job.get('success')))
+        return results
+    
+    def _worker(self, stage, input_queue, output_queue, results, cancel_token, on_done, first_stage=False):
+        """Stage worker loop. The first stage claims jobs from the work queue and starts them."""
+        work_queue = self.work_queue
+        progress_bus = self.progress_bus
+        
+        while True:
+            job = input_queue.get()
+            if job is _STOP:
+                return
+            
+            if cancel_token.is_cancelled():
+                self._drop_job(job)
+                continue
+            
+            key = os.path.basename(job['output_path'])
+            if first_stage:
+                if work_queue is not None and not work_queue.claim(job['output_path']):
+                    continue
+                progress_bus.file_started(key)
+            
+            start_time = time.time()
+            try:
+                job = stage.function(job)
+            except ProcessingCancelled:
+                self._drop_job(job)
+                continue
+            except Exception as e:
+                print(f"❌ {stage.name} stage error: {e}")
+                progress_bus.error(f"{stage.name} stage error: {e}", key)
+                job['success'] = False
+                job['done'] = True
+            
+            elapsed = time.time() - start_time
+            job.setdefault('timings', {})[stage.name] = elapsed
+            with self.lock:
+                stage.jobs_done += 1
+                stage.busy_seconds += elapsed
+            progress_bus.stage_finished(key, stage.name, elapsed)
+            record(f"stage.{stage.name}", elapsed)
+            
+            if job.get('done') or output_queue is None:
+                with self.lock:
+                    results.append(job)
+                try:
+                    if on_done:
+                        on_done(job)
+                finally:
+                    # Finish the claim even if on_done raised, so its lease is not renewed forever
+                    if work_queue is not None:
+                        work_queue.finish(job['output_path'], job.get('success'), job['timings'])
+                progress_bus.file_finished(key, job.get('success'))
+            else:
+                output_queue.put(job)
+    
+    def _drop_job(self, job):
+        """Discard a job of a cancelled run, removing its intermediate file."""
+        temp_output = job.get('temp_output')
+        if temp_output and os.path.exists(temp_output):
+            try:
+                os.remove(temp_output)
+            except OSError:
+                pass
+    
+    def get_report(self):
+        """Per-stage utilisation: busy time / (wall time * workers)."""
+        report = []
+        for stage in self.stages:
+            capacity = self.wall_seconds * stage.workers
+            report.append({
+                'stage': stage.name,
+                'workers': stage.workers,
+                'jobs': stage.jobs_done,
+                'busy_seconds': round(stage.busy_seconds, 2),
+                'utilisation': round(stage.busy_seconds / capacity, 3) if capacity > 0 else 0.0
+            })
+        return report
+    
+    def print_report(self):
+        """Print per-stage utilisation."""
+        print(f"📊 Pipeline report ({self.wall_seconds:.1f}s wall time):")
+        for entry in self.get_report():
+            print(f"   {entry['stage']:<8} workers={entry['workers']} jobs={entry['jobs']} "
+                  f"busy={entry['busy_seconds']:.1f}s utilisation={entry['utilisation'] * 100:.0f}%")
+
+def get_stage_workers(gpu_settings, stage_name, default=1):
+    """Get worker count for a stage from settings (gpu_settings['<stage>_workers'])."""
+    try:
+        return max(1, int((gpu_settings or {}).get(f'{stage_name}_workers', default)))
+    except (TypeError, ValueError):
+        return default
@@ -126,10 +126,11 @@ def smart_text_wrap(text, draw, font, max_width, emoji_size=80):
     return lines
 
 def render_text_with_emoji_multiline(draw, lines, font, canvas_width, canvas_height, 
-                                   start_y, emoji_size=80, line_spacing=10):
+                                   start_y, emoji_size=80, line_spacing=10, margin=40):
     """
     Merender multiple lines text dengan emoji.
     Auto-detect jika text melebihi frame dan sesuaikan.
+    Margin mengikuti ukuran canvas (40px pada canvas 1080px).
     """
     emoji_pattern = get_emoji_pattern()
     rendered_lines = []
@@ -142,7 +143,7 @@ def render_text_with_emoji_multiline(draw, lines, font, canvas_width, canvas_hei
     # Auto-adjust jika melebihi frame
     if current_y + total_height > canvas_height:
         # Sesuaikan posisi Y agar text muat
-        current_y = max(10, canvas_height - total_height - 20)
+        current_y = max(margin // 4, canvas_height - total_height - margin // 2)
     
     for line in lines:
         if current_y + line_height > canvas_height:
@@ -155,9 +156,9 @@ def render_text_with_emoji_multiline(draw, lines, font, canvas_width, canvas_hei
         total_width = calculate_content_width(parts, draw, font, emoji_size)
         
         # Auto-adjust jika melebihi lebar frame
-        if total_width > canvas_width - 40:  # 40px margin
+        if total_width > canvas_width - margin:
             # Scale down emoji jika perlu
-            adjusted_emoji_size = min(emoji_size, int(emoji_size * (canvas_width - 40) / total_width))
+            adjusted_emoji_size = min(emoji_size, int(emoji_size * (canvas_width - margin) / total_width))
             total_width = calculate_content_width(parts, draw, font, adjusted_emoji_size)
         else:
             adjusted_emoji_size = emoji_size
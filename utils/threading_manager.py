@@ -7,6 +7,7 @@ import threading
 import queue
 import time
 from typing import Callable, Any, Optional
+from utils.cancellation import CancelToken, ProcessingCancelled, set_cancel_token
 
 class ThreadingManager:
     """Manages background threads for video processing."""
@@ -15,6 +16,7 @@ class ThreadingManager:
         self.gui_manager = gui_manager
         self.current_thread = None
         self.stop_event = threading.Event()
+        self.cancel_token = CancelToken()
         self.progress_queue = queue.Queue()
         self.result_queue = queue.Queue()
         
@@ -28,6 +30,9 @@ class ThreadingManager:
         self.stop_event.clear()
         self._clear_queues()
         
+        # Fresh cancellation token for this run
+        self.cancel_token = set_cancel_token(CancelToken())
+        
         # Create and start thread
         self.current_thread = threading.Thread(
             target=self._thread_wrapper,
@@ -48,9 +53,9 @@ class ThreadingManager:
         try:
             print("🚀 Starting background processing thread...")
             
-            # Add progress callback to kwargs if not present
+            # Add progress callback to kwargs if not present (queued for the Tk thread)
             if 'progress_callback' not in kwargs:
-                kwargs['progress_callback'] = self.update_progress
+                kwargs['progress_callback'] = ProgressCallback(self)
             
             # Execute the target function
             result = target_function(*args, **kwargs)
@@ -58,7 +63,12 @@ class ThreadingManager:
             # Put result in queue
             self.result_queue.put(('success', result))
             print("✅ Background processing completed successfully")
-            
+        
+        except ProcessingCancelled:
+            removed = self.cancel_token.cleanup()
+            print(f"🛑 Background processing cancelled ({removed} partial files removed)")
+            self.result_queue.put(('cancelled', None))
+        
         except Exception as e:
             print(f"❌ Background processing error: {e}")
             import traceback
@@ -120,6 +130,8 @@ class ThreadingManager:
                 if result_type == 'success':
                     self.gui_manager.update_progress(100, "✅ Processing completed successfully!")
                     self._show_success_message()
+                elif result_type == 'cancelled':
+                    self.gui_manager.update_progress(0, "🛑 Processing stopped")
                 else:
                     self.gui_manager.update_progress(0, "❌ Processing failed")
                     self._show_error_message(result_data)
@@ -168,20 +180,21 @@ class ThreadingManager:
             print(f"⚠️ Progress update error: {e}")
     
     def stop_processing(self):
-        """Stop current processing."""
+        """
+        Stop current processing without blocking.
+        The worker thread unwinds on its own; the progress monitor resets
+        the GUI once it has finished cleaning up.
+        """
         if self.current_thread and self.current_thread.is_alive():
             print("🛑 Stopping background processing...")
             self.stop_event.set()
+            self.cancel_token.cancel()
             
-            # Wait for thread to finish (with timeout)
-            self.current_thread.join(timeout=5.0)
-            
-            if self.current_thread.is_alive():
-                print("⚠️ Thread did not stop gracefully")
-            else:
-                print("✅ Background processing stopped")
+            if self.gui_manager:
+                self.gui_manager.update_progress(0, "🛑 Stopping...")
+            return
         
-        # Reset GUI state
+        # Nothing running, just reset GUI state
         if self.gui_manager:
             self.gui_manager.set_processing_state(False)
             self.gui_manager.update_progress(0, "Processing stopped")
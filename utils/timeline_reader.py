@@ -0,0 +1,268 @@
+"""
+Timeline Reader - Several videos read as one continuous video
+Narasi mode plays its matched clips back to back. Instead of concatenating
+them into a temporary file first (a full encode and decode), the reader opens
+the clips one after another and normalises every frame on the fly: frames are
+placed on a timeline at the highest clip fps (clips with a lower fps repeat
+frames by timestamp) and centered on a canvas of the largest clip size, like
+MoviePy's "compose" concatenation did.
+
+The output length of a narasi video is set by its narration, so the reader
+is bounded by max_duration: clips after that point are never opened, and
+when the clips are shorter than the narration the decoded frames of the first
+pass are kept (up to LOOP_CACHE_MAX_BYTES) and replayed for every loop.
+
+With an output canvas the timeline is normalised to it (frames scaled down to
+fit the canvas, clips resampled to the canvas fps). With a segment cache as
+well, clips that later outputs of the batch reuse (reuse_paths) are stored
+in it once read to the end, and every clip found in it is read from there,
+so later narasi outputs over the same clips read the normalised frames
+instead of decoding again.
+"""
+
+import os
+
+import cv2
+import numpy as np
+
+from utils.segment_cache import load_segment, SegmentWriter
+
+# Memory for decoded frames replayed when the timeline loops (above it, loops decode again)
+LOOP_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+
+class ConcatenatedVideoReader:
+    """
+    Reads the frames of video_paths in order, with the cv2.VideoCapture
+    read()/release() interface. rewind() restarts at the first clip (loop).
+    With max_duration (seconds) only the clips needed to fill it are used.
+    With canvas (CanvasSpec) frames are normalised to the canvas; with
+    segment_cache (utils.segment_cache) as well, clips are read from it and
+    the ones in reuse_paths are stored in it.
+    """
+    
+    def __init__(self, video_paths, max_duration=None, canvas=None, segment_cache=None, reuse_paths=()):
+        self.clips = []
+        seconds = 0.0
+        for path in video_paths:
+            if max_duration is not None and seconds >= max_duration:
+                print(f"⏩ Using {len(self.clips)}/{len(video_paths)} videos (enough for {max_duration:.2f}s)")
+                break
+            
+            cap = cv2.VideoCapture(path)
+            try:
+                fps = cap.get(cv2.CAP_PROP_FPS)
+                frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+                size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+            finally:
+                cap.release()
+            
+            if fps <= 0 or frame_count <= 0:
+                print(f"⚠️ Skipping unreadable video: {os.path.basename(path)}")
+                continue
+            self.clips.append({'path': path, 'fps': fps, 'frame_count': frame_count, 'size': size})
+            seconds += frame_count / fps
+        
+        if not self.clips:
+            raise ValueError("No readable videos to concatenate")
+        
+        self.fps = max(clip['fps'] for clip in self.clips)
+        self.size = (max(clip['size'][0] for clip in self.clips), max(clip['size'][1] for clip in self.clips))
+        
+        # Clips are centered on timeline_size, then scaled to fit the canvas (never up)
+        self.timeline_size = self.size
+        self.scale = 1.0
+        if canvas is not None:
+            self.fps = canvas.get_fps(self.fps)
+            self.scale = min(1.0, canvas.width / self.size[0], canvas.height / self.size[1])
+            self.size = (int(round(self.size[0] * self.scale)), int(round(self.size[1] * self.scale)))
+        
+        # Frames each clip occupies on the timeline (its duration at the timeline fps)
+        for clip in self.clips:
+            clip['timeline_frames'] = max(1, int(round(clip['frame_count'] / clip['fps'] * self.fps)))
+        
+        self.frame_count = sum(clip['timeline_frames'] for clip in self.clips)
+        self.duration = self.frame_count / self.fps
+        self.max_duration = max_duration
+        
+        # Normalised clips are shared through the segment cache
+        self.segment_cache = segment_cache if canvas is not None else None
+        if self.segment_cache is not None:
+            segment_spec = f"{self.timeline_size[0]}x{self.timeline_size[1]}|{self.size[0]}x{self.size[1]}|{self.fps!r}"
+            for clip in self.clips:
+                clip['segment_key'] = self.segment_cache.get_key(clip['path'], segment_spec)
+                clip['reused'] = clip['path'] in reuse_paths
+        self.segment = None
+        self.segment_writer = None
+        
+        # Timeline shorter than the output: keep the first pass for the loops if it fits
+        frame_bytes = self.size[0] * self.size[1] * 3
+        self.cache_enabled = (max_duration is not None and self.duration < max_duration
+                              and self.frame_count * frame_bytes <= LOOP_CACHE_MAX_BYTES)
+        self.cache = []
+        self.cache_complete = False
+        self.replay_index = None
+        
+        self.cap = None
+        self.rewind()
+    
+    def get_single_source(self):
+        """Path of the only clip if it needs no normalisation (can be read directly), else None."""
+        if (len(self.clips) == 1 and self.clips[0]['size'] == self.timeline_size
+                and self.clips[0]['fps'] == self.fps):
+            return self.clips[0]['path']
+        return None
+    
+    def _normalise(self, frame):
+        """Center frame on a black canvas of the timeline size (scaled to the output canvas)."""
+        height, width = frame.shape[:2]
+        if self.scale < 1.0:
+            width = max(1, int(round(width * self.scale)))
+            height = max(1, int(round(height * self.scale)))
+            frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+        if (width, height) == self.size:
+            return frame
+        
+        canvas = np.zeros((self.size[1], self.size[0], 3), dtype=np.uint8)
+        x = (self.size[0] - width) // 2
+        y = (self.size[1] - height) // 2
+        canvas[y:y + height, x:x + width] = frame
+        return canvas
+    
+    def _open_clip(self, clip):
+        """Open the cached segment of clip, or its video (stored in the cache while it is read if reused)."""
+        if clip.get('segment_key'):
+            self.segment = load_segment(self.segment_cache, clip['segment_key'])
+            if self.segment is not None:
+                return
+            if clip['reused']:
+                self.segment_writer = SegmentWriter(self.segment_cache, clip['segment_key'])
+        self.cap = cv2.VideoCapture(clip['path'])
+    
+    def _close_clip(self, completed):
+        """Close the current clip; its segment is only cached if it was read to the end."""
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+        if self.segment is not None:
+            self.segment.close()
+            self.segment = None
+        if self.segment_writer is not None:
+            if completed:
+                self.segment_writer.commit()
+            else:
+                self.segment_writer.abort()
+            self.segment_writer = None
+    
+    def _next_clip(self):
+        self._close_clip(completed=True)
+        self.clip_index += 1
+        self.timeline_index = 0
+        self.source_index = 0
+        self.frame = None
+    
+    def read(self):
+        """Next timeline frame: (True, frame), or (False, None) after the last clip."""
+        if self.replay_index is not None:
+            # Looping from the frames decoded in the first pass
+            if self.replay_index < len(self.cache):
+                self.replay_index += 1
+                return True, self.cache[self.replay_index - 1]
+            return False, None
+        
+        while self.clip_index < len(self.clips):
+            frame = self._read_clip_frame()
+            if frame is None:
+                self._next_clip()
+                continue
+            
+            if self.cache_enabled:
+                self.cache.append(frame)
+            return True, frame
+        
+        self.cache_complete = self.cache_enabled
+        return False, None
+    
+    def _read_clip_frame(self):
+        """Next timeline frame of the current clip, None when the clip is finished."""
+        clip = self.clips[self.clip_index]
+        if self.timeline_index >= clip['timeline_frames']:
+            return None
+        
+        if self.segment is None and self.cap is None:
+            self._open_clip(clip)
+        
+        if self.segment is not None:
+            if self.timeline_index >= len(self.segment):
+                return None
+            self.timeline_index += 1
+            return self.segment[self.timeline_index - 1]
+        
+        # Source frame shown at this timeline position
+        wanted = int(self.timeline_index * clip['fps'] / self.fps + 1e-6)
+        while self.source_index <= wanted:
+            ret, frame = self.cap.read()
+            if not ret:
+                break
+            self.frame = frame
+            self.source_index += 1
+        
+        # Clip has fewer frames than the container reported: a frame short is
+        # filled with the last frame, otherwise continue with the next clip
+        if self.frame is None or self.source_index < wanted:
+            return None
+        
+        self.timeline_index += 1
+        frame = self._normalise(self.frame)
+        if self.segment_writer is not None:
+            self.segment_writer.write(frame)
+        return frame
+    
+    def complete_segment(self):
+        """
+        Decode the rest of the clip being read into the segment cache, so later
+        outputs that stop in the same clip do not decode it again. Only done for
+        clips reused later in the batch (being stored), the partial segment of
+        any other clip is dropped.
+        """
+        if self.segment_writer is None:
+            return
+        while self._read_clip_frame() is not None:
+            pass
+        self._close_clip(completed=True)
+    
+    def rewind(self):
+        """Restart at the first frame of the first clip."""
+        self._close_clip(completed=False)
+        
+        if self.cache_complete:
+            self.replay_index = 0
+            return
+        
+        # First pass not finished: decode again from the start
+        self.cache = []
+        self.clip_index = 0
+        self.timeline_index = 0
+        self.source_index = 0
+        self.frame = None
+    
+    def release(self):
+        """Close the open clip and drop cached frames."""
+        self._close_clip(completed=False)
+        self.cache = []
+        self.cache_complete = False
+        self.replay_index = None
+    
+    def get_audio_clips(self):
+        """
+        Clips of the timeline with their duration on it, [(path, seconds), ...],
+        up to max_duration (for a 'clips' audio track of utils.audio_engine).
+        """
+        clips = []
+        remaining = self.duration if self.max_duration is None else min(self.duration, self.max_duration)
+        for clip in self.clips:
+            clip_duration = min(clip['timeline_frames'] / self.fps, remaining)
+            if clip_duration <= 0:
+                break
+            remaining -= clip_duration
+            clips.append((clip['path'], clip_duration))
+        return clips
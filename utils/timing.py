@@ -0,0 +1,196 @@
+"""
+Timing - Per-stage timing spans and profiling hooks
+Hot paths wrap their stages in spans:
+
+    with span("decode"):
+        ret, frame = cap.read()
+
+Outside a timing session span() returns a shared no-op context manager, so
+the instrumentation costs a global lookup per stage. Inside a session every
+span appends its duration (monotonic clock) to the samples of its stage; the
+session writes a JSON report with count, total, p50, p95 and max per stage
+and the frame rate of the job. A session can also run cProfile in every
+processing thread and dump the merged profile (view with pstats/snakeviz).
+
+Spans in segment worker processes are not collected (separate processes).
+"""
+
+import json
+import math
+import sys
+import time
+import threading
+from array import array
+from contextlib import contextmanager
+
+# Stage whose sample count is the number of rendered frames
+FRAME_STAGE = "frame"
+
+class _NullSpan:
+    """Span used when timing is disabled."""
+    
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ('samples', 'start')
+    
+    def __init__(self, samples):
+        self.samples = samples
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.samples.append(time.perf_counter() - self.start)
+        return False
+
+def _percentile(sorted_samples, fraction):
+    """Nearest-rank percentile of sorted samples."""
+    rank = math.ceil(fraction * len(sorted_samples))
+    return sorted_samples[min(len(sorted_samples), max(1, rank)) - 1]
+
+class TimingRecorder:
+    """Samples (seconds) per stage name. Appends are atomic under the GIL, so no lock is needed."""
+    
+    def __init__(self):
+        self.samples = {}
+        self.start_time = time.perf_counter()
+    
+    def get_samples(self, name):
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples.setdefault(name, array('d'))
+        return samples
+    
+    def get_report(self):
+        """Per-stage statistics (milliseconds) and job frame rate."""
+        wall_seconds = time.perf_counter() - self.start_time
+        stages = {}
+        for name, samples in sorted(self.samples.items()):
+            if not samples:
+                continue
+            ordered = sorted(samples)
+            total = sum(ordered)
+            stages[name] = {
+                'count': len(ordered),
+                'total_seconds': round(total, 3),
+                'mean_ms': round(total / len(ordered) * 1000, 3),
+                'p50_ms': round(_percentile(ordered, 0.50) * 1000, 3),
+                'p95_ms': round(_percentile(ordered, 0.95) * 1000, 3),
+                'max_ms': round(ordered[-1] * 1000, 3)
+            }
+        
+        frames = stages.get(FRAME_STAGE, {}).get('count', 0)
+        return {
+            'wall_seconds': round(wall_seconds, 3),
+            'frames': frames,
+            'fps': round(frames / wall_seconds, 2) if wall_seconds > 0 else 0.0,
+            'stages': stages
+        }
+    
+    def write_report(self, path):
+        """Write report as JSON."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.get_report(), f, indent=2)
+        print(f"⏱️ Timing report written: {path}")
+
+# Recorder of the current timing session (None = disabled)
+_active_recorder = None
+
+def span(name):
+    """Context manager timing one stage (no-op when no timing session is active)."""
+    recorder = _active_recorder
+    if recorder is None:
+        return _NULL_SPAN
+    return _Span(recorder.get_samples(name))
+
+def record(name, seconds):
+    """Add a duration measured elsewhere (e.g. scheduler stage times)."""
+    recorder = _active_recorder
+    if recorder is not None:
+        recorder.get_samples(name).append(seconds)
+
+def is_enabled():
+    """True inside a timing session."""
+    return _active_recorder is not None
+
+class ThreadProfiler:
+    """cProfile in the calling thread and every thread started while active, merged on stop."""
+    
+    def __init__(self):
+        self.profiles = []
+        self.lock = threading.Lock()
+    
+    def _new_profile(self):
+        import cProfile
+        
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+: only one profiler can be active at a time
+            return
+        with self.lock:
+            self.profiles.append(profile)
+    
+    def _thread_hook(self, frame, event, arg):
+        # First profile event of a new thread: replace this hook by a profiler
+        sys.setprofile(None)
+        self._new_profile()
+    
+    def start(self):
+        threading.setprofile(self._thread_hook)
+        self._new_profile()
+    
+    def stop(self, path):
+        """Stop profiling and dump merged stats to path."""
+        import pstats
+        
+        threading.setprofile(None)
+        with self.lock:
+            profiles = list(self.profiles)
+        if not profiles:
+            print("⚠️ No profile data collected")
+            return
+        
+        for profile in profiles:
+            profile.disable()
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(path)
+        print(f"🔬 Profile written: {path} ({len(profiles)} threads)")
+
+@contextmanager
+def timing_session(report_path=None, profile_path=None):
+    """
+    Collect spans while the block runs and write the report to report_path;
+    with profile_path, also profile the block (all threads) with cProfile.
+    Either path may be None.
+    """
+    global _active_recorder
+    
+    recorder = TimingRecorder() if report_path else None
+    profiler = ThreadProfiler() if profile_path else None
+    previous_recorder = _active_recorder
+    
+    _active_recorder = recorder
+    if profiler:
+        profiler.start()
+    try:
+        yield recorder
+    finally:
+        if profiler:
+            profiler.stop(profile_path)
+        _active_recorder = previous_recorder
+        if recorder:
+            recorder.write_report(report_path)
@@ -1,6 +1,7 @@
 import cv2
 import numpy as np
 from .green_screen_detection import create_green_screen_mask
+from .timing import span
 
 def fit_video_to_mask(video_frame, mask):
     """Menyesuaikan video frame dengan bentuk mask green screen."""
@@ -34,17 +35,20 @@ def process_frame_with_green_screen(background_frame, video_frame, template_mask
     PENTING: Text overlay harus ditambahkan SETELAH fungsi ini dipanggil
     agar text berada di lapisan paling depan.
     """
-    mask = create_green_screen_mask(background_frame)
-    fitted_video, bbox, contour_mask = fit_video_to_mask(video_frame, mask)
+    with span("mask"):
+        mask = create_green_screen_mask(background_frame)
+    with span("fit"):
+        fitted_video, bbox, contour_mask = fit_video_to_mask(video_frame, mask)
     x, y, w, h = bbox
     
-    result = background_frame.copy()
-    
-    if fitted_video is not None and contour_mask is not None:
-        mask_3ch = cv2.cvtColor(contour_mask, cv2.COLOR_GRAY2BGR).astype(np.float32) / 255.0
-        roi = result[y:y+h, x:x+w]
-        blended_roi = (fitted_video * mask_3ch + roi * (1 - mask_3ch)).astype(np.uint8)
-        result[y:y+h, x:x+w] = blended_roi
+    with span("blend"):
+        result = background_frame.copy()
+        
+        if fitted_video is not None and contour_mask is not None:
+            mask_3ch = cv2.cvtColor(contour_mask, cv2.COLOR_GRAY2BGR).astype(np.float32) / 255.0
+            roi = result[y:y+h, x:x+w]
+            blended_roi = (fitted_video * mask_3ch + roi * (1 - mask_3ch)).astype(np.uint8)
+            result[y:y+h, x:x+w] = blended_roi
     
     # CATATAN: Text overlay TIDAK ditambahkan di sini
     # Text harus ditambahkan di lapisan terakhir agar berada di depan
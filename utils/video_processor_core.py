@@ -11,6 +11,11 @@ from utils.video_processing import process_frame_with_green_screen
 from utils.blur_processing import process_blur_frame
 from utils.file_operations import get_video_properties, add_audio_to_video
 from utils.text_rendering import smart_text_wrap, render_text_with_emoji_multiline
+from utils.segment_rendering import get_segment_workers, render_video_in_segments
+from utils.canvas import DEFAULT_CANVAS, CanvasSpec
+from utils.cancellation import get_cancel_token
+from utils.progress_events import get_progress_bus
+from utils.timing import FRAME_STAGE, span
 
 class VideoProcessorCore:
     """Core video processing functionality."""
@@ -19,19 +24,32 @@ class VideoProcessorCore:
         self.gui_manager = gui_manager
     
     def process_single_video(self, video_path, template, template_mask, output_path, 
-                           text_settings, gpu_settings):
+                           text_settings, gpu_settings, canvas=None):
         """Process a single video with green screen."""
         print(f"🎬 Processing: {os.path.basename(video_path)}")
         
+        canvas = canvas or DEFAULT_CANVAS
+        cancel_token = get_cancel_token()
         cap = cv2.VideoCapture(video_path)
         fps, width, height = get_video_properties(video_path)
+        output_fps = canvas.get_fps(fps)
         
         # Create temporary output
-        temp_output = output_path.replace('.mp4', '_temp.mp4')
+        temp_output = cancel_token.track(output_path.replace('.mp4', '_temp.mp4'))
+        
+        # Long inputs can be rendered in parallel segments
+        segment_workers = get_segment_workers(gpu_settings)
+        if segment_workers > 1 and output_fps == fps:
+            cap.release()
+            if render_video_in_segments(video_path, temp_output, fps, segment_workers, text_settings,
+                                        template=template, template_mask=template_mask,
+                                        canvas=canvas):
+                return temp_output
+            cap = cv2.VideoCapture(video_path)
         
         # Setup video writer
         fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(temp_output, fourcc, fps, (1080, 1920))
+        out = cv2.VideoWriter(temp_output, fourcc, output_fps, canvas.size)
         
         if not out.isOpened():
             print(f"❌ Could not create output file: {temp_output}")
@@ -41,34 +59,33 @@ class VideoProcessorCore:
         frame_count = 0
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
         video_name = os.path.basename(video_path)
+        progress_bus = get_progress_bus()
         
         try:
             while True:
-                ret, frame = cap.read()
+                cancel_token.check()
+                with span("decode"):
+                    ret, frame = cap.read()
                 if not ret:
                     break
                 
-                # Process frame with green screen
-                processed_frame = process_frame_with_green_screen(template, frame, template_mask)
-                
-                # Add text overlay if enabled (TEXT DI LAPISAN PALING DEPAN)
-                if text_settings['enabled']:
-                    processed_frame = self.add_text_overlay(processed_frame, video_name, text_settings)
-                
-                # Ensure frame is correct size
-                if processed_frame.shape[:2] != (1920, 1080):
-                    processed_frame = cv2.resize(processed_frame, (1080, 1920))
-                
-                out.write(processed_frame)
+                # Drop/duplicate frames when canvas fps differs from source fps
+                repeats = canvas.output_repeats(frame_count, fps)
                 frame_count += 1
+                if repeats == 0:
+                    continue
                 
-                # Update progress
-                if self.gui_manager and frame_count % 30 == 0:
-                    progress = (frame_count / total_frames) * 100
-                    self.gui_manager.update_progress(
-                        progress, 
-                        f"Processing {video_name}: {frame_count}/{total_frames} frames"
+                with span(FRAME_STAGE):
+                    processed_frame = self.render_frame(
+                        frame, video_name, text_settings,
+                        template=template, template_mask=template_mask, canvas=canvas
                     )
+                with span("write"):
+                    for _ in range(repeats):
+                        out.write(processed_frame)
+                
+                # Update progress (coalesced by the bus, delivered off this thread)
+                progress_bus.frames(frame_count, total_frames)
         
         except Exception as e:
             print(f"❌ Error processing video: {e}")
@@ -82,19 +99,31 @@ class VideoProcessorCore:
         return temp_output
     
     def process_single_video_blur(self, video_path, output_path, blur_settings, 
-                                text_settings, gpu_settings):
+                                text_settings, gpu_settings, canvas=None):
         """Process a single video with blur background."""
         print(f"🌀 Processing blur: {os.path.basename(video_path)}")
         
+        canvas = canvas or DEFAULT_CANVAS
+        cancel_token = get_cancel_token()
         cap = cv2.VideoCapture(video_path)
         fps, width, height = get_video_properties(video_path)
+        output_fps = canvas.get_fps(fps)
         
         # Create temporary output
-        temp_output = output_path.replace('.mp4', '_temp.mp4')
+        temp_output = cancel_token.track(output_path.replace('.mp4', '_temp.mp4'))
+        
+        # Long inputs can be rendered in parallel segments
+        segment_workers = get_segment_workers(gpu_settings)
+        if segment_workers > 1 and output_fps == fps:
+            cap.release()
+            if render_video_in_segments(video_path, temp_output, fps, segment_workers, text_settings,
+                                        blur_settings=blur_settings, canvas=canvas):
+                return temp_output
+            cap = cv2.VideoCapture(video_path)
         
         # Setup video writer
         fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(temp_output, fourcc, fps, (1080, 1920))
+        out = cv2.VideoWriter(temp_output, fourcc, output_fps, canvas.size)
         
         if not out.isOpened():
             print(f"❌ Could not create output file: {temp_output}")
@@ -104,40 +133,32 @@ class VideoProcessorCore:
         frame_count = 0
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
         video_name = os.path.basename(video_path)
+        progress_bus = get_progress_bus()
         
         try:
             while True:
-                ret, frame = cap.read()
+                cancel_token.check()
+                with span("decode"):
+                    ret, frame = cap.read()
                 if not ret:
                     break
                 
-                # Process frame with blur
-                processed_frame = process_blur_frame(
-                    frame,
-                    blur_settings['crop_top'],
-                    blur_settings['crop_bottom'],
-                    blur_settings['video_x_position'],
-                    blur_settings['video_y_position']
-                )
-                
-                # Add text overlay if enabled (TEXT DI LAPISAN PALING DEPAN)
-                if text_settings['enabled']:
-                    processed_frame = self.add_text_overlay(processed_frame, video_name, text_settings)
-                
-                # Ensure frame is correct size
-                if processed_frame.shape[:2] != (1920, 1080):
-                    processed_frame = cv2.resize(processed_frame, (1080, 1920))
-                
-                out.write(processed_frame)
+                # Drop/duplicate frames when canvas fps differs from source fps
+                repeats = canvas.output_repeats(frame_count, fps)
                 frame_count += 1
+                if repeats == 0:
+                    continue
                 
-                # Update progress
-                if self.gui_manager and frame_count % 30 == 0:
-                    progress = (frame_count / total_frames) * 100
-                    self.gui_manager.update_progress(
-                        progress, 
-                        f"Processing {video_name}: {frame_count}/{total_frames} frames"
+                with span(FRAME_STAGE):
+                    processed_frame = self.render_frame(
+                        frame, video_name, text_settings, blur_settings=blur_settings, canvas=canvas
                     )
+                with span("write"):
+                    for _ in range(repeats):
+                        out.write(processed_frame)
+                
+                # Update progress (coalesced by the bus, delivered off this thread)
+                progress_bus.frames(frame_count, total_frames)
         
         except Exception as e:
             print(f"❌ Error processing blur video: {e}")
@@ -150,44 +171,81 @@ class VideoProcessorCore:
         print(f"✅ Blur processing completed: {frame_count} frames")
         return temp_output
     
-    def add_text_overlay(self, frame, video_name, text_settings):
-        """Add text overlay to frame."""
+    def render_frame(self, frame, video_name, text_settings, template=None,
+                     template_mask=None, blur_settings=None, canvas=None):
+        """Render one output frame (green screen if template given, otherwise blur)."""
+        canvas = canvas or DEFAULT_CANVAS
+        
+        if template is not None:
+            processed_frame = process_frame_with_green_screen(template, frame, template_mask)
+        else:
+            processed_frame = process_blur_frame(
+                frame,
+                blur_settings['crop_top'],
+                blur_settings['crop_bottom'],
+                blur_settings['video_x_position'],
+                blur_settings['video_y_position'],
+                canvas.width,
+                canvas.height
+            )
+        
+        # Ensure frame is correct size
+        if processed_frame.shape[:2] != canvas.shape:
+            with span("resize"):
+                processed_frame = cv2.resize(processed_frame, canvas.size)
+        
+        # Add text overlay if enabled (TEXT DI LAPISAN PALING DEPAN)
+        if text_settings and text_settings['enabled']:
+            with span("text"):
+                processed_frame = self.add_text_overlay(processed_frame, video_name, text_settings, canvas)
+        
+        return processed_frame
+    
+    def add_text_overlay(self, frame, video_name, text_settings, canvas=None):
+        """Add text overlay to frame (layout scaled from the 1080x1920 reference canvas)."""
         try:
+            canvas = canvas or CanvasSpec.for_frame(frame)
             pil_image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
             draw = ImageDraw.Draw(pil_image)
             
+            # Scale font, emoji and margins to the canvas
+            font_size = canvas.scaled(text_settings['size'])
+            emoji_size = canvas.scaled(80)
+            margin = canvas.scaled(40)
+            line_spacing = canvas.scaled(10)
+            
             # Load font
             try:
                 font_file = self.get_font_file(text_settings['font'])
-                font = ImageFont.truetype(font_file, text_settings['size'])
-            except:
+                font = ImageFont.truetype(font_file, font_size)
+            except Exception:
                 font = ImageFont.load_default()
             
             # Prepare text (remove file extension and replace underscores)
             video_name_text = os.path.splitext(video_name)[0].replace("_", " ")
             
             # Calculate available text area
-            max_text_width = 1080 - 80  # 40px margin on each side
+            max_text_width = canvas.width - 2 * margin  # margin on each side
             
             # Auto-wrap text based on frame width
-            lines = smart_text_wrap(video_name_text, draw, font, max_text_width, emoji_size=80)
+            lines = smart_text_wrap(video_name_text, draw, font, max_text_width, emoji_size=emoji_size)
             
             # Calculate position based on settings
             x_percent = text_settings['x_position'] / 100
             y_percent = text_settings['y_position'] / 100
             
             # Calculate total text height
-            line_height = text_settings['size'] + 10
+            line_height = font_size + line_spacing
             total_text_height = len(lines) * line_height
             
             # Y position based on percentage, with auto-adjustment
-            base_y = int(y_percent * (1920 - total_text_height - 40))
-            base_y = max(20, min(base_y, 1920 - total_text_height - 20))
+            base_y = int(y_percent * (canvas.height - total_text_height - margin))
+            base_y = max(margin // 2, min(base_y, canvas.height - total_text_height - margin // 2))
             
             # Render multiline text with emoji
             rendered_lines = render_text_with_emoji_multiline(
-                draw, lines, font, 1080, 1920, 
-                base_y, emoji_size=80, line_spacing=10
+                draw, lines, font, canvas.width, canvas.height, 
+                base_y, emoji_size=emoji_size, line_spacing=line_spacing, margin=margin
             )
             
             # Get text color from settings
@@ -198,7 +256,7 @@ class VideoProcessorCore:
                 for item_type, item, x_offset in line_data['items']:
                     if item_type == 'emoji':
                         # Position emoji adjusted to font height
-                        emoji_y = line_data['y'] + (text_settings['size'] - line_data['emoji_size']) // 2
+                        emoji_y = line_data['y'] + (font_size - line_data['emoji_size']) // 2
                         pil_image.paste(item, (line_data['x_start'] + x_offset, emoji_y), item)
                     elif item_type == 'text':
                         # Draw text with selected color
@@ -2,10 +2,12 @@
 Video Processor Main - Main processor class that coordinates everything
 """
 
-import tkinter.messagebox as messagebox
 from utils.threading_manager import ThreadingManager, ProgressCallback
 from utils.video_processor_core import VideoProcessorCore
 from utils.video_processor_modes import VideoProcessorModes
+from utils.canvas import get_canvas
+from utils.job_settings import validate_settings
+from utils.progress_events import progress_session
 
 class VideoProcessor:
     """Main video processor that coordinates all processing modes."""
@@ -18,6 +20,8 @@ class VideoProcessor:
     
     def process_videos_bulk(self):
         """Main processing function called by GUI."""
+        import tkinter.messagebox as messagebox
+        
         try:
             if not self.gui_manager:
                 print("❌ No GUI manager available")
@@ -68,15 +72,23 @@ class VideoProcessor:
     
     def _process_in_background(self, settings, progress_callback=None):
         """Process videos in background thread."""
+        return self.process_settings(settings, progress_callback)
+    
+    def process_settings(self, settings, progress_callback=None, subscribers=()):
+        """
+        Run processing for validated settings in the calling thread (GUI thread wrapper and CLI).
+        Progress events go to subscribers, progress updates to progress_callback(progress, status);
+        both are called from the progress dispatcher thread, never from the render threads.
+        """
+        with progress_session(subscribers, progress_callback):
+            return self._process_mode(settings)
+    
+    def _process_mode(self, settings):
+        """Dispatch settings to the processing mode."""
         mode = settings['mode']
         
         print(f"🚀 Starting bulk processing in {mode} mode...")
         
-        # Create progress callback if provided
-        if progress_callback:
-            # Inject progress callback into modes
-            self.modes.progress_callback = progress_callback
-        
         # Process based on mode
         if mode == "greenscreen":
             return self.modes.process_greenscreen_mode(settings)
@@ -96,45 +108,7 @@ class VideoProcessor:
     
     def validate_settings(self, settings):
         """Validate settings before processing."""
-        mode = settings['mode']
-        
-        # Common validations
-        if not settings.get('text_settings'):
-            return False, "Text settings not found"
-        
-        if not settings.get('gpu_settings'):
-            return False, "GPU settings not found"
-        
-        # Mode-specific validations
-        if mode in ["greenscreen", "blur"]:
-            if not settings.get('folder_path'):
-                return False, "No video folder selected"
-        
-        elif mode == "narasi":
-            if not settings.get('folder_path'):
-                return False, "No video folder selected"
-            narasi_settings = settings.get('narasi_settings', {})
-            if not narasi_settings.get('audio_folder_path'):
-                return False, "No audio folder selected for narasi mode"
-            if not settings.get('template_info', {}).get('path'):
-                return False, "No template selected"
-        
-        elif mode == "dual_greenscreen":
-            folder_paths = settings.get('folder_paths', {})
-            if not folder_paths.get('folder1') or not folder_paths.get('folder2'):
-                return False, "Both video folders must be selected"
-            if not settings.get('template_info', {}).get('path'):
-                return False, "No template selected"
-            
-            # Validate dual green screen template
-            from utils.dual_greenscreen_detection import validate_dual_green_screen_template
-            template_path = settings.get('template_info', {}).get('path')
-            if template_path:
-                is_valid, msg = validate_dual_green_screen_template(template_path)
-                if not is_valid:
-                    return False, f"Template validation failed: {msg}"
-        
-        return True, "Settings valid"
+        return validate_settings(settings)
     
     def get_processing_summary(self, settings):
         """Get a summary of what will be processed."""
@@ -181,4 +155,8 @@ class VideoProcessor:
         else:
             summary += "GPU Acceleration: Disabled\n"
         
+        # Output canvas
+        canvas = get_canvas(settings)
+        summary += f"Output Canvas: {canvas.width}x{canvas.height} @ {canvas.fps or 'source'} fps\n"
+        
         return summary
\ No newline at end of file
@@ -3,7 +3,8 @@ Video Processor Modes - Specific processing modes (Narasi, Dual, etc.)
 """
 
 import os
-from utils.file_operations import get_all_media_files, is_gif_file, is_image_file
+from utils.file_operations import (get_all_media_files, is_gif_file, is_image_file,
+                                   get_slot_sources, get_slot_input_files)
 from utils.gif_processing import process_gif_greenscreen, process_gif_blur
 from utils.narasi_processing import process_narasi_mode
 from utils.dual_greenscreen_processing import (
@@ -11,10 +12,20 @@ from utils.dual_greenscreen_processing import (
     process_dual_greenscreen_gif,
     process_dual_greenscreen_image,
     get_template_for_processing,
-    process_dual_greenscreen_video_auto
+    process_multi_greenscreen_video
 )
 from utils.green_screen_detection import create_green_screen_mask
-from utils.dual_greenscreen_detection import detect_dual_green_screen_areas
+from utils.dual_greenscreen_detection import (
+    detect_dual_green_screen_areas,
+    detect_green_screen_slots,
+    DualCompositePlan
+)
+from utils.canvas import get_canvas
+from utils.music_planner import plan_music, order_by_track, get_music_settings, MUSIC_POLICIES
+from utils.stage_scheduler import Stage, StageScheduler, get_stage_workers
+from utils.cancellation import get_cancel_token
+from utils.render_manifest import get_manifest, get_render_settings, manifest_batch
+from utils.segment_cache import get_segment_cache
 import cv2
 
 class VideoProcessorModes:
@@ -23,7 +34,6 @@ class VideoProcessorModes:
     def __init__(self, core_processor, gui_manager=None):
         self.core = core_processor
         self.gui_manager = gui_manager
-        self.progress_callback = None  # Will be set by threading manager
     
     def process_narasi_mode(self, settings):
         """Process narasi mode."""
@@ -73,7 +83,9 @@ class VideoProcessorModes:
                 audio_mode=narasi_settings.get('audio_mode', 'narasi_only'),
                 narasi_volume=narasi_settings.get('narasi_volume', 100),
                 original_volume=narasi_settings.get('original_volume', 30),
-                progress_callback=self.progress_callback
+                canvas=get_canvas(settings),
+                manifest=get_manifest(output_folder, output_settings),
+                segment_cache=get_segment_cache(narasi_settings)
             )
             
             if success:
@@ -110,24 +122,48 @@ class VideoProcessorModes:
             print("❌ No template selected")
             return False
         
+        # Inputs: folder1, folder2, ... (folders or playlists), one per template slot
+        slot_sources = get_slot_sources(folder_paths)
+        slot_settings = settings.get('slot_settings') or {}
+        assignment = slot_settings.get('assignment', "top_to_bottom")
+        
         # Get files from both folders
         try:
             # Get template and create mask
             # Check if template has dual green screen areas
             template_path = template_info['path']
             template = get_template_for_processing(template_path)
-            template_resized = cv2.resize(template, (1080, 1920))
-            
-            # Detect dual green screen areas
-            dual_areas = detect_dual_green_screen_areas(template_resized)
+            canvas = get_canvas(settings)
+            template_resized = cv2.resize(template, canvas.size)
+            
+            # Slots, masks and background are computed once and shared by every output
+            if len(slot_sources) > 2 or assignment != "top_to_bottom":
+                # N-slot template (3- and 4-up grids) or explicit slot assignment
+                slots = detect_green_screen_slots(
+                    template_resized, len(slot_sources), assignment, slot_settings.get('slot_map')
+                )
+                if len(slots) >= 2:
+                    if len(slots) < len(slot_sources):
+                        unused = ", ".join(key for key, _ in slot_sources[len(slots):])
+                        print(f"⚠️ Template has {len(slots)} slots, ignoring inputs: {unused}")
+                        slot_sources = slot_sources[:len(slots)]
+                    print(f"🎬🎬 Auto-detected {len(slots)}-slot green screen template!")
+                    plan = DualCompositePlan(template_resized, slots)
+                    return self._process_dual_auto_mode(settings, plan, slot_sources)
+                dual_areas = None
+            else:
+                # Detect dual green screen areas
+                dual_areas = detect_dual_green_screen_areas(template_resized)
             
             if dual_areas is not None:
                 print("🎬🎬 Auto-detected dual green screen template!")
-                return self._process_dual_auto_mode(settings, dual_areas)
+                plan = DualCompositePlan.from_dual_areas(template_resized, dual_areas)
+                return self._process_dual_auto_mode(settings, plan, slot_sources)
             else:
                 print("🎬 Single green screen template detected, using legacy mode")
                 template_mask = create_green_screen_mask(template_resized)
-                return self._process_dual_legacy_mode(settings, template_resized, template_mask)
+                plan = DualCompositePlan.from_template(template_resized)
+                return self._process_dual_legacy_mode(settings, template_resized, template_mask, plan)
             
         except Exception as e:
             print(f"❌ Dual Green Screen mode error: {e}")
@@ -135,80 +171,98 @@ class VideoProcessorModes:
             traceback.print_exc()
             return False
     
-    def _process_dual_auto_mode(self, settings, dual_areas):
-        """Process dual green screen with auto-detected areas."""
+    def _process_dual_auto_mode(self, settings, plan, slot_sources):
+        """
+        Process dual green screen with auto-detected areas (plan: DualCompositePlan
+        of the template, one slot per (key, folder or playlist) in slot_sources).
+        """
         print("🎬🎬 Processing with auto-detected dual green screen areas...")
         
-        folder_paths = settings['folder_paths']
         template_info = settings['template_info']
         text_settings = settings['text_settings']
         audio_settings = settings['audio_settings']
         output_settings = settings['output_settings']
         gpu_settings = settings['gpu_settings']
+        slot_settings = settings.get('slot_settings') or {}
+        canvas = get_canvas(settings)
         
-        # Get files from both folders
-        from utils.file_operations import get_all_media_files
-        
-        folder1_files = get_all_media_files(folder_paths['folder1'])
-        folder2_files = get_all_media_files(folder_paths['folder2'])
+        # Get files from every slot input
+        slot_files = [get_slot_input_files(source) for _, source in slot_sources]
         
-        if not folder1_files or not folder2_files:
-            print("❌ Both folders must contain media files")
+        if not all(slot_files):
+            print("❌ Every slot input must contain media files")
             return False
         
-        print(f"📹 Folder 1: {len(folder1_files)} files")
-        print(f"📹 Folder 2: {len(folder2_files)} files")
+        for number, files in enumerate(slot_files, 1):
+            print(f"📹 Folder {number}: {len(files)} files")
         
         # Determine output folder
         if output_settings['custom_enabled'] and output_settings['custom_folder']:
             output_folder = output_settings['custom_folder']
         else:
-            output_folder = folder_paths['folder1']
+            first_source = slot_sources[0][1]
+            output_folder = first_source if os.path.isdir(first_source) else os.path.dirname(os.path.abspath(first_source))
         
         from utils.file_operations import create_output_folder
         output_folder = create_output_folder(output_folder, "dual_auto_greenscreen_output")
         
-        # Process pairs of videos
-        successful_count = 0
-        max_files = max(len(folder1_files), len(folder2_files))
-        
-        for i in range(max_files):
-            if self.progress_callback:
-                overall_progress = (i / max_files) * 100
-                self.progress_callback(
-                    overall_progress, 
-                    f"Processing pair {i+1}/{max_files}"
-                )
-            
-            # Get files (cycle through if one folder has fewer files)
-            file1 = folder1_files[i % len(folder1_files)]
-            file2 = folder2_files[i % len(folder2_files)]
-            
-            file1_path = os.path.join(folder_paths['folder1'], file1)
-            file2_path = os.path.join(folder_paths['folder2'], file2)
-            
-            # Create output filename
-            base_name1 = os.path.splitext(file1)[0]
-            base_name2 = os.path.splitext(file2)[0]
-            output_name = f"dual_auto_{base_name1}_{base_name2}.mp4"
-            output_path = os.path.join(output_folder, output_name)
+        # Process groups of videos (one per slot)
+        max_files = max(len(files) for files in slot_files)
+        
+        # Get files (cycle through if a folder has fewer files)
+        groups = [
+            tuple(files[i % len(files)] for files in slot_files)
+            for i in range(max_files)
+        ]
+        
+        def describe_group(group):
+            """Output path and input files of a group."""
+            base_names = [os.path.splitext(os.path.basename(path))[0] for path in group]
+            output_name = f"dual_auto_{'_'.join(base_names)}.mp4"
+            return os.path.join(output_folder, output_name), list(group)
+        
+        # Skip groups rendered before with the same inputs and settings
+        manifest = get_manifest(output_folder, output_settings)
+        render_settings = get_render_settings(
+            "dual_auto", template_info['path'], text_settings, audio_settings, canvas,
+            **({'slot_settings': slot_settings} if slot_settings.get('assignment', "top_to_bottom") != "top_to_bottom" else {})
+        )
+        groups, manifest_entries, skipped_count = self._filter_unchanged(
+            groups, describe_group, manifest, render_settings
+        )
+        
+        # Assign background music for the whole batch
+        work_items = self._plan_background_music(groups, audio_settings)
+        
+        def process_group(job):
+            """Render and mux one group (whole job in one stage)."""
+            group = job['item']
+            output_path = job['output_path']
+            group_name = " + ".join(os.path.basename(path) for path in group)
             
             try:
-                # Process both videos together
-                success = process_dual_greenscreen_video_auto(
-                    file1_path, file2_path, template_info['path'],
-                    output_path, text_settings, audio_settings, gpu_settings
+                # Process all videos together in one pass
+                success = process_multi_greenscreen_video(
+                    list(group), output_path, text_settings, job['audio_settings'], gpu_settings, canvas, plan
                 )
                 
                 if success:
-                    successful_count += 1
-                    print(f"✅ Processed pair: {file1} + {file2}")
+                    print(f"✅ Processed pair: {group_name}")
                 else:
-                    print(f"❌ Failed pair: {file1} + {file2}")
+                    print(f"❌ Failed pair: {group_name}")
             
             except Exception as e:
-                print(f"❌ Error processing pair {file1} + {file2}: {e}")
-                continue
+                print(f"❌ Error processing pair {group_name}: {e}")
+                success = False
+            
+            job['success'] = success
+            return job
+        
+        with manifest_batch(manifest):
+            successful_count = skipped_count + self._run_single_stage(
+                work_items, process_group, gpu_settings, describe_group,
+                self._record_rendered(manifest, manifest_entries)
+            )
         
         print(f"🎬🎬 Dual Auto Green Screen processing completed!")
         print(f"✅ Successfully processed: {successful_count}/{max_files} pairs")
@@ -216,8 +270,8 @@ class VideoProcessorModes:
         
         return successful_count > 0
     
-    def _process_dual_legacy_mode(self, settings, template, template_mask):
-        """Process dual green screen with legacy single-area mode."""
+    def _process_dual_legacy_mode(self, settings, template, template_mask, plan=None):
+        """Process dual green screen with legacy single-area mode (plan: DualCompositePlan of the template)."""
         print("🎬 Processing with legacy dual green screen mode...")
         
         folder_paths = settings['folder_paths']
@@ -226,16 +280,13 @@ class VideoProcessorModes:
         audio_settings = settings['audio_settings']
         output_settings = settings['output_settings']
         gpu_settings = settings['gpu_settings']
+        canvas = get_canvas(settings)
         
         # Get all files to process (original logic)
         try:
             # Get all files to process
-            from gui.dual_video_selection import DualVideoSelection
-            dual_selection = DualVideoSelection(None)
-            dual_selection.folder1_path = folder_paths['folder1']
-            dual_selection.folder2_path = folder_paths['folder2']
-            
-            files_to_process = dual_selection.get_files_to_process()
+            from utils.file_operations import get_dual_files_to_process
+            files_to_process = get_dual_files_to_process(folder_paths['folder1'], folder_paths['folder2'])
             
             if not files_to_process:
                 print("❌ No files found to process")
@@ -254,23 +305,33 @@ class VideoProcessorModes:
             output_folder = create_output_folder(output_folder, "dual_greenscreen_output")
             
             # Process each file
-            successful_count = 0
             total_files = len(files_to_process)
             
-            for i, (folder_path, file_name, video_source) in enumerate(files_to_process):
-                if self.progress_callback:
-                    overall_progress = (i / total_files) * 100
-                    self.progress_callback(
-                        overall_progress, 
-                        f"Processing file {i+1}/{total_files}: {file_name}"
-                    )
-                
-                file_path = os.path.join(folder_path, file_name)
+            def describe_file(item):
+                """Output path (always MP4) and input file of an item."""
+                folder_path, file_name, video_source = item
                 output_path = os.path.join(output_folder, f"dual_{file_name}")
+                return os.path.splitext(output_path)[0] + '.mp4', [os.path.join(folder_path, file_name)]
+            
+            # Skip files rendered before with the same inputs and settings
+            manifest = get_manifest(output_folder, output_settings)
+            render_settings = get_render_settings(
+                "dual_legacy", template_info['path'], text_settings, audio_settings, canvas
+            )
+            files_to_process, manifest_entries, skipped_count = self._filter_unchanged(
+                files_to_process, describe_file, manifest, render_settings
+            )
+            
+            # Assign background music for the whole batch
+            work_items = self._plan_background_music(files_to_process, audio_settings)
+            
+            def process_file(job):
+                """Render and mux one file (whole job in one stage)."""
+                folder_path, file_name, video_source = job['item']
+                file_audio_settings = job['audio_settings']
+                output_path = job['output_path']
                 
-                # Ensure output is MP4
-                if not output_path.lower().endswith('.mp4'):
-                    output_path = os.path.splitext(output_path)[0] + '.mp4'
+                file_path = os.path.join(folder_path, file_name)
                 
                 try:
                     if is_gif_file(file_path):
@@ -278,32 +339,40 @@ class VideoProcessorModes:
                         success = process_dual_greenscreen_gif(
                             file_path, video_source, template_info['path'], 
                             template_mask, output_path, text_settings, 
-                            audio_settings, gpu_settings
+                            file_audio_settings, gpu_settings, canvas, plan
                         )
                     elif is_image_file(file_path):
                         # Process Image -> MP4
                         success = process_dual_greenscreen_image(
                             file_path, video_source, template_info['path'], 
                             template_mask, output_path, text_settings, 
-                            audio_settings, gpu_settings
+                            file_audio_settings, gpu_settings, canvas, plan
                         )
                     else:
                         # Process Video -> MP4
                         success = process_dual_greenscreen_video(
                             file_path, video_source, template_info['path'], 
                             template_mask, output_path, text_settings, 
-                            audio_settings, gpu_settings
+                            file_audio_settings, gpu_settings, canvas, plan
                         )
                     
                     if success:
-                        successful_count += 1
                         print(f"✅ Processed: {file_name}")
                     else:
                         print(f"❌ Failed: {file_name}")
                 
                 except Exception as e:
                     print(f"❌ Error processing {file_name}: {e}")
-                    continue
+                    success = False
+                
+                job['success'] = success
+                return job
+            
+            with manifest_batch(manifest):
+                successful_count = skipped_count + self._run_single_stage(
+                    work_items, process_file, gpu_settings, describe_file,
+                    self._record_rendered(manifest, manifest_entries)
+                )
             
             print(f"🎬🎬 Dual Green Screen processing completed!")
             print(f"✅ Successfully processed: {successful_count}/{total_files} files")
@@ -323,10 +392,6 @@ class VideoProcessorModes:
         
         folder_path = settings['folder_path']
         template_info = settings['template_info']
-        text_settings = settings['text_settings']
-        audio_settings = settings['audio_settings']
-        output_settings = settings['output_settings']
-        gpu_settings = settings['gpu_settings']
         
         # Validation
         if not folder_path:
@@ -337,15 +402,6 @@ class VideoProcessorModes:
             print("❌ No template selected")
             return False
         
-        # Get template and create mask
-        template = cv2.imread(template_info['path'])
-        if template is None:
-            print("❌ Could not load template")
-            return False
-        
-        template = cv2.resize(template, (1080, 1920))
-        template_mask = create_green_screen_mask(template)
-        
         # Get media files
         try:
             media_files = get_all_media_files(folder_path)
@@ -356,21 +412,12 @@ class VideoProcessorModes:
             
             print(f"📹 Found {len(media_files)} media files")
             
-            # Determine output folder
-            if output_settings['custom_enabled'] and output_settings['custom_folder']:
-                output_folder = output_settings['custom_folder']
-            else:
-                output_folder = folder_path
-            
-            # Create output subfolder
-            from utils.file_operations import create_output_folder
-            output_folder = create_output_folder(output_folder, "greenscreen_output")
+            job = self.prepare_media_job(settings)
+            if job is None:
+                return False
             
             # Process files
-            return self._process_media_files(
-                media_files, folder_path, output_folder, template, template_mask,
-                text_settings, audio_settings, gpu_settings, "greenscreen"
-            )
+            return self.process_media_job(job, media_files)
             
         except Exception as e:
             print(f"❌ Green Screen mode error: {e}")
@@ -383,11 +430,6 @@ class VideoProcessorModes:
         print("🌀 Starting Blur Mode processing...")
         
         folder_path = settings['folder_path']
-        blur_settings = settings['blur_settings']
-        text_settings = settings['text_settings']
-        audio_settings = settings['audio_settings']
-        output_settings = settings['output_settings']
-        gpu_settings = settings['gpu_settings']
         
         # Validation
         if not folder_path:
@@ -404,21 +446,10 @@ class VideoProcessorModes:
             
             print(f"📹 Found {len(media_files)} media files")
             
-            # Determine output folder
-            if output_settings['custom_enabled'] and output_settings['custom_folder']:
-                output_folder = output_settings['custom_folder']
-            else:
-                output_folder = folder_path
-            
-            # Create output subfolder
-            from utils.file_operations import create_output_folder
-            output_folder = create_output_folder(output_folder, "blur_output")
+            job = self.prepare_media_job(settings)
             
             # Process files
-            return self._process_media_files(
-                media_files, folder_path, output_folder, None, None,
-                text_settings, audio_settings, gpu_settings, "blur", blur_settings
-            )
+            return self.process_media_job(job, media_files)
             
         except Exception as e:
             print(f"❌ Blur mode error: {e}")
@@ -426,20 +457,87 @@ class VideoProcessorModes:
             traceback.print_exc()
             return False
     
+    def prepare_media_job(self, settings):
+        """
+        Load what a greenscreen/blur batch needs once: template and mask, canvas,
+        output folder and render manifest. The job can be processed repeatedly
+        (watch-folder daemon). Returns None if the template cannot be loaded.
+        """
+        mode = settings['mode']
+        folder_path = settings['folder_path']
+        output_settings = settings['output_settings']
+        audio_settings = settings['audio_settings']
+        text_settings = settings['text_settings']
+        canvas = get_canvas(settings)
+        gif_encoder = output_settings.get('gif_encoder', "palette")
+        
+        template = template_mask = template_path = blur_settings = None
+        if mode == "greenscreen":
+            # Get template and create mask
+            template_path = settings['template_info']['path']
+            template = cv2.imread(template_path)
+            if template is None:
+                print("❌ Could not load template")
+                return None
+            
+            template = cv2.resize(template, canvas.size)
+            template_mask = create_green_screen_mask(template)
+        else:
+            blur_settings = settings['blur_settings']
+        
+        # Determine output folder
+        if output_settings['custom_enabled'] and output_settings['custom_folder']:
+            output_folder = output_settings['custom_folder']
+        else:
+            output_folder = folder_path
+        
+        # Create output subfolder
+        from utils.file_operations import create_output_folder
+        output_folder = create_output_folder(output_folder, f"{mode}_output")
+        
+        return {
+            'mode': mode,
+            'folder_path': folder_path,
+            'output_folder': output_folder,
+            'template': template,
+            'template_mask': template_mask,
+            'blur_settings': blur_settings,
+            'text_settings': text_settings,
+            'audio_settings': audio_settings,
+            'gpu_settings': settings['gpu_settings'],
+            'canvas': canvas,
+            'gif_encoder': gif_encoder,
+            'manifest': get_manifest(output_folder, output_settings),
+            'render_settings': get_render_settings(
+                mode, template_path, text_settings, audio_settings, canvas, blur_settings=blur_settings,
+                **({'gif_encoder': gif_encoder} if gif_encoder != "palette" else {})
+            )
+        }
+    
+    def process_media_job(self, job, media_files):
+        """Process media files (names in job['folder_path']) with a prepared greenscreen/blur job."""
+        return self._process_media_files(
+            media_files, job['folder_path'], job['output_folder'], job['template'], job['template_mask'],
+            job['text_settings'], job['audio_settings'], job['gpu_settings'], job['mode'], job['blur_settings'],
+            canvas=job['canvas'],
+            manifest=job['manifest'],
+            render_settings=job['render_settings'],
+            gif_encoder=job['gif_encoder']
+        )
+    
     def _process_media_files(self, media_files, folder_path, output_folder, template, template_mask,
-                           text_settings, audio_settings, gpu_settings, mode, blur_settings=None):
-        """Process media files for greenscreen or blur mode."""
-        successful_count = 0
+                           text_settings, audio_settings, gpu_settings, mode, blur_settings=None,
+                           canvas=None, manifest=None, render_settings=None, gif_encoder="palette"):
+        """
+        Process media files for greenscreen or blur mode.
+        Videos run through a render -> encode -> mux pipeline, so different files
+        can be in different stages at once (GIFs and images finish in the render stage).
+        Files whose output is up to date in the render manifest are skipped.
+        """
         total_files = len(media_files)
         
-        for i, file_name in enumerate(media_files):
-            if self.progress_callback:
-                overall_progress = (i / total_files) * 100
-                self.progress_callback(
-                    overall_progress, 
-                    f"Processing file {i+1}/{total_files}: {file_name}"
-                )
-            
+        def describe_file(file_name):
+            """Output path and input file of a media file."""
             file_path = os.path.join(folder_path, file_name)
             output_path = os.path.join(output_folder, f"{mode}_{file_name}")
             
@@ -451,145 +549,169 @@ class VideoProcessorModes:
             else:
                 output_path = os.path.splitext(output_path)[0] + '.mp4'
             
-            try:
-                if is_gif_file(file_path):
-                    # Process GIF
-                    if mode == "greenscreen":
-                        success = process_gif_greenscreen(
-                            file_path, template, template_mask, output_path, text_settings
-                        )
-                    elif mode == "blur":
-                        success = process_gif_blur(
-                            file_path, output_path, blur_settings, text_settings
-                        )
-                elif is_image_file(file_path):
-                    # Process Image -> MP4
-                    if mode == "greenscreen":
-                        success = self._process_image_greenscreen(
-                            file_path, template, template_mask, output_path, text_settings, audio_settings
-                        )
-                    elif mode == "blur":
-                        success = self._process_image_blur(
-                            file_path, output_path, blur_settings, text_settings, audio_settings
-                        )
-                else:
-                    # Process Video
-                    if mode == "greenscreen":
-                        temp_output = self.core.process_single_video(
-                            file_path, template, template_mask, output_path, 
-                            text_settings, gpu_settings
-                        )
-                        if temp_output:
-                            # Add audio
-                            from utils.file_operations import add_audio_to_video, add_background_music_to_video
-                            
-                            if audio_settings.get('dual_audio_enabled', False):
-                                # Dual audio mixing mode
-                                from utils.file_operations import add_dual_audio_to_video
-                                import random
-                                from utils.file_operations import get_audio_files
-                                audio_files = get_audio_files(audio_settings['folder_path'])
-                                if audio_files:
-                                    background_audio = os.path.join(
-                                        audio_settings['folder_path'], 
-                                        random.choice(audio_files)
-                                    )
-                                    success = add_dual_audio_to_video(
-                                        temp_output, file_path, background_audio, output_path,
-                                        original_volume=audio_settings['original_volume'],
-                                        background_volume=audio_settings['background_volume']
-                                    )
-                                else:
-                                    success = add_audio_to_video(temp_output, file_path, output_path)
-                            elif audio_settings['enabled'] and audio_settings['folder_path']:
-                                # Background music only mode
-                                import random
-                                from utils.file_operations import get_audio_files
-                                audio_files = get_audio_files(audio_settings['folder_path'])
-                                if audio_files:
-                                    background_audio = os.path.join(
-                                        audio_settings['folder_path'], 
-                                        random.choice(audio_files)
-                                    )
-                                    success = add_background_music_to_video(
-                                        temp_output, file_path, background_audio, 
-                                        output_path, audio_settings.get('volume', audio_settings.get('background_volume', 50))
-                                    )
-                                else:
-                                    success = add_audio_to_video(temp_output, file_path, output_path)
-                            else:
-                                success = add_audio_to_video(temp_output, file_path, output_path)
-                        else:
-                            # Original audio only
-                            success = False
-                    elif mode == "blur":
-                        temp_output = self.core.process_single_video_blur(
-                            file_path, output_path, blur_settings, text_settings, gpu_settings
-                        )
-                        if temp_output:
-                            # Add audio
-                            from utils.file_operations import add_audio_to_video, add_background_music_to_video
-                            if audio_settings.get('dual_audio_enabled', False):
-                                # Dual audio mixing mode
-                                from utils.file_operations import add_dual_audio_to_video
-                                import random
-                                from utils.file_operations import get_audio_files
-                                audio_files = get_audio_files(audio_settings['folder_path'])
-                                if audio_files:
-                                    background_audio = os.path.join(
-                                        audio_settings['folder_path'], 
-                                        random.choice(audio_files)
-                                    )
-                                    success = add_dual_audio_to_video(
-                                        temp_output, file_path, background_audio, output_path,
-                                        original_volume=audio_settings['original_volume'],
-                                        background_volume=audio_settings['background_volume']
-                                    )
-                                else:
-                                    success = add_audio_to_video(temp_output, file_path, output_path)
-                            elif audio_settings['enabled'] and audio_settings['folder_path']:
-                                # Background music only mode
-                                import random
-                                from utils.file_operations import get_audio_files
-                                audio_files = get_audio_files(audio_settings['folder_path'])
-                                if audio_files:
-                                    background_audio = os.path.join(
-                                        audio_settings['folder_path'], 
-                                        random.choice(audio_files)
-                                    )
-                                    success = add_background_music_to_video(
-                                        temp_output, file_path, background_audio, 
-                                        output_path, audio_settings.get('volume', audio_settings.get('background_volume', 50))
-                                    )
-                                else:
-                                    success = add_audio_to_video(temp_output, file_path, output_path)
-                            else:
-                                # Original audio only
-                                success = add_audio_to_video(temp_output, file_path, output_path)
-                        else:
-                            success = False
+            return output_path, [file_path]
+        
+        media_files, manifest_entries, skipped_count = self._filter_unchanged(
+            media_files, describe_file, manifest, render_settings
+        )
+        
+        # Assign background music for the whole batch (GIF outputs have no audio)
+        work_items = self._plan_background_music(
+            media_files, audio_settings, lambda file_name: not is_gif_file(file_name)
+        )
+        
+        jobs = []
+        for i, (file_name, file_audio_settings) in enumerate(work_items):
+            output_path, (file_path,) = describe_file(file_name)
+            
+            jobs.append({
+                'index': i,
+                'file_name': file_name,
+                'file_path': file_path,
+                'input_paths': [file_path],
+                'output_path': output_path,
+                'audio_settings': file_audio_settings
+            })
+        
+        def render_stage(job):
+            """Render frames (videos: composited temp file, GIFs/images: final output)."""
+            file_path = job['file_path']
+            output_path = job['output_path']
+            
+            job['done'] = True
+            
+            if is_gif_file(file_path):
+                # Process GIF
+                if mode == "greenscreen":
+                    job['success'] = process_gif_greenscreen(
+                        file_path, template, template_mask, output_path, text_settings, canvas, gif_encoder
+                    )
+                elif mode == "blur":
+                    job['success'] = process_gif_blur(
+                        file_path, output_path, blur_settings, text_settings, canvas, gif_encoder
+                    )
+            elif is_image_file(file_path):
+                # Process Image -> MP4
+                if mode == "greenscreen":
+                    job['success'] = self._process_image_greenscreen(
+                        file_path, template, template_mask, output_path, text_settings, job['audio_settings'],
+                        canvas
+                    )
+                elif mode == "blur":
+                    job['success'] = self._process_image_blur(
+                        file_path, output_path, blur_settings, text_settings, job['audio_settings'],
+                        canvas
+                    )
+            else:
+                # Process Video
+                if mode == "greenscreen":
+                    temp_output = self.core.process_single_video(
+                        file_path, template, template_mask, output_path, 
+                        text_settings, gpu_settings, canvas
+                    )
+                elif mode == "blur":
+                    temp_output = self.core.process_single_video_blur(
+                        file_path, output_path, blur_settings, text_settings, gpu_settings, canvas
+                    )
                 
-                if success:
-                    successful_count += 1
-                    print(f"✅ Processed: {file_name}")
+                if temp_output:
+                    job['temp_output'] = temp_output
+                    job['done'] = False
                 else:
-                    print(f"❌ Failed: {file_name}")
-            
-            except Exception as e:
-                print(f"❌ Error processing {file_name}: {e}")
-                continue
+                    job['success'] = False
+            
+            return job
+        
+        stages = [
+            Stage("render", render_stage, get_stage_workers(gpu_settings, 'render')),
+            Stage("encode", self._encode_stage, get_stage_workers(gpu_settings, 'encode')),
+            Stage("mux", self._mux_stage, get_stage_workers(gpu_settings, 'mux'))
+        ]
+        scheduler = StageScheduler(stages)
+        with manifest_batch(manifest):
+            results = scheduler.run(jobs, self._record_rendered(manifest, manifest_entries))
+        
+        for job in sorted(results, key=lambda job: job['index']):
+            if job.get('success'):
+                print(f"✅ Processed: {job['file_name']}")
+            else:
+                print(f"❌ Failed: {job['file_name']}")
+        
+        successful_count = skipped_count + sum(1 for job in results if job.get('success'))
         
         print(f"🎬 {mode.title()} processing completed!")
         print(f"✅ Successfully processed: {successful_count}/{total_files} files")
         print(f"📁 Output folder: {output_folder}")
+        scheduler.print_report()
         
         return successful_count > 0
     
-    def _process_image_greenscreen(self, image_path, template, template_mask, output_path, text_settings, audio_settings):
+    def _encode_stage(self, job):
+        """Encode the rendered temp video to H.264 (no audio yet)."""
+        from utils.audio_engine import encode_video
+        
+        temp_output = job['temp_output']
+        encoded_output = temp_output.replace('_temp.mp4', '_encoded.mp4')
+        
+        try:
+            encode_video(temp_output, encoded_output)
+            os.remove(temp_output)
+            job['temp_output'] = encoded_output
+            job['video_codec'] = "copy"
+        except Exception as e:
+            # Mux stage will encode the rendered file itself
+            print(f"⚠️ Encode stage failed for {job['file_name']}: {e}")
+            job['video_codec'] = "libx264"
+        
+        return job
+    
+    def _mux_stage(self, job):
+        """Add audio (original, background music or both) and write the final output."""
+        from utils.file_operations import add_audio_to_video, add_background_music_to_video, add_dual_audio_to_video
+        
+        temp_output = job['temp_output']
+        file_path = job['file_path']
+        output_path = job['output_path']
+        audio_settings = job['audio_settings']
+        video_codec = job.get('video_codec', "libx264")
+        
+        if audio_settings.get('dual_audio_enabled', False):
+            # Dual audio mixing mode
+            background_audio = self._get_background_audio(audio_settings)
+            if background_audio:
+                success = add_dual_audio_to_video(
+                    temp_output, file_path, background_audio, output_path,
+                    original_volume=audio_settings['original_volume'],
+                    background_volume=audio_settings['background_volume'],
+                    video_codec=video_codec
+                )
+            else:
+                success = add_audio_to_video(temp_output, file_path, output_path, video_codec)
+        elif audio_settings['enabled'] and audio_settings['folder_path']:
+            # Background music only mode
+            background_audio = self._get_background_audio(audio_settings)
+            if background_audio:
+                success = add_background_music_to_video(
+                    temp_output, file_path, background_audio, 
+                    output_path, audio_settings.get('volume', audio_settings.get('background_volume', 50)),
+                    video_codec=video_codec
+                )
+            else:
+                success = add_audio_to_video(temp_output, file_path, output_path, video_codec)
+        else:
+            # Original audio only
+            success = add_audio_to_video(temp_output, file_path, output_path, video_codec)
+        
+        job['success'] = success
+        return job
+    
+    def _process_image_greenscreen(self, image_path, template, template_mask, output_path, text_settings, audio_settings,
+                                   canvas=None):
         """Process image with greenscreen mode -> MP4 output."""
+        canvas = canvas or get_canvas(None)
+        
         try:
             import cv2
-            from moviepy.editor import VideoFileClip, AudioFileClip
             
             # Load image
             image = cv2.imread(image_path)
@@ -603,24 +725,26 @@ class VideoProcessorModes:
             
             # Add text overlay if enabled
             if text_settings['enabled']:
-                processed_frame = self.core.add_text_overlay(processed_frame, os.path.basename(image_path), text_settings)
+                processed_frame = self.core.add_text_overlay(processed_frame, os.path.basename(image_path), text_settings, canvas)
             
             # Ensure correct size
-            if processed_frame.shape[:2] != (1920, 1080):
-                processed_frame = cv2.resize(processed_frame, (1080, 1920))
+            if processed_frame.shape[:2] != canvas.shape:
+                processed_frame = cv2.resize(processed_frame, canvas.size)
             
             # Create MP4 from single image (5 seconds duration)
-            fps = 30
+            fps = canvas.fps or 30
             duration_seconds = 5
             total_frames = fps * duration_seconds
             
             # Setup MP4 writer
             temp_output = output_path.replace('.mp4', '_temp.mp4')
             fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            out = cv2.VideoWriter(temp_output, fourcc, fps, (1080, 1920))
+            out = cv2.VideoWriter(temp_output, fourcc, fps, canvas.size)
+            get_cancel_token().track(temp_output)
             
             # Write same frame multiple times to create video
             for frame_num in range(total_frames):
+                get_cancel_token().check()
                 out.write(processed_frame)
             
             out.release()
@@ -634,8 +758,11 @@ class VideoProcessorModes:
             print(f"❌ Image greenscreen processing error: {e}")
             return False
     
-    def _process_image_blur(self, image_path, output_path, blur_settings, text_settings, audio_settings):
+    def _process_image_blur(self, image_path, output_path, blur_settings, text_settings, audio_settings,
+                            canvas=None):
         """Process image with blur mode -> MP4 output."""
+        canvas = canvas or get_canvas(None)
+        
         try:
             import cv2
             
@@ -652,29 +779,33 @@ class VideoProcessorModes:
                 blur_settings['crop_top'],
                 blur_settings['crop_bottom'],
                 blur_settings['video_x_position'],
-                blur_settings['video_y_position']
+                blur_settings['video_y_position'],
+                canvas.width,
+                canvas.height
             )
             
             # Add text overlay if enabled
             if text_settings['enabled']:
-                processed_frame = self.core.add_text_overlay(processed_frame, os.path.basename(image_path), text_settings)
+                processed_frame = self.core.add_text_overlay(processed_frame, os.path.basename(image_path), text_settings, canvas)
             
             # Ensure correct size
-            if processed_frame.shape[:2] != (1920, 1080):
-                processed_frame = cv2.resize(processed_frame, (1080, 1920))
+            if processed_frame.shape[:2] != canvas.shape:
+                processed_frame = cv2.resize(processed_frame, canvas.size)
             
             # Create MP4 from single image (5 seconds duration)
-            fps = 30
+            fps = canvas.fps or 30
             duration_seconds = 5
             total_frames = fps * duration_seconds
             
             # Setup MP4 writer
             temp_output = output_path.replace('.mp4', '_temp.mp4')
             fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            out = cv2.VideoWriter(temp_output, fourcc, fps, (1080, 1920))
+            out = cv2.VideoWriter(temp_output, fourcc, fps, canvas.size)
+            get_cancel_token().track(temp_output)
             
             # Write same frame multiple times to create video
             for frame_num in range(total_frames):
+                get_cancel_token().check()
                 out.write(processed_frame)
             
             out.release()
@@ -693,36 +824,16 @@ class VideoProcessorModes:
         try:
             # For image conversion, we only add background music (no original audio)
             if audio_settings.get('enabled', False) and audio_settings.get('folder_path'):
-                import random
-                from utils.file_operations import get_audio_files
-                from moviepy.editor import VideoFileClip, AudioFileClip
+                from utils.audio_engine import mix_audio_to_video
                 
-                audio_files = get_audio_files(audio_settings['folder_path'])
-                if audio_files:
-                    background_audio_path = os.path.join(
-                        audio_settings['folder_path'], 
-                        random.choice(audio_files)
-                    )
+                background_audio_path = self._get_background_audio(audio_settings)
+                if background_audio_path:
                     
-                    video_clip = VideoFileClip(temp_output)
-                    background_audio = AudioFileClip(background_audio_path)
-                    
-                    # Adjust volume
-                    volume = audio_settings.get('background_volume', audio_settings.get('volume', 50)) / 100.0
-                    background_audio = background_audio.volumex(volume)
-                    
-                    # Loop or trim audio to match video duration
-                    if background_audio.duration < video_clip.duration:
-                        background_audio = background_audio.loop(duration=video_clip.duration)
-                    else:
-                        background_audio = background_audio.subclip(0, video_clip.duration)
-                    
-                    final_clip = video_clip.set_audio(background_audio)
-                    final_clip.write_videofile(output_path, codec="libx264", audio_codec="aac", logger=None)
-                    
-                    video_clip.close()
-                    background_audio.close()
-                    final_clip.close()
+                    # Background music looped or trimmed to the video duration
+                    volume = audio_settings.get('background_volume', audio_settings.get('volume', 50))
+                    mix_audio_to_video(temp_output, output_path, [
+                        {'path': background_audio_path, 'volume': volume, 'loop': True, 'cached': True}
+                    ])
                     
                     # Remove temp file
                     if os.path.exists(temp_output):
@@ -740,4 +851,101 @@ class VideoProcessorModes:
             # Fallback: just rename temp file
             if os.path.exists(temp_output):
                 import shutil
-                shutil.move(temp_output, output_path)
\ No newline at end of file
+                shutil.move(temp_output, output_path)
+    
+    def _run_single_stage(self, work_items, function, gpu_settings, describe, on_done=None):
+        """
+        Run (item, audio_settings) work items through a one-stage pipeline.
+        Used by modes whose per-file functions render and mux in one call.
+        describe(item) returns (output_path, input_paths).
+        Returns number of successful jobs.
+        """
+        jobs = []
+        for i, (item, item_audio_settings) in enumerate(work_items):
+            output_path, input_paths = describe(item)
+            jobs.append({
+                'index': i,
+                'item': item,
+                'audio_settings': item_audio_settings,
+                'output_path': output_path,
+                'input_paths': input_paths
+            })
+        
+        scheduler = StageScheduler([Stage("render", function, get_stage_workers(gpu_settings, 'render'))])
+        results = scheduler.run(jobs, on_done)
+        scheduler.print_report()
+        
+        return sum(1 for job in results if job.get('success'))
+    
+    def _filter_unchanged(self, items, describe, manifest, render_settings):
+        """
+        Drop items whose output is up to date in the render manifest.
+        describe(item) returns (output_path, input_paths).
+        Returns (items to render, {output_path: manifest entry}, skipped count).
+        """
+        if manifest is None:
+            return items, {}, 0
+        
+        pending_items = []
+        entries = {}
+        for item in items:
+            get_cancel_token().check()
+            output_path, input_paths = describe(item)
+            entry = manifest.get_entry(input_paths, render_settings)
+            if manifest.is_current(output_path, entry):
+                continue
+            entries[output_path] = entry
+            pending_items.append(item)
+        
+        skipped_count = len(items) - len(pending_items)
+        if skipped_count:
+            print(f"⏭️ Skipping {skipped_count} unchanged outputs (render manifest)")
+        
+        return pending_items, entries, skipped_count
+    
+    def _record_rendered(self, manifest, entries):
+        """Scheduler on_done callback recording successful outputs in the render manifest."""
+        def on_done(job):
+            if manifest is not None and job.get('success') and job['output_path'] in entries:
+                manifest.record(job['output_path'], entries[job['output_path']])
+        return on_done
+    
+    def _plan_background_music(self, items, audio_settings, uses_music=None):
+        """
+        Assign background music to every item up front and order items by track.
+        Returns list of (item, audio_settings) pairs, with the planned track in
+        audio_settings['background_audio_path'].
+        """
+        uses_music = uses_music or (lambda item: True)
+        music_enabled = audio_settings.get('enabled', False) or audio_settings.get('dual_audio_enabled', False)
+        # Positions of the items with music (a set: the rest are found in O(1) each)
+        music_indices = {index for index, item in enumerate(items) if uses_music(item)} if music_enabled else set()
+        music_items = [item for index, item in enumerate(items) if index in music_indices]
+        
+        policy, seed = get_music_settings(audio_settings)
+        assignments = plan_music(len(music_items), audio_settings.get('folder_path'), policy, seed)
+        
+        if not assignments:
+            return [(item, audio_settings) for item in items]
+        
+        print(f"🎵 Music plan: {len(music_items)} outputs, {len(set(assignments))} tracks "
+              f"({MUSIC_POLICIES[policy]}{f', seed {seed}' if seed is not None else ''})")
+        
+        work_items = [
+            (item, dict(audio_settings, background_audio_path=track))
+            for item, track in order_by_track(music_items, assignments)
+        ]
+        work_items += [(item, audio_settings) for index, item in enumerate(items) if index not in music_indices]
+        return work_items
+    
+    def _get_background_audio(self, audio_settings):
+        """Get planned background track (random pick from the folder if not planned)."""
+        if audio_settings.get('background_audio_path'):
+            return audio_settings['background_audio_path']
+        
+        import random
+        from utils.file_operations import get_audio_files
+        audio_files = get_audio_files(audio_settings['folder_path'])
+        if not audio_files:
+            return None
+        return os.path.join(audio_settings['folder_path'], random.choice(audio_files))
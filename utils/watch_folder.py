@@ -0,0 +1,280 @@
+"""
+Watch Folder - Continuous incremental processing
+Watches the input folder(s) of a processing mode and renders new files as
+they arrive, using a fixed settings profile. Linux uses inotify (through
+ctypes, no extra dependency); other systems poll the folder listing. A file
+is only processed once its size and mtime have stopped changing, so clips
+that are still being copied are never picked up half-written.
+
+The engine stays warm between files: template, mask, canvas and render
+manifest are prepared once, and the manifest keeps old files from being
+rendered again (also across daemon restarts).
+"""
+
+import os
+import sys
+import time
+import select
+import struct
+import ctypes
+import ctypes.util
+
+from utils.file_operations import get_all_media_files, is_media_file, is_audio_file, get_slot_sources
+from utils.cancellation import get_cancel_token
+from utils.progress_events import progress_session
+
+# inotify event masks (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, name length
+
+# Seconds a file's size and mtime must stay unchanged before it is processed
+DEFAULT_SETTLE_SECONDS = 2.0
+
+# Seconds between stability checks (and folder scans when polling)
+DEFAULT_POLL_INTERVAL = 1.0
+
+class InotifyWatcher:
+    """Reports paths created, written or moved into the watched folders (Linux)."""
+    
+    def __init__(self, folders):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+        self.libc = libc
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        
+        self.folders = {}
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_MODIFY
+        for folder in folders:
+            wd = libc.inotify_add_watch(self.fd, os.fsencode(folder), mask)
+            if wd < 0:
+                error = ctypes.get_errno()
+                self.close()
+                raise OSError(error, f"inotify_add_watch failed for {folder}")
+            self.folders[wd] = folder
+    
+    def wait(self, timeout):
+        """Wait up to timeout seconds, return set of changed paths (None after queue overflow)."""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        
+        paths = set()
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, name_length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + name_length].rstrip(b"\0")
+            offset += name_length
+            
+            if mask & IN_Q_OVERFLOW:
+                return None  # Events were lost, caller rescans
+            if name and wd in self.folders:
+                paths.add(os.path.join(self.folders[wd], os.fsdecode(name)))
+        return paths
+    
+    def close(self):
+        """Stop watching."""
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+class PollingWatcher:
+    """Fallback watcher: compares folder listings (name, size, mtime) every interval."""
+    
+    def __init__(self, folders):
+        self.folders = list(folders)
+        self.snapshot = self._scan()
+    
+    def _scan(self):
+        snapshot = {}
+        for folder in self.folders:
+            try:
+                with os.scandir(folder) as entries:
+                    for entry in entries:
+                        if entry.is_file():
+                            stat = entry.stat()
+                            snapshot[entry.path] = (stat.st_size, stat.st_mtime_ns)
+            except OSError as e:
+                print(f"⚠️ Could not scan {folder}: {e}")
+        return snapshot
+    
+    def wait(self, timeout):
+        """Sleep timeout seconds, return set of new or changed paths."""
+        time.sleep(timeout)
+        snapshot = self._scan()
+        changed = {path for path, state in snapshot.items() if self.snapshot.get(path) != state}
+        self.snapshot = snapshot
+        return changed
+    
+    def close(self):
+        pass
+
+def create_watcher(folders, use_inotify=True):
+    """inotify watcher on Linux, polling watcher elsewhere or if inotify is unavailable."""
+    if use_inotify and sys.platform.startswith('linux'):
+        try:
+            watcher = InotifyWatcher(folders)
+            print("👀 Watching with inotify")
+            return watcher
+        except (OSError, AttributeError) as e:
+            print(f"⚠️ inotify unavailable ({e}), polling instead")
+    print("👀 Watching by polling")
+    return PollingWatcher(folders)
+
+class StabilityTracker:
+    """Tracks candidate files until their size and mtime stop changing."""
+    
+    def __init__(self, settle_seconds=DEFAULT_SETTLE_SECONDS):
+        self.settle_seconds = settle_seconds
+        self.pending = {}  # path -> (size, mtime_ns, time of last change)
+        self.settled = {}  # path -> (size, mtime_ns) when last returned by pop_ready
+    
+    def add(self, path):
+        """Start (or restart) tracking path."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.pending.pop(path, None)
+            return
+        state = (stat.st_size, stat.st_mtime_ns)
+        if self.settled.get(path) == state:
+            return  # Late event for a file that was already processed
+        if self.pending.get(path, (None, None, 0))[:2] != state:
+            self.pending[path] = state + (time.time(),)
+    
+    def pop_ready(self):
+        """Remove and return paths that are non-empty and unchanged for settle_seconds."""
+        now = time.time()
+        ready = []
+        for path, (size, mtime_ns, changed_at) in list(self.pending.items()):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                del self.pending[path]  # Deleted or renamed before it settled
+                continue
+            
+            if (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+                self.pending[path] = (stat.st_size, stat.st_mtime_ns, now)
+            elif stat.st_size > 0 and now - changed_at >= self.settle_seconds:
+                del self.pending[path]
+                self.settled[path] = (size, mtime_ns)
+                ready.append(path)
+        return sorted(ready)
+
+def get_watch_folders(settings):
+    """Input folders of a mode: {folder: 'media' or 'audio'}."""
+    mode = settings['mode']
+    if mode == "dual_greenscreen":
+        # Every slot input that is a folder (playlists are not watched)
+        return {source: 'media' for _, source in get_slot_sources(settings['folder_paths'])
+                if os.path.isdir(source)}
+    if mode == "narasi":
+        return {settings['folder_path']: 'media', settings['narasi_settings']['audio_folder_path']: 'audio'}
+    return {settings['folder_path']: 'media'}
+
+class WatchFolderDaemon:
+    """
+    Renders new files in the watched folders with a fixed settings profile.
+    Greenscreen/blur render exactly the new files with a prepared (warm) job;
+    dual and narasi rerun their batch, where the render manifest skips every
+    output whose inputs did not change.
+    """
+    
+    def __init__(self, settings, settle_seconds=DEFAULT_SETTLE_SECONDS,
+                 poll_interval=DEFAULT_POLL_INTERVAL, on_event=None, use_inotify=True, subscribers=()):
+        from utils.video_processor_main import VideoProcessor
+        
+        self.settings = settings
+        self.mode = settings['mode']
+        self.poll_interval = poll_interval
+        self.on_event = on_event or (lambda event, **fields: None)
+        self.use_inotify = use_inotify
+        self.subscribers = list(subscribers)
+        self.folders = get_watch_folders(settings)
+        self.tracker = StabilityTracker(settle_seconds)
+        self.processor = VideoProcessor(None)
+        self.media_job = None
+        
+        if self.mode in ("greenscreen", "blur"):
+            self.media_job = self.processor.modes.prepare_media_job(settings)
+            if self.media_job is None:
+                raise ValueError("Could not prepare processing job (template)")
+    
+    def is_input_file(self, path):
+        """True for media (or narasi audio) files directly inside a watched folder."""
+        folder, file_name = os.path.split(path)
+        kind = self.folders.get(folder)
+        if kind is None or file_name.startswith('.'):
+            return False
+        if not os.path.isfile(path):
+            return False
+        return is_audio_file(file_name) if kind == 'audio' else is_media_file(file_name)
+    
+    def process(self, paths):
+        """Render the outputs for newly settled input files."""
+        names = [os.path.basename(path) for path in paths]
+        self.on_event('files_ready', files=names)
+        start_time = time.time()
+        
+        try:
+            if self.media_job is not None:
+                with progress_session(self.subscribers):
+                    success = self.processor.modes.process_media_job(self.media_job, names)
+            else:
+                success = self.processor.process_settings(self.settings, subscribers=self.subscribers)
+        except Exception as e:
+            # Keep watching: a broken clip must not stop the daemon
+            print(f"❌ Error processing {', '.join(names)}: {e}")
+            self.on_event('error', files=names, message=str(e))
+            success = False
+        
+        self.on_event('batch_done', files=names, success=bool(success),
+                      elapsed=round(time.time() - start_time, 2))
+    
+    def run(self):
+        """Process existing files not rendered yet, then watch until cancelled."""
+        cancel_token = get_cancel_token()
+        
+        # Watch before listing existing files so files arriving meanwhile are not missed
+        watcher = create_watcher(list(self.folders), self.use_inotify)
+        
+        try:
+            # Catch up on files added while the daemon was not running
+            # (outputs already in the manifest are skipped)
+            for folder, kind in self.folders.items():
+                if kind == 'media':
+                    for name in get_all_media_files(folder):
+                        self.tracker.add(os.path.join(folder, name))
+            
+            self.on_event('watching', folders=list(self.folders), mode=self.mode)
+            
+            while True:
+                cancel_token.check()
+                
+                changed = watcher.wait(self.poll_interval)
+                if changed is None:
+                    # inotify queue overflow: rescan everything, the manifest skips old files
+                    changed = {os.path.join(folder, name) for folder in self.folders for name in os.listdir(folder)}
+                
+                for path in changed:
+                    if self.is_input_file(path):
+                        self.tracker.add(path)
+                
+                ready = self.tracker.pop_ready()
+                if ready:
+                    self.process(ready)
+        finally:
+            watcher.close()
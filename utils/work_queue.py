@@ -0,0 +1,384 @@
+"""
+Work Queue - Distributed rendering over a shared folder
+A batch is published as a queue folder on storage every render node mounts
+(NAS). Worker nodes run the batch with the normal processing modes and claim
+each output right before rendering it, so nodes share the batch dynamically
+and a faster node simply claims more outputs. No broker or database is needed:
+
+    <queue>/queue.json              settings of the batch
+    <queue>/leases/<output>.lease   claim of a node, renewed while it renders
+    <queue>/results/<output>.json   result and timings of a finished output
+
+Leases are created with O_CREAT | O_EXCL (atomic on local filesystems and
+NFSv3+/SMB). A node renews its leases every lease_seconds / 3, in place and
+only while the lease still names it; when a node crashes its leases expire
+and other nodes take the outputs over. A node that stalled past expiry finds
+another owner in the lease, drops the claim and stops rendering it. Expiry
+compares wall clock times, so nodes need synchronised clocks (NTP).
+Settings paths must be the same on every node (same mount point).
+"""
+
+import os
+import json
+import time
+import socket
+import tempfile
+import threading
+
+QUEUE_VERSION = 1
+QUEUE_FILE = "queue.json"
+
+# Seconds a claim stays valid without renewal (crashed node -> output is retried after this)
+DEFAULT_LEASE_SECONDS = 60.0
+
+# Seconds between passes while other nodes still hold leases
+DEFAULT_POLL_INTERVAL = 5.0
+
+def _write_json(path, data):
+    """Write JSON atomically (temp file + rename in the same folder)."""
+    fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=1)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def _read_json(path):
+    """Read a JSON file, None if missing, partially written or unreadable."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def get_node_name():
+    """Name of this render node (hostname:pid, unique per worker process)."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def publish_queue(queue_folder, settings, lease_seconds=DEFAULT_LEASE_SECONDS):
+    """
+    Publish a batch: write its settings to queue_folder.
+    Results of an earlier publish of the same folder are kept, so finished
+    outputs are not rendered again; use a new folder for a fresh run.
+    """
+    os.makedirs(os.path.join(queue_folder, "leases"), exist_ok=True)
+    os.makedirs(os.path.join(queue_folder, "results"), exist_ok=True)
+    
+    _write_json(os.path.join(queue_folder, QUEUE_FILE), {
+        'version': QUEUE_VERSION,
+        'settings': settings,
+        'lease_seconds': lease_seconds,
+        'published': time.time(),
+        'publisher': socket.gethostname()
+    })
+    print(f"📤 Published {settings['mode']} queue: {queue_folder}")
+
+def load_queue(queue_folder):
+    """Load queue.json. Raises ValueError if the folder holds no queue."""
+    data = _read_json(os.path.join(queue_folder, QUEUE_FILE))
+    if not data or data.get('version') != QUEUE_VERSION:
+        raise ValueError(f"No work queue found in {queue_folder}")
+    return data
+
+class WorkQueue:
+    """
+    Claims, lease renewal and results of one node in a queue folder.
+    Made active with set_work_queue(); processing code asks claim(output_path)
+    before rendering an output and reports finish() when it is done.
+    """
+    
+    def __init__(self, queue_folder, node=None, lease_seconds=DEFAULT_LEASE_SECONDS):
+        self.queue_folder = queue_folder
+        self.node = node or get_node_name()
+        self.lease_seconds = lease_seconds
+        self.lease_folder = os.path.join(queue_folder, "leases")
+        self.result_folder = os.path.join(queue_folder, "results")
+        self.lock = threading.Lock()
+        self.held = {}  # output name -> claim time
+        self.claimed_count = 0
+        self.stop_event = threading.Event()
+        self.heartbeat = None
+        self.cancel_token = None  # cancelled when a claim is lost (stops the render)
+    
+    def _lease_path(self, name):
+        return os.path.join(self.lease_folder, name + ".lease")
+    
+    def _result_path(self, name):
+        return os.path.join(self.result_folder, name + ".json")
+    
+    def _lease_data(self, claimed):
+        return {'node': self.node, 'claimed': claimed, 'expires': time.time() + self.lease_seconds}
+    
+    def _create_lease(self, name):
+        """Create lease file exclusively. Returns False if it exists."""
+        try:
+            fd = os.open(self._lease_path(name), os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            return False
+        
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self._lease_data(time.time()), f)
+        return True
+    
+    def _break_expired_lease(self, name):
+        """Remove the lease of name if it expired. Returns True if this node removed it."""
+        lease_path = self._lease_path(name)
+        lease = _read_json(lease_path)
+        if lease is None:
+            # Being written right now, or removed by its owner
+            if not os.path.exists(lease_path) or time.time() - os.path.getmtime(lease_path) < self.lease_seconds:
+                return False
+        elif lease.get('expires', 0) > time.time():
+            return False
+        
+        # Rename is atomic: only one node can move the stale lease away
+        stale_path = f"{lease_path}.stale-{self.node.replace(':', '-')}"
+        try:
+            os.rename(lease_path, stale_path)
+        except OSError:
+            return False
+        
+        try:
+            os.remove(stale_path)
+        except OSError:
+            pass
+        owner = lease.get('node') if lease else "unknown node"
+        print(f"♻️ Lease of {owner} expired, taking over: {name}")
+        return True
+    
+    def claim(self, output_path):
+        """Claim an output for this node. False if it is finished or claimed by another node."""
+        name = os.path.basename(output_path)
+        if os.path.exists(self._result_path(name)):
+            return False
+        
+        if not self._create_lease(name):
+            if not (self._break_expired_lease(name) and self._create_lease(name)):
+                return False
+        
+        # Finished by another node between the result check and the claim
+        if os.path.exists(self._result_path(name)):
+            self._remove_lease(name)
+            return False
+        
+        with self.lock:
+            self.held[name] = time.time()
+            self.claimed_count += 1
+        return True
+    
+    def finish(self, output_path, success, timings=None):
+        """Write the result of a claimed output and release its lease."""
+        name = os.path.basename(output_path)
+        with self.lock:
+            claimed = self.held.pop(name, None)
+        if claimed is None:
+            return
+        
+        finished = time.time()
+        try:
+            _write_json(self._result_path(name), {
+                'output': output_path,
+                'node': self.node,
+                'success': bool(success),
+                'claimed': claimed,
+                'finished': finished,
+                'elapsed': round(finished - claimed, 3),
+                'timings': {stage: round(seconds, 3) for stage, seconds in (timings or {}).items()}
+            })
+        except OSError as e:
+            print(f"⚠️ Could not write result for {name}: {e}")
+        self._remove_lease(name)
+    
+    def _remove_lease(self, name):
+        try:
+            os.remove(self._lease_path(name))
+        except OSError:
+            pass
+    
+    def _renew_lease(self, name, claimed):
+        """
+        Extend the lease of name if this node still owns it. Returns False if it is lost.
+        The open lease file is rewritten in place: a lease another node broke and
+        created again is a new file, so it is never overwritten.
+        """
+        try:
+            with open(self._lease_path(name), 'r+', encoding='utf-8') as f:
+                try:
+                    lease = json.load(f)
+                except ValueError:
+                    lease = None  # Another node is writing its new lease
+                if lease is None or lease.get('node') != self.node:
+                    return False
+                
+                f.seek(0)
+                f.truncate()
+                json.dump(self._lease_data(claimed), f)
+        except FileNotFoundError:
+            return False  # Broken as expired by another node
+        return True
+    
+    def renew(self):
+        """Extend the leases this node holds; lost claims are dropped and their render stopped."""
+        with self.lock:
+            held = dict(self.held)
+        
+        for name, claimed in held.items():
+            try:
+                renewed = self._renew_lease(name, claimed)
+            except OSError as e:
+                print(f"⚠️ Could not renew lease {name}: {e}")
+                continue
+            if renewed:
+                continue
+            
+            # Another node took the output over (this node stalled past expiry)
+            print(f"⚠️ Lost lease, stopping render: {name}")
+            with self.lock:
+                self.held.pop(name, None)
+            if self.cancel_token is not None:
+                self.cancel_token.cancel()
+    
+    def _heartbeat_loop(self):
+        while not self.stop_event.wait(self.lease_seconds / 3):
+            self.renew()
+    
+    def start(self):
+        """Start renewing leases in the background."""
+        self.stop_event.clear()
+        self.heartbeat = threading.Thread(target=self._heartbeat_loop, name="lease-heartbeat", daemon=True)
+        self.heartbeat.start()
+    
+    def stop(self):
+        """Stop renewing and release unfinished claims (other nodes take them over at once)."""
+        self.stop_event.set()
+        if self.heartbeat is not None:
+            self.heartbeat.join()
+            self.heartbeat = None
+        self.release()
+    
+    def release(self):
+        """Release the claims this node holds (other nodes take them over at once)."""
+        with self.lock:
+            names = list(self.held)
+            self.held.clear()
+        for name in names:
+            self._remove_lease(name)
+    
+    def has_active_leases(self):
+        """True while any node holds an unexpired lease."""
+        now = time.time()
+        for file_name in os.listdir(self.lease_folder):
+            if not file_name.endswith(".lease"):
+                continue
+            lease = _read_json(os.path.join(self.lease_folder, file_name))
+            if lease is None or lease.get('expires', 0) > now:
+                return True
+        return False
+
+def get_queue_status(queue_folder):
+    """Summary of a queue: finished/failed/leased outputs and per-node throughput."""
+    load_queue(queue_folder)
+    now = time.time()
+    
+    nodes = {}
+    done = failed = 0
+    result_folder = os.path.join(queue_folder, "results")
+    for file_name in sorted(os.listdir(result_folder)):
+        result = _read_json(os.path.join(result_folder, file_name)) if file_name.endswith(".json") else None
+        if result is None:
+            continue
+        if result['success']:
+            done += 1
+        else:
+            failed += 1
+        node = nodes.setdefault(result['node'], {'outputs': 0, 'busy_seconds': 0.0})
+        node['outputs'] += 1
+        node['busy_seconds'] = round(node['busy_seconds'] + result['elapsed'], 3)
+    
+    leased = expired = 0
+    lease_folder = os.path.join(queue_folder, "leases")
+    for file_name in os.listdir(lease_folder):
+        if file_name.endswith(".lease"):
+            lease = _read_json(os.path.join(lease_folder, file_name))
+            if lease is not None and lease.get('expires', 0) <= now:
+                expired += 1
+            else:
+                leased += 1
+    
+    return {'done': done, 'failed': failed, 'leased': leased, 'expired': expired, 'nodes': nodes}
+
+def run_worker(queue_folder, node=None, poll_interval=DEFAULT_POLL_INTERVAL, subscribers=(),
+               on_event=None):
+    """
+    Work on a queue until every output is finished.
+    Each pass runs the batch; outputs claimed or finished by other nodes are
+    skipped. Passes repeat while this node found work, or while other nodes
+    hold leases (their outputs come back if those nodes crash).
+    subscribers receive the progress events of every pass.
+    Returns number of outputs this node rendered.
+    """
+    from utils.video_processor_main import VideoProcessor
+    from utils.cancellation import get_cancel_token, set_cancel_token, ProcessingCancelled
+    
+    data = load_queue(queue_folder)
+    settings = data['settings']
+    on_event = on_event or (lambda event, **fields: None)
+    
+    work_queue = WorkQueue(queue_folder, node, data.get('lease_seconds', DEFAULT_LEASE_SECONDS))
+    processor = VideoProcessor(None)
+    cancel_token = get_cancel_token()
+    
+    print(f"🖥️ Node {work_queue.node} working on {queue_folder}")
+    set_work_queue(work_queue)
+    work_queue.start()
+    try:
+        while True:
+            cancel_token.check()
+            claimed_before = work_queue.claimed_count
+            
+            # Each pass runs with its own token, so a lost claim stops only this pass
+            pass_token = set_cancel_token(cancel_token.create_child())
+            work_queue.cancel_token = pass_token
+            try:
+                processor.process_settings(settings, subscribers=subscribers)
+            except ProcessingCancelled:
+                pass_token.cleanup()
+                if cancel_token.is_cancelled():
+                    raise
+                # Stopped for a lost claim: give up the other claims of the pass and go on
+                work_queue.release()
+                print("🔁 Render stopped for a lost claim, continuing with the queue")
+            finally:
+                work_queue.cancel_token = None
+                set_cancel_token(cancel_token)
+                cancel_token.remove_child(pass_token)
+            
+            on_event('pass_done', node=work_queue.node, claimed=work_queue.claimed_count - claimed_before)
+            
+            if work_queue.claimed_count == claimed_before:
+                if not work_queue.has_active_leases():
+                    break
+                # Other nodes are still rendering: wait for them to finish (or their leases to expire)
+                cancel_token.event.wait(poll_interval)
+    finally:
+        work_queue.stop()
+        set_work_queue(None)
+    
+    print(f"🏁 Queue finished, this node rendered {work_queue.claimed_count} outputs")
+    return work_queue.claimed_count
+
+# Queue of the current distributed run (None for local runs)
+_active_queue = None
+
+def get_work_queue():
+    """Get the active work queue, None when not running as a queue worker."""
+    return _active_queue
+
+def set_work_queue(work_queue):
+    """Make work_queue active for the processing code (None to deactivate)."""
+    global _active_queue
+    _active_queue = work_queue
+    return work_queue